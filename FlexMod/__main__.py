@@ -0,0 +1,17 @@
+"""python -m FlexMod 入口
+
+不带参数时启动图形界面；带子命令时执行命令行工具，不导入 PyQt6。
+"""
+import multiprocessing
+import sys
+
+
+if __name__ == '__main__':
+    # 打包为可执行文件时，批量应用的进程池子进程从这里启动
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1:
+        from .cli import main as cli_main
+        sys.exit(cli_main())
+    else:
+        from .main import main
+        main()
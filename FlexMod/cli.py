@@ -0,0 +1,89 @@
+"""命令行应用
+
+不启动图形界面、不导入 PyQt6，直接把玩家设置应用到 mod 的 Config 文件，
+用于专用服务器的部署脚本：
+
+    python -m FlexMod apply --mods-dir <Mods目录> (--mod <mod名称> [--mod ...] | --all)
+                            [--preset <预设名称> | --defaults] [--jobs N] [--xpath-engine {etree,lxml}]
+
+与玩家页面一样，应用前先使 player_settings.json 与 FlexMod.json 同步，应用时
+player_settings.json 与 Config 文件一起原子提交，并记录可以在玩家页面回滚的快照。
+多个 mod 在进程池中并行应用。
+"""
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+from .utils.bulk_apply import ModApplyResult, apply_mods, find_flexmods
+from .utils.xpath_handler import available_xpath_engines
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m FlexMod', description='FlexMod 命令行工具（不启动图形界面）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    apply_parser = subparsers.add_parser('apply', help='把玩家设置应用到 mod 的 Config 文件')
+    apply_parser.add_argument('--mods-dir', required=True, help='Mods 目录')
+    target = apply_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--mod', dest='mods', action='append', metavar='NAME',
+                        help='mod 文件夹名称，可以重复指定多个')
+    target.add_argument('--all', action='store_true', help='应用 Mods 目录下所有的 FlexMod')
+    choice = apply_parser.add_mutually_exclusive_group()
+    choice.add_argument('--preset', metavar='NAME', help='应用前把该预设设为最终设置')
+    choice.add_argument('--defaults', action='store_true', help='应用前把所有设置恢复为默认值')
+    apply_parser.add_argument('-j', '--jobs', type=int, default=None, metavar='N',
+                              help='并行进程数，默认为 CPU 核数')
+    apply_parser.add_argument('--no-snapshot', action='store_true', help='不记录可回滚的快照')
+    apply_parser.add_argument('--xpath-engine', choices=('etree', 'lxml'), default=None,
+                              help='滑块 XPath 使用的引擎，默认 etree；lxml 支持完整的 XPath 1.0（需要安装 lxml）')
+    apply_parser.add_argument('-q', '--quiet', action='store_true', help='只输出错误')
+    return parser
+
+
+def print_result(result: ModApplyResult, quiet: bool) -> None:
+    """输出单个 mod 的结果"""
+    elapsed_ms = result.elapsed * 1000
+    if result.error:
+        print(f"{result.mod_name}: {result.error}", file=sys.stderr)
+    elif not result.ok:
+        print(f"{result.mod_name}: 以下文件应用设置失败，所有文件保持不变（{elapsed_ms:.0f} ms）:", file=sys.stderr)
+        for file_path in result.failed_files:
+            print(f"  {file_path}", file=sys.stderr)
+    elif not quiet:
+        print(f"{result.mod_name}: 已应用 {result.setting_count} 个设置项到 {len(result.touched_files)} 个文件"
+              f"（{elapsed_ms:.0f} ms）")
+
+
+def run_apply(args) -> int:
+    if not os.path.isdir(args.mods_dir):
+        print(f"Mods目录不存在: {args.mods_dir}", file=sys.stderr)
+        return 2
+
+    if args.xpath_engine and args.xpath_engine not in available_xpath_engines():
+        print(f"XPath 引擎不可用（未安装 lxml？）: {args.xpath_engine}", file=sys.stderr)
+        return 2
+
+    mod_names = find_flexmods(args.mods_dir) if args.all else args.mods
+    if not mod_names:
+        print(f"Mods目录下没有FlexMod: {args.mods_dir}", file=sys.stderr)
+        return 2
+
+    bulk = apply_mods(args.mods_dir, mod_names, args.preset, args.defaults,
+                      snapshot=not args.no_snapshot, max_workers=args.jobs, xpath_engine=args.xpath_engine)
+    for result in bulk.results:
+        print_result(result, args.quiet)
+    if not args.quiet and len(bulk.results) > 1:
+        print(f"共 {len(bulk.results)} 个 mod，失败 {len(bulk.failed)} 个，总耗时 {bulk.elapsed * 1000:.0f} ms")
+
+    if any(result.error for result in bulk.results):
+        return 2
+    return 0 if bulk.ok else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口，返回退出码：0 成功，1 有文件应用失败，2 参数、mod 或预设错误"""
+    args = build_parser().parse_args(argv)
+    if args.command == 'apply':
+        return run_apply(args)
+    return 2
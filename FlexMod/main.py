@@ -1,6 +1,7 @@
 """FlexMod重构版本 - 主程序入口"""
 import sys
 import os
+import multiprocessing
 from PyQt6.QtWidgets import QApplication, QMessageBox
 from PyQt6.QtCore import Qt
 
@@ -8,7 +9,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from .managers import ConfigManager, resource_manager
 from .ui import MainWindow
-from .utils.lang import get_text
+from .utils.lang import get_text, bind_config_manager
+from .utils.xpath_handler import set_xpath_engine
 
 
 def get_config_file_path(): 
@@ -26,6 +28,13 @@ def main():
     try:
         config_file_path = get_config_file_path()
         config_manager = ConfigManager(config_file_path)
+        # 语言设置由配置管理器在内存中提供，不再反复读取 config.json
+        bind_config_manager(config_manager)
+        # lxml 引擎需要在 config.json 中设置 "xpath_engine": "lxml" 启用
+        try:
+            set_xpath_engine(config_manager.get_xpath_engine())
+        except KeyError:
+            print(f"XPath 引擎不可用，使用 ElementTree: {config_manager.get_xpath_engine()}")
         window = MainWindow(config_manager)
         window.show()
         sys.exit(app.exec())
@@ -35,4 +44,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为可执行文件时，批量应用的进程池子进程从这里启动
+    multiprocessing.freeze_support()
     main()
@@ -3,6 +3,9 @@ import json
 import os
 from typing import Any, Dict, List, Optional
 
+from ..utils.atomic_write import atomic_write_json
+from ..utils.mods_scanner import mods_scanner
+
 
 class ConfigManager:
     """配置管理器"""
@@ -36,8 +39,7 @@ class ConfigManager:
     def _save_config(self, config_data: Dict[str, Any]) -> None:
         """保存配置文件"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_data, f, indent=4, ensure_ascii=False)
+            atomic_write_json(self.config_file, config_data)
         except Exception as e:
             print(f"保存配置文件失败: {e}")
     
@@ -59,6 +61,15 @@ class ConfigManager:
         self.config_data['lang'] = lang
         self._save_config(self.config_data)
     
+    def get_xpath_engine(self) -> str:
+        """获取滑块 XPath 使用的引擎名称（'etree' 或 'lxml'，默认 'etree'）"""
+        return self.config_data.get('xpath_engine', 'etree')
+    
+    def set_xpath_engine(self, name: str) -> None:
+        """设置 XPath 引擎，下次启动时生效"""
+        self.config_data['xpath_engine'] = name
+        self._save_config(self.config_data)
+    
     def get_enabled_flexmod(self) -> List[str]:
         """获取启用的FlexMod列表
         
@@ -66,22 +77,16 @@ class ConfigManager:
         1. 检查Mods目录下的每个文件夹
         2. 验证是否存在FlexMod/FlexMod.json文件
         3. 自动添加有效的FlexMod，移除无效的FlexMod
+        
+        扫描结果按目录 mtime 缓存，Mods目录没有变化时不会重新列目录。
         """
         mods_dir = self.get_mods_dir()
         valid_flexmods = []
         
         # 检查Mods目录是否存在
-        if mods_dir and os.path.exists(mods_dir):
+        if mods_dir:
             try:
-                # 获取Mods目录下的所有文件夹
-                folders = [f for f in os.listdir(mods_dir) 
-                          if os.path.isdir(os.path.join(mods_dir, f))]
-                
-                # 检查每个文件夹是否有FlexMod\FlexMod.json文件
-                for folder in folders:
-                    flexmod_json_path = os.path.join(mods_dir, folder, 'FlexMod', 'FlexMod.json')
-                    if os.path.exists(flexmod_json_path):
-                        valid_flexmods.append(folder)
+                valid_flexmods = mods_scanner.flexmods(mods_dir)
             except Exception as e:
                 print(f"检查Mods目录失败: {e}")
         
@@ -1,7 +1,10 @@
 """JSON管理器"""
+import copy
 import json
 import os
 from typing import Dict, Any, Optional
+from ..utils.atomic_write import atomic_write_json
+from ..utils.flexmod_definition import flexmod_definitions
 from .block_manager import BlockManager
 from .group_manager import GroupManager
 
@@ -20,14 +23,14 @@ class JsonManager:
             return False
         
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 编辑器会修改配置块中的列表，使用共享定义快照的副本
+            data = flexmod_definitions.get(self.file_path).data
             
             if 'groups' in data:
-                self.group_manager.load_from_json_groups(data['groups'])
+                self.group_manager.load_from_json_groups(copy.deepcopy(data['groups']))
             
             if 'configs' in data:
-                self.block_manager.load_from_json_configs(data['configs'])
+                self.block_manager.load_from_json_configs(copy.deepcopy(data['configs']))
             
             return True
         except Exception as e:
@@ -42,8 +45,7 @@ class JsonManager:
                 'configs': self.block_manager.to_json_configs()
             }
             
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.file_path, data, indent=2)
             
             return True
         except Exception as e:
@@ -64,8 +66,7 @@ class JsonManager:
             return False
         
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = copy.deepcopy(dict(flexmod_definitions.get(self.file_path).data))
             
             if 'groups' not in data:
                 data['groups'] = []
@@ -80,8 +81,7 @@ class JsonManager:
                     'groupDesc': ''
                 })
             
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.file_path, data, indent=2)
             
             return True
         except Exception as e:
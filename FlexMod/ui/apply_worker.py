@@ -0,0 +1,207 @@
+"""后台应用工作器
+
+把玩家设置的保存和Config文件的修改移出GUI线程。短时间内的连续修改（例如拖动滑块）
+会被合并，只在静默一段时间后按最新状态应用一次，完成后通过信号通知界面。
+"全部应用"由 BulkApplyThread 在后台线程中把多个 mod 分发到进程池。
+"""
+import copy
+import os
+from typing import Dict, Iterable, List, Optional
+
+from PyQt6.QtCore import QObject, QThread, QTimer, pyqtSignal
+
+from ..utils.apply_engine import ApplyEngine
+from ..utils.atomic_write import atomic_write_json, encode_json
+from ..utils.bulk_apply import apply_mods
+from ..utils.snapshots import SnapshotStore
+from ..utils.xpath_handler import get_xpath_engine
+
+
+class ApplyJob:
+    """一次待执行的应用任务"""
+
+    def __init__(self, player_settings_path: str, flexmod_json_path: str, mod_files_dir: str,
+                 player_settings: Dict, setting_ids: Iterable[str], checkpoint: bool = False):
+        self.player_settings_path = player_settings_path
+        self.flexmod_json_path = flexmod_json_path
+        self.mod_files_dir = mod_files_dir
+        self.player_settings = player_settings
+        self.setting_ids = set(setting_ids)
+        # 是否记录可回滚的快照（应用预设、恢复默认值等检查点）
+        self.checkpoint = checkpoint
+
+    def can_merge(self, newer: 'ApplyJob') -> bool:
+        """只有同一 mod 的任务可以合并"""
+        return newer.mod_files_dir == self.mod_files_dir
+
+    def merge(self, newer: 'ApplyJob') -> 'ApplyJob':
+        """合并同一 mod 更新的任务：设置取最新快照，设置项ID取并集"""
+        newer.setting_ids |= self.setting_ids
+        newer.checkpoint = newer.checkpoint or self.checkpoint
+        return newer
+
+    def run(self):
+        """执行任务，返回 ApplyResult 或 None（没有需要应用的设置项）"""
+        if not self.setting_ids:
+            atomic_write_json(self.player_settings_path, self.player_settings)
+            return None
+
+        # 玩家设置与 Config 文件一起提交；只有检查点记录快照，拖动滑块等普通修改
+        # 不读取、哈希和压缩整个文件
+        engine = ApplyEngine.from_json_file(self.flexmod_json_path, self.mod_files_dir)
+        return engine.apply(self.player_settings.get('finalSettings', {}), self.setting_ids,
+                            extra_files={self.player_settings_path: encode_json(self.player_settings)},
+                            snapshots=SnapshotStore.for_mod(self.mod_files_dir) if self.checkpoint else None)
+
+
+class _ApplyThread(QThread):
+    """执行单个应用任务的线程"""
+
+    def __init__(self, job: ApplyJob, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self.result = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.result = self.job.run()
+        except Exception as e:
+            self.error = e
+
+
+class ApplyWorker(QObject):
+    """防抖、合并的后台应用工作器
+
+    信号:
+        apply_started(str): 开始应用，参数为mod目录
+        apply_finished(str, bool, list, list): 应用结束，参数为mod目录、是否成功、
+            本次应用的设置项ID、处理失败的文件
+    """
+
+    apply_started = pyqtSignal(str)
+    apply_finished = pyqtSignal(str, bool, list, list)
+
+    # 最后一次修改后等待的静默时间（毫秒）
+    DEFAULT_DELAY_MS = 250
+
+    def __init__(self, parent=None, delay_ms: int = DEFAULT_DELAY_MS):
+        super().__init__(parent)
+        # 等待执行的任务，按 mod 排队；同一 mod 的连续修改合并到队尾的任务中
+        self._pending: List[ApplyJob] = []
+        self._thread: Optional[_ApplyThread] = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay_ms)
+        self._timer.timeout.connect(self._start_pending)
+
+    def schedule(self, player_settings_path: str, flexmod_json_path: str, mod_files_dir: str,
+                 player_settings: Dict, setting_ids: Iterable[str], checkpoint: bool = False):
+        """安排一次应用，静默期内的多次调用会合并为一次
+
+        Args:
+            player_settings_path: player_settings.json文件路径
+            flexmod_json_path: FlexMod JSON文件路径
+            mod_files_dir: mod文件所在目录
+            player_settings: 当前玩家设置，调用时会保存一份快照
+            setting_ids: 需要重新应用的设置项ID
+            checkpoint: 是否为检查点，检查点记录可回滚的快照
+        """
+        job = ApplyJob(player_settings_path, flexmod_json_path, mod_files_dir,
+                       copy.deepcopy(player_settings), setting_ids, checkpoint)
+        if self._pending and self._pending[-1].can_merge(job):
+            self._pending[-1] = self._pending[-1].merge(job)
+        else:
+            # 切换到其他 mod 时排在上一个 mod 的任务之后，之前的修改不会丢失
+            self._pending.append(job)
+        self._timer.start()
+
+    def is_busy(self) -> bool:
+        """是否有正在执行或等待执行的任务"""
+        return bool(self._pending) or (self._thread is not None and self._thread.isRunning())
+
+    def flush(self):
+        """立即完成所有任务（阻塞），用于切换mod或退出程序前"""
+        self._timer.stop()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.wait()
+            self._emit_result(thread.job, thread.result, thread.error)
+            thread.deleteLater()
+        while self._pending:
+            job = self._pending.pop(0)
+            self.apply_started.emit(job.mod_files_dir)
+            try:
+                self._emit_result(job, job.run(), None)
+            except Exception as e:
+                self._emit_result(job, None, e)
+
+    def _start_pending(self):
+        """静默期结束，开始执行最早的任务"""
+        if not self._pending:
+            return
+        if self._thread is not None:
+            # 上一个任务仍在执行，结束后会自动开始下一个
+            return
+
+        job = self._pending.pop(0)
+        thread = _ApplyThread(job, self)
+        thread.finished.connect(lambda: self._on_thread_finished(thread))
+        self._thread = thread
+        self.apply_started.emit(job.mod_files_dir)
+        thread.start()
+
+    def _on_thread_finished(self, thread: _ApplyThread):
+        """任务线程结束"""
+        # flush() 已经处理过该线程时，忽略之后才到达的 finished 信号
+        if thread is not self._thread:
+            return
+        self._thread = None
+        self._emit_result(thread.job, thread.result, thread.error)
+        thread.deleteLater()
+
+        # 还有其他 mod 的任务，或执行期间又有新的修改，立即开始下一轮
+        if self._pending and (len(self._pending) > 1 or not self._timer.isActive()):
+            self._start_pending()
+
+    def _emit_result(self, job: ApplyJob, result, error):
+        """发出应用结束信号"""
+        setting_ids = sorted(job.setting_ids)
+        if error is not None:
+            self.apply_finished.emit(job.mod_files_dir, False, setting_ids, [str(error)])
+        elif result is None:
+            self.apply_finished.emit(job.mod_files_dir, True, setting_ids, [])
+        else:
+            self.apply_finished.emit(job.mod_files_dir, result.ok, setting_ids,
+                                     [os.path.normpath(p) for p in result.failed_files])
+
+
+class BulkApplyThread(QThread):
+    """在进程池中并行应用多个 mod 的线程
+
+    信号:
+        progress(int, int, str): 已完成数、总数、刚完成的 mod 名称
+        bulk_finished(object): 全部完成，参数为 BulkApplyResult
+        failed(str): 出错，参数为错误信息
+    """
+
+    progress = pyqtSignal(int, int, str)
+    bulk_finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, mods_dir: str, mod_names: Iterable[str], parent=None):
+        super().__init__(parent)
+        self.mods_dir = mods_dir
+        self.mod_names = list(mod_names)
+
+    def run(self):
+        try:
+            # 进程池的子进程使用与界面相同的 XPath 引擎
+            result = apply_mods(self.mods_dir, self.mod_names,
+                                progress=lambda done, total, mod: self.progress.emit(done, total, mod.mod_name),
+                                xpath_engine=get_xpath_engine().name)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.bulk_finished.emit(result)
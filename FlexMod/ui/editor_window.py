@@ -150,10 +150,12 @@ class FilePathComboBox(QWidget):
 class FlexModEditorWindow(QMainWindow):
     """FlexMod编辑器主窗口"""
     
-    def __init__(self, mod_name: str, json_file_path: str):
+    def __init__(self, mod_name: str, json_file_path: str, file_watcher=None):
         super().__init__()
         self.mod_name = mod_name
         self.json_file_path = json_file_path
+        # 文件监视服务，Config 文件被其他程序修改时重新验证
+        self.file_watcher = file_watcher
         
         self.block_manager = BlockManager()
         self.group_manager = GroupManager()
@@ -162,7 +164,7 @@ class FlexModEditorWindow(QMainWindow):
         
         self.current_block_id = None
         self.code_window = None
-        self.lang = get_lang()  # 总是从配置文件中读取最新的语言设置
+        self.lang = get_lang()  # 总是使用最新的语言设置
         # 构建并规范化配置目录路径
         self.config_dir = os.path.join(os.path.dirname(json_file_path), '..', 'Config')
         self.config_dir = os.path.normpath(self.config_dir)
@@ -170,8 +172,17 @@ class FlexModEditorWindow(QMainWindow):
         # 添加锁定状态，默认为锁定
         self.is_locked = True
         
+        # 后台验证状态
+        self.validation_worker = None
+        self.validation_cards = {}
+        self.validated_json = ''
+        
         self._init_ui()
         self._load_data()
+        
+        if self.file_watcher is not None:
+            self.file_watcher.watch_mod(self.mod_name)
+            self.file_watcher.config_changed.connect(self._on_config_changed)
     
     def _init_ui(self):
         """初始化UI"""
@@ -704,24 +715,33 @@ class FlexModEditorWindow(QMainWindow):
         # 自动执行验证
         self._perform_validation()
     
+    def _on_config_changed(self, mod_name: str, paths: list):
+        """Config 文件在外部被修改后，如果验证面板正在显示则重新验证（未变化的文件使用验证索引）"""
+        if mod_name == self.mod_name and self.validate_panel.isVisible():
+            self._perform_validation()
+    
     def _perform_validation(self):
-        """执行验证操作"""
+        """在后台线程执行验证，结果按文件逐步显示"""
         import os
         from ..utils.lang import get_text, get_lang
-        from ..utils.xml_operations import XmlOperations
-        from ..ui.collapsible_widgets import InfoCard
+        from ..ui.validation_worker import ValidationWorker
+        
+        # 取消上一次未完成的验证
+        self._cancel_validation()
         
         # 更新当前语言设置
         self.lang = get_lang()
         # 更新验证结果标题
         if hasattr(self, 'validate_header'):
-            self.validate_header.setText(get_text('validate_results', self.lang))
+            self.validate_header.setText(get_text('validate_progress', self.lang).format(0, 0))
         
         # 清空之前的验证结果
         for i in reversed(range(self.results_layout.count())):
             widget = self.results_layout.itemAt(i).widget()
             if widget:
                 widget.deleteLater()
+        # 报告类型 -> (卡片, 已显示的条目)
+        self.validation_cards = {}
         
         # 获取FlexMod JSON文件路径
         json_path = self.json_manager.file_path
@@ -729,74 +749,134 @@ class FlexModEditorWindow(QMainWindow):
         # 获取mod文件目录
         mod_files_dir = os.path.dirname(json_path)
         
-        try:
-            # 检查缺少的注释
-            missing_comments = XmlOperations.check_missing_comments(json_path, mod_files_dir)
-            
-            # 添加缺少注释卡片
-            if missing_comments:
-                missing_card = InfoCard(
-                    title=get_text('validate_missing_comments_title', self.lang),
-                    content=get_text('validate_missing_comments_content', self.lang) + "\n\n",
-                    color="#b42828"
-                )
-                content = get_text('validate_missing_comments_content', self.lang) + "\n\n"
-                for file_path, ids in missing_comments.items():
-                    for block_id in ids:
-                        content += get_text('validate_missing_comment_item', self.lang).format(file_path, block_id) + "\n"
-                missing_card.set_content(content)
-                self.results_layout.addWidget(missing_card)
-            
-            # 检查多余的注释
-            extra_comments = XmlOperations.check_extra_comments(json_path, mod_files_dir)
-            
-            # 添加多余注释卡片
-            if extra_comments:
-                extra_card = InfoCard(
-                    title=get_text('validate_extra_comments_title', self.lang),
-                    content=get_text('validate_extra_comments_content', self.lang) + "\n\n",
-                    color="#b42828"
-                )
-                content = get_text('validate_extra_comments_content', self.lang) + "\n\n"
-                for file_path, ids in extra_comments.items():
-                    for block_id in ids:
-                        content += get_text('validate_extra_comment_item', self.lang).format(file_path, block_id) + "\n"
-                extra_card.set_content(content)
-                self.results_layout.addWidget(extra_card)
-            
-            # 检查不存在的文件
-            nonexistent_files = XmlOperations.check_nonexistent_files(json_path, mod_files_dir)
-            
-            # 添加不存在文件卡片
-            if nonexistent_files:
-                nonexistent_card = InfoCard(
-                    title=get_text('validate_nonexistent_files_title', self.lang),
-                    content=get_text('validate_nonexistent_files_content', self.lang) + "\n\n",
-                    color="#b42828"
-                )
-                content = get_text('validate_nonexistent_files_content', self.lang) + "\n\n"
-                for file_path, id_pairs in nonexistent_files.items():
-                    for block_id, display_name in id_pairs:
-                        content += get_text('validate_nonexistent_file_item', self.lang).format(file_path, block_id, display_name) + "\n"
-                nonexistent_card.set_content(content)
-                self.results_layout.addWidget(nonexistent_card)
-            
-            # 如果没有问题，添加成功卡片
-            if not missing_comments and not extra_comments and not nonexistent_files:
-                success_card = InfoCard(
-                    title=get_text('validate_success_title', self.lang),
-                    content=get_text('validate_success_content', self.lang),
-                    color="#4ECDC4"
-                )
-                self.results_layout.addWidget(success_card)
-        except Exception as e:
-            # 显示错误信息
-            error_card = InfoCard(
-                title=get_text('validate_error_title', self.lang),
-                content=f"{get_text('validate_error_content', self.lang)}\n\n{str(e)}",
+        # 记录验证开始时的数据，之后保存的数据发生变化时取消验证
+        self.validated_json = self.json_manager.get_json_content()
+        
+        worker = ValidationWorker(json_path, mod_files_dir, self)
+        worker.progress.connect(self._on_validation_progress)
+        worker.partial_report.connect(self._on_validation_partial)
+        worker.completed.connect(self._on_validation_completed)
+        worker.failed.connect(self._on_validation_failed)
+        worker.finished.connect(worker.deleteLater)
+        self.validation_worker = worker
+        worker.start()
+    
+    def _cancel_validation(self, wait: bool = False):
+        """取消正在进行的验证
+        
+        Args:
+            wait: 是否等待验证线程结束（关闭窗口时使用）
+        """
+        worker = self.validation_worker
+        if worker is None:
+            return
+        self.validation_worker = None
+        worker.cancel()
+        if wait:
+            worker.wait()
+        if hasattr(self, 'validate_header'):
+            self.validate_header.setText(get_text('validate_cancelled', self.lang))
+    
+    def _save_json(self):
+        """保存JSON文件，数据发生变化时取消正在进行的验证"""
+        if self.validation_worker is not None:
+            if self.json_manager.get_json_content() != self.validated_json:
+                self._cancel_validation()
+        self.json_manager.save()
+    
+    def _on_validation_progress(self, done: int, total: int):
+        """更新验证进度"""
+        if self.sender() is not self.validation_worker:
+            return
+        self.validate_header.setText(get_text('validate_progress', self.lang).format(done, total))
+    
+    def _on_validation_partial(self, report):
+        """显示一个文件的验证结果"""
+        if self.sender() is not self.validation_worker:
+            return
+        
+        missing_lines = [get_text('validate_missing_comment_item', self.lang).format(file_path, block_id)
+                         for file_path, ids in report.missing_comments.items() for block_id in ids]
+        extra_lines = [get_text('validate_extra_comment_item', self.lang).format(file_path, block_id)
+                       for file_path, ids in report.extra_comments.items() for block_id in ids]
+        nonexistent_lines = [get_text('validate_nonexistent_file_item', self.lang).format(file_path, block_id, display_name)
+                             for file_path, id_pairs in report.nonexistent_files.items()
+                             for block_id, display_name in id_pairs]
+        marker_issue_lines = [get_text(f'validate_marker_{issue.kind}', self.lang).format(
+                                  file_path, issue.line, issue.block_id, issue.other_line)
+                              for file_path, issues in report.marker_issues.items() for issue in issues]
+        
+        self._append_validation_lines('validate_missing_comments', missing_lines)
+        self._append_validation_lines('validate_extra_comments', extra_lines)
+        self._append_validation_lines('validate_nonexistent_files', nonexistent_lines)
+        self._append_validation_lines('validate_marker_issues', marker_issue_lines)
+    
+    def _append_validation_lines(self, kind: str, lines: list):
+        """向对应的验证结果卡片追加条目，卡片不存在时创建
+        
+        Args:
+            kind: 报告类型，即语言文本键的前缀，例如 validate_missing_comments
+            lines: 要追加的条目
+        """
+        from ..ui.collapsible_widgets import InfoCard
+        
+        if not lines:
+            return
+        
+        if kind not in self.validation_cards:
+            card = InfoCard(
+                title=get_text(f'{kind}_title', self.lang),
+                content=get_text(f'{kind}_content', self.lang) + "\n\n",
                 color="#b42828"
             )
-            self.results_layout.addWidget(error_card)
+            # 卡片始终按 缺少注释、多余注释、不存在文件、格式错误的注释 的顺序排列
+            order = ['validate_missing_comments', 'validate_extra_comments', 'validate_nonexistent_files',
+                     'validate_marker_issues']
+            index = sum(1 for other in self.validation_cards if order.index(other) < order.index(kind))
+            self.results_layout.insertWidget(index, card)
+            self.validation_cards[kind] = (card, [])
+        
+        card, shown_lines = self.validation_cards[kind]
+        shown_lines.extend(lines)
+        content = get_text(f'{kind}_content', self.lang) + "\n\n"
+        for line in shown_lines:
+            content += line + "\n"
+        card.set_content(content)
+    
+    def _on_validation_completed(self):
+        """验证完成"""
+        from ..ui.collapsible_widgets import InfoCard
+        
+        if self.sender() is not self.validation_worker:
+            return
+        self.validation_worker = None
+        self.validate_header.setText(get_text('validate_results', self.lang))
+        
+        # 如果没有问题，添加成功卡片
+        if not self.validation_cards:
+            success_card = InfoCard(
+                title=get_text('validate_success_title', self.lang),
+                content=get_text('validate_success_content', self.lang),
+                color="#4ECDC4"
+            )
+            self.results_layout.addWidget(success_card)
+    
+    def _on_validation_failed(self, message: str):
+        """验证出错"""
+        from ..ui.collapsible_widgets import InfoCard
+        
+        if self.sender() is not self.validation_worker:
+            return
+        self.validation_worker = None
+        self.validate_header.setText(get_text('validate_results', self.lang))
+        
+        # 显示错误信息
+        error_card = InfoCard(
+            title=get_text('validate_error_title', self.lang),
+            content=f"{get_text('validate_error_content', self.lang)}\n\n{message}",
+            color="#b42828"
+        )
+        self.results_layout.addWidget(error_card)
     
     def _load_data(self):
         """加载数据"""
@@ -1054,7 +1134,7 @@ class FlexModEditorWindow(QMainWindow):
         new_name = block.get_parameter('func_name', '')
         if old_name != new_name:
             self._refresh_block_list()
-        self.json_manager.save()
+        self._save_json()
     
     def _show_group_detail_panel(self):
         """显示分组设置面板"""
@@ -1179,7 +1259,7 @@ class FlexModEditorWindow(QMainWindow):
         group = Group(name=group_name, desc='', is_default=False)
         self.group_manager.add_group(group)
         self._show_group_detail_panel()
-        self.json_manager.save()
+        self._save_json()
         self._update_code_editor()
     
     def _remove_group(self, group_name: str, card: QWidget):
@@ -1187,7 +1267,7 @@ class FlexModEditorWindow(QMainWindow):
         self.group_manager.remove_group(group_name)
         self.detail_layout.removeWidget(card)
         card.deleteLater()
-        self.json_manager.save()
+        self._save_json()
         self._update_code_editor()
     
     def _on_desc_double_click(self, event, group, desc_input):
@@ -1240,7 +1320,7 @@ class FlexModEditorWindow(QMainWindow):
         if new_desc is not None:
             group.desc = new_desc
         
-        self.json_manager.save()
+        self._save_json()
         self._update_code_editor()
     
     def _show_block_detail_panel(self, block_id: str):
@@ -1475,6 +1555,7 @@ class FlexModEditorWindow(QMainWindow):
             from PyQt6.QtWidgets import QApplication
             from ..ui.notification_widget import NotificationWidget
             from ..utils.xml_operations import XmlOperations
+            from ..utils.validation import ValidationIndex, ValidationScanner
             
             current_id = func_id_input.text()
             if current_id:
@@ -1486,8 +1567,19 @@ class FlexModEditorWindow(QMainWindow):
                 clipboard = QApplication.clipboard()
                 clipboard.setText(comments)
                 
+                # 查找定位注释已经放置的位置
+                mod_files_dir = os.path.dirname(self.json_manager.file_path)
+                try:
+                    scanner = ValidationScanner({}, mod_files_dir, ValidationIndex.for_mod(mod_files_dir))
+                    locations = [get_text('marker_located', self.lang).format(relative_path, pair.start.line, pair.end.line)
+                                 for relative_path, pairs in scanner.locate_block(current_id) for pair in pairs]
+                except OSError:
+                    locations = []
+                location_text = '\n'.join(locations) or get_text('marker_not_located', self.lang)
+                
                 # 显示成功弹窗，3秒后自动关闭
-                success_message = f"{start_comment}\n{end_comment}\n\n{get_text('copied_to_clipboard', self.lang)}"
+                success_message = (f"{start_comment}\n{end_comment}\n\n{get_text('copied_to_clipboard', self.lang)}"
+                                   f"\n\n{location_text}")
                 notification = NotificationWidget(
                     NotificationWidget.TYPE_SUCCESS,
                     success_message,
@@ -2483,7 +2575,7 @@ class FlexModEditorWindow(QMainWindow):
         self.block_manager.add_block(block)
         self._refresh_block_list()
         self._show_block_detail_panel(block.block_id)
-        self.json_manager.save()
+        self._save_json()
         self._update_code_editor()
     
     def _delete_block(self, item: QListWidgetItem):
@@ -2509,7 +2601,7 @@ class FlexModEditorWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             self.block_manager.remove_block(block_id)
             self._refresh_block_list()
-            self.json_manager.save()
+            self._save_json()
             self._update_code_editor()
     
     def _open_code_window(self):
@@ -2528,5 +2620,11 @@ class FlexModEditorWindow(QMainWindow):
         self._save_current_block_state()
         
         # 执行原有的关闭逻辑
-        self.json_manager.save()
+        self._save_json()
+        # 停止后台验证
+        self._cancel_validation(wait=True)
+        if self.file_watcher is not None:
+            self.file_watcher.config_changed.disconnect(self._on_config_changed)
+            self.file_watcher.unwatch_mod(self.mod_name)
+            self.file_watcher = None
         event.accept()
@@ -0,0 +1,251 @@
+"""文件监视服务
+
+用 QFileSystemWatcher 监视 Mods 目录、每个 FlexMod 的 FlexMod 目录，以及打开的 mod
+（玩家页面或编辑器正在使用的 mod）的 FlexMod.json、player_settings.json 和 Config
+目录中的 XML 文件。短时间内的多次变化合并后统一处理：重新获取相关文件的
+(mtime, 大小)，与上一次的记录比较得到真正变化的文件，再按类型发出信号。
+
+本程序自己通过 atomic_write 写入的文件（应用设置、保存玩家设置）不会被报告为变化，
+FlexMod.json 除外：编辑器保存后玩家页面需要刷新。
+
+QFileSystemWatcher 无法添加路径（例如达到系统监视数量上限或不支持的文件系统）时，
+改为定时轮询。
+"""
+import os
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from ..utils.atomic_write import add_write_listener, remove_write_listener
+from ..utils.mods_scanner import mods_scanner
+
+
+# 文件路径 -> (mtime, 大小)
+FileStats = Dict[str, Tuple[int, int]]
+
+
+def _stat(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class FileWatcher(QObject):
+    """Mods 目录和打开的 mod 的文件监视
+
+    信号:
+        mods_changed(): Mods 目录中 FlexMod 列表发生变化
+        flexmod_json_changed(str): mod 的 FlexMod.json 发生变化，参数为 mod 名称
+        player_settings_changed(str): mod 的 player_settings.json 被其他程序修改
+        config_changed(str, list): mod 的 Config XML 文件被其他程序修改、添加或删除，
+            参数为 mod 名称和变化的文件路径
+    """
+
+    mods_changed = pyqtSignal()
+    flexmod_json_changed = pyqtSignal(str)
+    player_settings_changed = pyqtSignal(str)
+    config_changed = pyqtSignal(str, list)
+
+    # 最后一次变化后等待的静默时间（毫秒）
+    DEBOUNCE_MS = 300
+    # 无法使用系统监视时的轮询间隔（毫秒）
+    POLL_MS = 2000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mods_dir = ''
+        self._flexmods: List[str] = []
+        # mod 名称 -> 使用该 mod 的对象数
+        self._watched_mods: Dict[str, int] = {}
+        # mod 名称 -> 上一次记录的文件状态
+        self._stats: Dict[str, FileStats] = {}
+        # 等待处理的变化路径
+        self._pending: Set[str] = set()
+        self._polling = False
+
+        # 本程序写入的文件 -> 写入后的状态（写入可能在工作线程中完成）
+        self._self_writes: FileStats = {}
+        self._self_writes_lock = threading.Lock()
+        add_write_listener(self._on_self_write)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._flush)
+
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.POLL_MS)
+        self._poll_timer.timeout.connect(self._poll)
+
+    def close(self):
+        """停止监视"""
+        remove_write_listener(self._on_self_write)
+        self._debounce.stop()
+        self._poll_timer.stop()
+        paths = self._watcher.files() + self._watcher.directories()
+        if paths:
+            self._watcher.removePaths(paths)
+
+    # 监视目标
+
+    def set_mods_dir(self, mods_dir: str):
+        """设置 Mods 目录，目录未变化时不做任何事"""
+        if mods_dir == self.mods_dir:
+            return
+        self.mods_dir = mods_dir
+        self._flexmods = mods_scanner.flexmods(mods_dir) if mods_dir else []
+        self._stats = {mod: self._collect(mod) for mod in self._watched_mods}
+        self._update_watches()
+
+    def watch_mod(self, mod_name: str):
+        """开始监视 mod 的文件，与 unwatch_mod 成对调用"""
+        count = self._watched_mods.get(mod_name, 0)
+        self._watched_mods[mod_name] = count + 1
+        if count == 0:
+            self._stats[mod_name] = self._collect(mod_name)
+            self._update_watches()
+
+    def unwatch_mod(self, mod_name: str):
+        """停止监视 mod 的文件"""
+        count = self._watched_mods.get(mod_name, 0)
+        if count <= 1:
+            self._watched_mods.pop(mod_name, None)
+            self._stats.pop(mod_name, None)
+            self._update_watches()
+        else:
+            self._watched_mods[mod_name] = count - 1
+
+    def _mod_dir(self, mod_name: str) -> str:
+        return os.path.join(self.mods_dir, mod_name)
+
+    def _collect(self, mod_name: str) -> FileStats:
+        """获取 mod 中被监视文件的状态"""
+        if not self.mods_dir:
+            return {}
+        mod_dir = self._mod_dir(mod_name)
+        stats = {}
+        for path in (os.path.join(mod_dir, 'FlexMod', 'FlexMod.json'),
+                     os.path.join(mod_dir, 'FlexMod', 'player_settings.json')):
+            stat = _stat(path)
+            if stat:
+                stats[path] = stat
+        for root, _, files in os.walk(os.path.join(mod_dir, 'Config')):
+            for file_name in files:
+                if file_name.lower().endswith('.xml'):
+                    path = os.path.join(root, file_name)
+                    stat = _stat(path)
+                    if stat:
+                        stats[path] = stat
+        return stats
+
+    def _update_watches(self):
+        """使系统监视的路径与当前的监视目标一致"""
+        wanted = set()
+        if self.mods_dir and os.path.isdir(self.mods_dir):
+            wanted.add(self.mods_dir)
+            for mod_name in self._flexmods:
+                wanted.add(os.path.join(self._mod_dir(mod_name), 'FlexMod'))
+        for mod_name, stats in self._stats.items():
+            mod_dir = self._mod_dir(mod_name)
+            wanted.add(os.path.join(mod_dir, 'FlexMod'))
+            for root, _, _ in os.walk(os.path.join(mod_dir, 'Config')):
+                wanted.add(root)
+            wanted.update(stats)
+        wanted = {os.path.normpath(path) for path in wanted if os.path.exists(path)}
+
+        # Qt 返回的路径使用 '/' 分隔，按规范化路径比较
+        current = {os.path.normpath(path): path for path in self._watcher.files() + self._watcher.directories()}
+        stale = [path for key, path in current.items() if key not in wanted]
+        if stale:
+            self._watcher.removePaths(stale)
+        missing = [path for path in wanted if path not in current]
+        failed = self._watcher.addPaths(missing) if missing else []
+
+        # 系统监视不可用时改为轮询
+        polling = bool(failed)
+        if polling != self._polling:
+            self._polling = polling
+            if polling:
+                self._poll_timer.start()
+            else:
+                self._poll_timer.stop()
+
+    # 变化处理
+
+    def _on_self_write(self, path: str):
+        """atomic_write 写入完成（可能在工作线程中调用）"""
+        # 只记录会被报告的文件类型，快照对象、索引等其他写入不需要记录
+        if not path.lower().endswith(('.xml', 'player_settings.json')):
+            return
+        stat = _stat(path)
+        if stat:
+            with self._self_writes_lock:
+                self._self_writes[os.path.normcase(os.path.abspath(path))] = stat
+
+    def _is_self_write(self, path: str, stat: Optional[Tuple[int, int]]) -> bool:
+        """文件当前的状态是否来自本程序的写入"""
+        key = os.path.normcase(os.path.abspath(path))
+        with self._self_writes_lock:
+            written = self._self_writes.pop(key, None)
+        return written is not None and written == stat
+
+    def _on_path_changed(self, path: str):
+        self._pending.add(path)
+        self._debounce.start()
+
+    def _poll(self):
+        if not self._debounce.isActive():
+            self._flush(poll=True)
+
+    def _affected_mods(self, paths: Set[str]) -> List[str]:
+        """变化路径涉及的已监视 mod"""
+        affected = []
+        for mod_name in self._watched_mods:
+            prefix = os.path.normcase(os.path.join(self._mod_dir(mod_name), ''))
+            if any(os.path.normcase(os.path.normpath(path)).startswith(prefix) for path in paths):
+                affected.append(mod_name)
+        return affected
+
+    def _flush(self, poll: bool = False):
+        """处理合并后的变化"""
+        paths, self._pending = self._pending, set()
+        if not self.mods_dir:
+            return
+
+        # Mods 目录或某个 FlexMod 目录变化时，FlexMod 列表可能变化；FlexMod 目录中的变化
+        # 不会改变 Mods 目录的 mtime，先丢弃扫描缓存
+        if poll or any(os.path.basename(os.path.normpath(path)) == 'FlexMod' for path in paths):
+            mods_scanner.invalidate(self.mods_dir)
+        flexmods = mods_scanner.flexmods(self.mods_dir)
+        if flexmods != self._flexmods:
+            self._flexmods = flexmods
+            self.mods_changed.emit()
+
+        for mod_name in list(self._watched_mods) if poll else self._affected_mods(paths):
+            old = self._stats.get(mod_name, {})
+            new = self._collect(mod_name)
+            self._stats[mod_name] = new
+            changed = [path for path in set(old) | set(new) if old.get(path) != new.get(path)]
+
+            flexmod_dir = os.path.join(self._mod_dir(mod_name), 'FlexMod')
+            flexmod_json = os.path.join(flexmod_dir, 'FlexMod.json')
+            player_settings = os.path.join(flexmod_dir, 'player_settings.json')
+            if flexmod_json in changed:
+                self.flexmod_json_changed.emit(mod_name)
+            external = [path for path in changed
+                        if path != flexmod_json and not self._is_self_write(path, new.get(path))]
+            if player_settings in external:
+                self.player_settings_changed.emit(mod_name)
+            config_paths = [path for path in external if path != player_settings]
+            if config_paths:
+                self.config_changed.emit(mod_name, sorted(config_paths))
+
+        # 原子替换后原文件被删除，系统监视需要重新添加；新增的文件和目录也需要添加
+        self._update_watches()
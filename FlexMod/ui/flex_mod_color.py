@@ -242,6 +242,30 @@ SS_player_scroll_area = f"""
             background-color: {BORDER_300};
         }}"""
 
+# 大型 mod 的虚拟化设置列表，外观与 SS_player_scroll_area 一致
+SS_player_settings_view = f"""
+        QListView {{
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:1 ,stop:0 {BG_200},stop:1 {BG_300});
+            border-radius: 8px;
+            border: 1px solid {BORDER_200};
+            padding: 20px;
+            outline: none;
+        }}
+        QScrollBar:vertical {{
+            background: qlineargradient(x1:0, y1:0, x2:1, y2:1 ,stop:0 {BG_400},stop:1 {BG_300});
+            border-radius: 4px;
+            width: 8px;
+            margin: 20px 0;
+        }}
+        QScrollBar::handle:vertical {{
+            background-color: {BORDER_100};
+            min-height: 20px;
+            border-radius: 4px;
+        }}
+        QScrollBar::handle:vertical:hover {{
+            background-color: {BORDER_300};
+        }}"""
+
 SS_player_SettingCard_big=f"""
                 QWidget {{
                     {_NO_BBBO(0, 0, 0, 1)}
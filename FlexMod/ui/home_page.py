@@ -12,7 +12,9 @@ from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QIcon, QColor
 
 from ..utils.lang import get_text, get_lang
+from ..utils.mods_scanner import mods_scanner
 from .player_page import PlayerPage
+from .apply_worker import BulkApplyThread
 from .flex_mod_color import (SS_home_splitter,
                              SS_home_splitter_left_widget,
                              SS_flexmod_list,
@@ -24,14 +26,20 @@ class HomePage(QWidget):
     
     flexmod_opened = pyqtSignal(str)
     
-    def __init__(self, config_manager):
+    def __init__(self, config_manager, file_watcher=None):
         super().__init__()
         self.config_manager = config_manager
+        # 文件监视服务，Mods 目录中 FlexMod 增删时自动刷新列表
+        self.file_watcher = file_watcher
         self.lang = get_lang()
         self.player_mode_enabled = self.config_manager.get_config('player_mode_enabled', False)
         self.selected_flexmod = None
+        # 正在执行的全部应用线程
+        self.bulk_apply_thread = None
         self._init_ui()
         self._load_flexmod_list()
+        if self.file_watcher is not None:
+            self.file_watcher.mods_changed.connect(self._load_flexmod_list)
     
     def _init_ui(self):
         """初始化UI"""
@@ -93,7 +101,7 @@ class HomePage(QWidget):
                 self.refresh_btn.setIcon(sync_icon)
         except Exception as e:
             pass
-        self.refresh_btn.clicked.connect(self._load_flexmod_list)
+        self.refresh_btn.clicked.connect(self._refresh_flexmod_list)
         button_layout.addWidget(self.refresh_btn)
         
         # 添加按钮
@@ -106,6 +114,12 @@ class HomePage(QWidget):
         self.add_btn.clicked.connect(self._add_flexmod)
         button_layout.addWidget(self.add_btn)
         
+        # 全部应用按钮
+        self.apply_all_btn = QPushButton(get_text('apply_all_btn', self.lang))
+        self.apply_all_btn.setStyleSheet(SS_btn)
+        self.apply_all_btn.clicked.connect(self._apply_all)
+        button_layout.addWidget(self.apply_all_btn)
+        
         # 玩家模式切换按钮（图标按钮）
         self.player_mode_btn = QPushButton()
         self.player_mode_btn.setStyleSheet(SS_btn)
@@ -132,7 +146,7 @@ class HomePage(QWidget):
         left_layout.setStretch(1, 0)  # 按钮布局
         
         # 右侧：玩家页面
-        self.player_page = PlayerPage(self.config_manager)
+        self.player_page = PlayerPage(self.config_manager, self.file_watcher)
         # self.player_page.setMinimumWidth(400)
         
         # 添加到splitter
@@ -148,16 +162,28 @@ class HomePage(QWidget):
         self._update_player_page_visibility()
     
     def _load_flexmod_list(self):
-        """加载FlexMod列表"""
+        """加载FlexMod列表，保留当前选中项"""
         self.flexmod_list.clear()
         enabled_flexmod = self.config_manager.get_enabled_flexmod()
         
         for flexmod_name in enabled_flexmod:
             self.flexmod_list.addItem(flexmod_name)
+            if flexmod_name == self.selected_flexmod:
+                self.flexmod_list.setCurrentRow(self.flexmod_list.count() - 1)
+        
+        if self.file_watcher is not None:
+            self.file_watcher.set_mods_dir(self.config_manager.get_mods_dir())
+    
+    def _refresh_flexmod_list(self):
+        """刷新按钮：丢弃扫描缓存后重新加载列表（文件系统的 mtime 精度不足时也能看到最新结果）"""
+        mods_scanner.invalidate()
+        self._load_flexmod_list()
     
     def _update_language(self):
         """更新语言"""
         # 刷新按钮现在是图标按钮，不显示文本
+        if self.bulk_apply_thread is None:
+            self.apply_all_btn.setText(get_text('apply_all_btn', self.lang))
         # 更新玩家页面的语言
         if hasattr(self, 'player_page'):
             self.player_page.update_language()
@@ -186,6 +212,82 @@ class HomePage(QWidget):
         if self.player_mode_enabled and self.selected_flexmod:
             self.player_page.set_current_flexmod(self.selected_flexmod)
     
+    def _apply_all(self):
+        """在后台把所有 FlexMod 的当前设置重新应用到 Config 文件（例如游戏更新后）"""
+        if self.bulk_apply_thread is not None:
+            return
+        
+        mods_dir = self.config_manager.get_mods_dir()
+        if not mods_dir or not os.path.exists(mods_dir):
+            QMessageBox.warning(self, get_text('warning', self.lang), get_text('please_set_mods_dir', self.lang))
+            return
+        mod_names = self.config_manager.get_enabled_flexmod()
+        if not mod_names:
+            return
+        
+        # 先完成玩家页面尚未应用的修改，批量应用期间禁止修改，避免两边同时写入同一个 mod
+        self.player_page.flush_apply()
+        self.player_page.setEnabled(False)
+        self.apply_all_btn.setEnabled(False)
+        
+        thread = BulkApplyThread(mods_dir, mod_names, self)
+        thread.progress.connect(self._on_apply_all_progress)
+        thread.bulk_finished.connect(self._on_apply_all_finished)
+        thread.failed.connect(self._on_apply_all_failed)
+        thread.finished.connect(self._on_apply_all_thread_finished)
+        self.bulk_apply_thread = thread
+        self.apply_all_btn.setText(get_text('apply_all_progress', self.lang).format(0, len(mod_names)))
+        thread.start()
+    
+    def wait_apply_all(self):
+        """等待正在执行的全部应用完成（阻塞），用于退出程序前"""
+        if self.bulk_apply_thread is not None:
+            self.bulk_apply_thread.wait()
+    
+    def _on_apply_all_progress(self, done: int, total: int, mod_name: str):
+        """全部应用进度"""
+        self.apply_all_btn.setText(get_text('apply_all_progress', self.lang).format(done, total))
+    
+    def _on_apply_all_finished(self, result):
+        """全部应用完成，显示汇总结果"""
+        from .notification_widget import NotificationWidget
+        for mod_result in result.results:
+            logging.info(f'Applied {mod_result.mod_name}: ok={mod_result.ok}, {mod_result.elapsed * 1000:.0f} ms '
+                         f'{mod_result.error or mod_result.failed_files or ""}')
+        if result.ok:
+            notification = NotificationWidget(
+                notification_type=NotificationWidget.TYPE_SUCCESS,
+                message=get_text('apply_all_done', self.lang).format(len(result.results), result.elapsed),
+                lang=self.lang,
+                timeout=3000
+            )
+        else:
+            lines = [f"{mod_result.mod_name}: {mod_result.error or ', '.join(mod_result.failed_files)}"
+                     for mod_result in result.failed]
+            notification = NotificationWidget(
+                notification_type=NotificationWidget.TYPE_ERROR,
+                message=get_text('apply_all_failed', self.lang).format('\n'.join(lines)),
+                lang=self.lang,
+                timeout=5000
+            )
+        notification.show()
+    
+    def _on_apply_all_failed(self, message: str):
+        """全部应用出错"""
+        QMessageBox.warning(self, get_text('warning', self.lang), message)
+    
+    def _on_apply_all_thread_finished(self):
+        """全部应用线程结束，恢复界面"""
+        thread, self.bulk_apply_thread = self.bulk_apply_thread, None
+        if thread is not None:
+            thread.deleteLater()
+        self.apply_all_btn.setText(get_text('apply_all_btn', self.lang))
+        self.apply_all_btn.setEnabled(True)
+        self.player_page.setEnabled(True)
+        # 玩家设置文件已与 FlexMod.json 同步，重新加载当前 FlexMod
+        if self.player_mode_enabled and self.player_page.current_flexmod:
+            self.player_page.set_current_flexmod(self.player_page.current_flexmod)
+    
     def _update_player_page_visibility(self):
         """更新玩家页面显示状态"""
         # 获取splitter的大小
@@ -209,14 +311,13 @@ class HomePage(QWidget):
         
         # 获取Mods目录下的所有文件夹
         try:
-            folders = [f for f in os.listdir(mods_dir) 
-                      if os.path.isdir(os.path.join(mods_dir, f))]
+            folders = mods_scanner.folders(mods_dir)
         except Exception as e:
             QMessageBox.critical(self, get_text('error', self.lang), f"{get_text('error', self.lang)}: {e}")
             return
         
         # 过滤掉已经添加的FlexMod
-        enabled_flexmod = self.config_manager.get_enabled_flexmod()
+        enabled_flexmod = set(self.config_manager.get_enabled_flexmod())
         available_folders = [f for f in folders if f not in enabled_flexmod]
         
         if not available_folders:
@@ -313,6 +414,9 @@ class HomePage(QWidget):
                 json.dump(default_data, f, indent=4, ensure_ascii=False)
             logging.info(f'Created FlexMod.json file: {flexmod_file}')
         
+        # 新的 FlexMod 不会改变 Mods 目录的 mtime，丢弃扫描缓存
+        mods_scanner.invalidate(mods_dir)
+        
         # 添加到启用列表
         self.config_manager.add_enabled_flexmod(folder_name)
         
@@ -5,7 +5,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon, QColor
 
-from ..utils.lang import get_text, get_lang, set_lang
+from ..utils.lang import get_text, get_lang, set_lang, add_lang_listener, remove_lang_listener
 
 from .flex_mod_color import *
 
@@ -22,8 +22,13 @@ class MainWindow(QWidget):
         # 存储已打开的编辑器窗口
         self.open_editors = {}
         
+        # 文件监视服务，主页、玩家页面和编辑器共用
+        from .file_watcher import FileWatcher
+        self.file_watcher = FileWatcher(self)
+        
         self._init_ui()
         self._init_pages()
+        add_lang_listener(self._on_lang_changed)
         
         self.setWindowTitle(get_text('main_window_title', self.lang))
         self.resize(1200, 800)
@@ -100,7 +105,7 @@ class MainWindow(QWidget):
         from PyQt6.QtWidgets import QMessageBox
         
         # 创建主页
-        self.home_page = HomePage(self.config_manager)
+        self.home_page = HomePage(self.config_manager, self.file_watcher)
         self.page_stack.addWidget(self.home_page)
         
         # 创建设置页面
@@ -140,8 +145,11 @@ class MainWindow(QWidget):
     
     def _toggle_language(self):
         """切换语言"""
-        self.lang = 1 - self.lang
-        set_lang(self.lang)
+        set_lang(1 - self.lang)
+    
+    def _on_lang_changed(self, lang: int):
+        """语言设置变化"""
+        self.lang = lang
         self._update_ui_language()
     
     def _update_ui_language(self):
@@ -189,7 +197,7 @@ class MainWindow(QWidget):
             mods_dir = self.config_manager.get_mods_dir()
             json_file_path = f"{mods_dir}/{flexmod_name}/FlexMod/FlexMod.json"
             
-            editor = FlexModEditorWindow(flexmod_name, json_file_path)
+            editor = FlexModEditorWindow(flexmod_name, json_file_path, self.file_watcher)
             # 设置窗口关闭时自动销毁，这样当用户关闭窗口时，destroyed 信号会被发出
             editor.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose, True)
             editor.show()
@@ -200,6 +208,15 @@ class MainWindow(QWidget):
             # 连接窗口销毁信号，以便从存储中移除
             editor.destroyed.connect(lambda obj=None, name=flexmod_name: self._on_editor_closed(name))
     
+    def closeEvent(self, event):
+        """关闭事件"""
+        # 等待后台应用完成，避免丢失尚未写入的玩家设置
+        self.home_page.player_page.flush_apply()
+        self.home_page.wait_apply_all()
+        self.file_watcher.close()
+        remove_lang_listener(self._on_lang_changed)
+        event.accept()
+    
     def _on_editor_closed(self, flexmod_name: str):
         """当编辑器窗口关闭时调用"""
         if flexmod_name in self.open_editors:
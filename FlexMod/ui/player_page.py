@@ -1,6 +1,7 @@
 """玩家页面"""
 import os
 import json
+import time
 from re import S
 from typing import Dict, List, Optional
 from PyQt6.QtWidgets import (
@@ -8,12 +9,17 @@ from PyQt6.QtWidgets import (
     QComboBox, QStackedWidget, QGroupBox, QScrollArea,
     QMessageBox, QLineEdit, QSlider
 )
-from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QPainter, QBrush, QColor, QFont
 
 from ..utils.lang import get_text, get_lang
+from ..utils.apply_engine import ApplyEngine
+from ..utils.flexmod_definition import flexmod_definitions
+from ..utils.player_settings import PlayerSettings
+from ..utils.snapshots import KIND_ROLLBACK, SnapshotStore
 from ..managers.config_manager import ConfigManager
-from ..utils.xml_operations import XmlOperations
+from .apply_worker import ApplyWorker
+from .settings_view import SettingsView, format_value, slider_scale
 
 # 导入QInputDialog
 from PyQt6.QtWidgets import QInputDialog
@@ -77,13 +83,40 @@ class ToggleSwitch(QWidget):
 
 
 class SettingCard(QWidget):
-    """设置卡片基类"""
+    """设置卡片基类
     
-    def __init__(self, title: str, parent=None):
+    指定 populate 时卡片内的设置项在第一次展开时才创建；折叠超过 DROP_DELAY_MS
+    后删除这些设置项并发出 children_dropped，再次展开时重新创建。
+    
+    Args:
+        title: 标题
+        populate: 创建卡片内设置项的函数，参数为卡片本身
+        expanded: 初始是否展开
+    """
+    
+    # 展开状态变化，参数为是否展开
+    expanded_changed = pyqtSignal(bool)
+    # 折叠后卡片内的设置项已被删除
+    children_dropped = pyqtSignal()
+    
+    # 折叠后保留设置项的时间（毫秒）
+    DROP_DELAY_MS = 30000
+    
+    def __init__(self, title: str, parent=None, populate=None, expanded: bool = True):
         super().__init__(parent)
         self.title = title
-        self.is_expanded = True
+        self.is_expanded = expanded
+        self._populate = populate
+        self.populated = False
+        self._drop_timer = QTimer(self)
+        self._drop_timer.setSingleShot(True)
+        self._drop_timer.setInterval(self.DROP_DELAY_MS)
+        self._drop_timer.timeout.connect(self._drop_children)
         self._init_ui()
+        self.content.setVisible(self.is_expanded)
+        self.arrow_label.setText("▼" if self.is_expanded else "▶")
+        if self.is_expanded:
+            self._ensure_populated()
     
     def _init_ui(self):
         """初始化UI"""
@@ -167,9 +200,32 @@ class SettingCard(QWidget):
     def _on_header_single_click(self, event):
         """处理header单点击事件，展开/折叠卡片"""
         self.is_expanded = not self.is_expanded
+        if self.is_expanded:
+            self._drop_timer.stop()
+            self._ensure_populated()
+        elif self._populate is not None:
+            self._drop_timer.start()
         self.content.setVisible(self.is_expanded)
         # 更新箭头图标
         self.arrow_label.setText("▶" if not self.is_expanded else "▼")
+        self.expanded_changed.emit(self.is_expanded)
+    
+    def _ensure_populated(self):
+        """第一次展开时创建设置项"""
+        if self._populate is not None and not self.populated:
+            self.populated = True
+            self._populate(self)
+    
+    def _drop_children(self):
+        """折叠一段时间后删除设置项，释放控件"""
+        if self.is_expanded or not self.populated:
+            return
+        while self.cards_layout.count() > 0:
+            widget = self.cards_layout.takeAt(0).widget()
+            if widget:
+                widget.deleteLater()
+        self.populated = False
+        self.children_dropped.emit()
     
     def set_title(self, title: str):
         """设置标题"""
@@ -318,15 +374,8 @@ class SettingItemCard(QWidget):
                         if slider:
                             if setting_type == 'float_slider':
                                 # 对于浮点滑块，需要进行缩放处理
-                                # 查找缩放因子
-                                scale = 1
-                                min_val = float(self.setting_data.get('min', 0.0))
-                                max_val = float(self.setting_data.get('max', 100.0))
                                 step_val = float(self.setting_data.get('step', 0.1))
-                                
-                                # 计算缩放因子
-                                while step_val * scale % 1 != 0:
-                                    scale *= 10
+                                scale = slider_scale(step_val)
                                 
                                 # 设置缩放后的值
                                 slider.setValue(int(float(default_value) * scale))
@@ -348,62 +397,14 @@ class SettingItemCard(QWidget):
                     if 'finalSettings' in player_page.player_settings:
                         player_page.player_settings['finalSettings'][self.setting_name] = default_value
                     
-                    # 保存到文件
+                    # 保存到文件，并只重新应用该设置项
                     player_settings_path = getattr(player_page, 'player_settings_path', None)
                     if player_settings_path:
-                        player_page._save_player_settings_to_file(player_page.player_settings, player_settings_path)
-                    
-                    # 调用update_all_configs函数更新所有配置
-                    if player_settings_path:
-                        from utils.xml_operations import XmlOperations
-                        
-                        # 从player_settings_path推导出flexmod_json_path和mod_files_dir
-                        # 获取FlexMod目录
-                        flexmod_dir = os.path.dirname(player_settings_path)
-                        # 获取mod_files_dir
-                        mod_files_dir = os.path.dirname(flexmod_dir)
-                        # 获取flexmod_json_path
-                        flexmod_json_path = os.path.join(flexmod_dir, 'FlexMod.json')
-                        
-                        # 调用XmlOperations.update_all_configs方法
-                        XmlOperations.update_all_configs(player_settings_path, flexmod_json_path, mod_files_dir)
+                        player_page.dirty_settings.add(self.setting_name)
+                        player_page._save_player_settings()
                         
                         # 显示成功通知
-                        # 获取功能名称
-                        setting_display_name = self.setting_data.get('showName', self.setting_name)
-                        
-                        # 获取语言设置
-                        lang = get_lang()
-                        
-                        # 格式化默认值
-                        formatted_value = default_value
-                        if setting_type == 'boolean':
-                            # 根据语言格式化布尔值
-                            if lang == 0:
-                                formatted_value = 'On' if default_value else 'Off'
-                            else:
-                                formatted_value = '开启' if default_value else '关闭'
-                        elif setting_type == 'float_slider':
-                            # 计算小数位数并格式化浮点值
-                            step_val = float(self.setting_data.get('step', 0.1))
-                            decimal_places = len(str(step_val).split('.')[1]) if '.' in str(step_val) else 0
-                            formatted_value = f"{float(default_value):.{decimal_places}f}"
-                        
-                        # 获取多语言消息
-                        reset_message = "reset to default value" if lang == 0 else "恢复到默认值"
-                        
-                        # 创建通知消息
-                        message = f"[{setting_display_name}] {reset_message} [{formatted_value}]"
-                        
-                        # 显示通知（使用自定义的NotificationWidget）
-                        from .notification_widget import NotificationWidget
-                        notification = NotificationWidget(
-                            notification_type=NotificationWidget.TYPE_SUCCESS,
-                            message=message,
-                            lang=lang,  
-                            timeout=2000  # 2秒后自动关闭
-                        )
-                        notification.show()
+                        player_page._notify_reset_to_default(self.setting_name, self.setting_data, default_value)
     
     def set_description(self, description: str):
         """设置描述"""
@@ -434,15 +435,35 @@ class PlayerPage(QWidget):
     
     Args:
         config_manager (ConfigManager): 配置管理器实例
+        file_watcher (FileWatcher): 文件监视服务，FlexMod.json 或玩家设置被修改时重新加载
     """
     
-    def __init__(self, config_manager: ConfigManager):
+    # 设置项超过该数量时使用虚拟化的设置列表，不再为每个设置项创建控件
+    VIRTUAL_THRESHOLD = 100
+    # 设置项超过该数量时，第一次打开的 mod 只展开第一个分组，其余分组在展开时才创建控件
+    LAZY_GROUP_THRESHOLD = 30
+    
+    def __init__(self, config_manager: ConfigManager, file_watcher=None):
         super().__init__()
         self.config_manager = config_manager
+        self.file_watcher = file_watcher
         self.lang = get_lang()
         self.current_flexmod = None
         self.presets = {}
         self.mods_dir = config_manager.get_mods_dir()
+        # 自上次成功应用以来值发生变化的设置项ID
+        self.dirty_settings = set()
+        # 引用的 Config 文件被其他程序修改、可能与玩家设置不一致的设置项ID，由玩家选择是否重新应用
+        self.out_of_sync_settings = set()
+        # mod 名称 -> {分组名称: 是否展开}，切换 mod 或重新加载时保持分组的展开状态
+        self.expanded_groups = {}
+        # 后台应用工作器，合并连续的修改并在GUI线程之外写入文件
+        self.apply_worker = ApplyWorker(self)
+        self.apply_worker.apply_finished.connect(self._on_apply_finished)
+        if self.file_watcher is not None:
+            self.file_watcher.flexmod_json_changed.connect(self._on_mod_files_changed)
+            self.file_watcher.player_settings_changed.connect(self._on_mod_files_changed)
+            self.file_watcher.config_changed.connect(self._on_config_files_changed)
         self._init_ui()
     
     def _init_ui(self):
@@ -499,6 +520,13 @@ class PlayerPage(QWidget):
         #添加弹簧
         preset_layout.addStretch()
 
+        # 回滚应用按钮
+        self.rollback_btn = QPushButton(get_text('rollback', self.lang))
+        self.rollback_btn.setStyleSheet(SS_preset_btn)
+        self.rollback_btn.setMaximumWidth(100)
+        self.rollback_btn.clicked.connect(self._rollback_apply)
+        preset_layout.addWidget(self.rollback_btn)
+
         # 恢复默认预设按钮
         self.default_preset_btn = QPushButton(get_text('default', self.lang))
         self.default_preset_btn.setStyleSheet(SS_preset_btn)
@@ -508,6 +536,29 @@ class PlayerPage(QWidget):
         
         layout.addLayout(preset_layout)
         
+        # Config 文件被其他程序修改后的提示栏，默认隐藏
+        self.sync_bar = QWidget()
+        sync_layout = QHBoxLayout()
+        sync_layout.setContentsMargins(0, 0, 0, 0)
+        sync_layout.setSpacing(10)
+        self.sync_bar.setLayout(sync_layout)
+        self.sync_label = QLabel()
+        self.sync_label.setStyleSheet(SS_preset_label)
+        self.sync_label.setWordWrap(True)
+        sync_layout.addWidget(self.sync_label, 1)
+        self.reapply_btn = QPushButton(get_text('reapply', self.lang))
+        self.reapply_btn.setStyleSheet(SS_preset_btn)
+        self.reapply_btn.setMaximumWidth(100)
+        self.reapply_btn.clicked.connect(self._reapply_out_of_sync)
+        sync_layout.addWidget(self.reapply_btn)
+        self.ignore_sync_btn = QPushButton(get_text('ignore', self.lang))
+        self.ignore_sync_btn.setStyleSheet(SS_preset_btn)
+        self.ignore_sync_btn.setMaximumWidth(100)
+        self.ignore_sync_btn.clicked.connect(self._ignore_out_of_sync)
+        sync_layout.addWidget(self.ignore_sync_btn)
+        self.sync_bar.hide()
+        layout.addWidget(self.sync_bar)
+        
         # FlexMod设置区域
         self.settings_scroll = QScrollArea()
         self.settings_scroll.setStyleSheet(SS_player_scroll_area)
@@ -521,16 +572,88 @@ class PlayerPage(QWidget):
         
         self.settings_scroll.setWidget(self.settings_container)
         self.settings_scroll.setWidgetResizable(True)
-        layout.addWidget(self.settings_scroll, 1)
+        
+        # 设置项较多的 mod 使用的虚拟化设置列表
+        self.settings_view = SettingsView()
+        self.settings_view.settings_model.value_changed.connect(self._on_view_value_changed)
+        self.settings_view.delegate.reset_requested.connect(self._reset_view_setting)
+        
+        self.settings_stack = QStackedWidget()
+        self.settings_stack.addWidget(self.settings_scroll)
+        self.settings_stack.addWidget(self.settings_view)
+        layout.addWidget(self.settings_stack, 1)
         
 
     
     def set_current_flexmod(self, flexmod_name: str):
         """设置当前FlexMod"""
+        # 先完成上一个FlexMod尚未应用的修改
+        self.flush_apply()
+        if self.file_watcher is not None and flexmod_name != self.current_flexmod:
+            if self.current_flexmod:
+                self.file_watcher.unwatch_mod(self.current_flexmod)
+            if flexmod_name:
+                self.file_watcher.watch_mod(flexmod_name)
         self.current_flexmod = flexmod_name
+        self.dirty_settings.clear()
+        self.out_of_sync_settings.clear()
+        self._update_sync_bar()
+        self._load_flexmod_settings()
+        self._load_presets()
+    
+    def _on_mod_files_changed(self, flexmod_name: str):
+        """FlexMod.json 被编辑器保存或玩家设置被其他程序修改后重新加载"""
+        if flexmod_name != self.current_flexmod:
+            return
+        self.flush_apply()
         self._load_flexmod_settings()
         self._load_presets()
     
+    def _on_config_files_changed(self, flexmod_name: str, paths: list):
+        """Config 文件被其他程序修改（例如手动编辑、mod 更新覆盖了文件）
+        
+        不写入这些文件：只把引用这些文件的设置项标记为可能不一致，并显示提示栏，
+        由玩家选择重新应用或忽略。
+        """
+        if flexmod_name != self.current_flexmod or not hasattr(self, 'player_settings_path'):
+            return
+        mod_files_dir = os.path.join(self.mods_dir, self.current_flexmod)
+        try:
+            engine = ApplyEngine.from_json_file(PlayerSettings.flexmod_json_path(mod_files_dir), mod_files_dir)
+        except (OSError, ValueError):
+            return
+        final_settings = self.player_settings.get('finalSettings', {})
+        affected = [setting_id for setting_id in engine.settings_for_files(paths) if setting_id in final_settings]
+        if affected:
+            self.out_of_sync_settings.update(affected)
+            self._update_sync_bar()
+    
+    def _update_sync_bar(self):
+        """根据可能不一致的设置项显示或隐藏提示栏"""
+        if not hasattr(self, 'sync_bar'):
+            return
+        if not self.out_of_sync_settings:
+            self.sync_bar.hide()
+            return
+        settings = getattr(self, 'current_settings', {})
+        names = [settings.get(setting_id, {}).get('showName', setting_id)
+                 for setting_id in sorted(self.out_of_sync_settings)]
+        self.sync_label.setText(get_text('config_out_of_sync', self.lang).format(len(names)))
+        self.sync_label.setToolTip('\n'.join(names))
+        self.sync_bar.show()
+    
+    def _reapply_out_of_sync(self):
+        """玩家确认后，把可能不一致的设置项重新应用到 Config 文件"""
+        self.dirty_settings.update(self.out_of_sync_settings)
+        self.out_of_sync_settings.clear()
+        self._update_sync_bar()
+        self._save_player_settings()
+    
+    def _ignore_out_of_sync(self):
+        """保留其他程序对 Config 文件的修改"""
+        self.out_of_sync_settings.clear()
+        self._update_sync_bar()
+    
     def _load_flexmod_settings(self):
         """加载FlexMod设置
         
@@ -550,6 +673,9 @@ class PlayerPage(QWidget):
         if not self.current_flexmod:
             return
         
+        # 等待后台任务把最新的玩家设置写入文件后再读取
+        self.apply_worker.flush()
+        
         try:
             # 清空设置容器
             self._clear_settings_container()
@@ -590,6 +716,8 @@ class PlayerPage(QWidget):
             widget = self.settings_layout.takeAt(0).widget()
             if widget:
                 widget.deleteLater()
+        self.settings_view.settings_model.set_settings([], {})
+        self.settings_stack.setCurrentWidget(self.settings_scroll)
     
     def _check_mods_directory(self):
         """检查Mods目录"""
@@ -615,210 +743,61 @@ class PlayerPage(QWidget):
         return flexmod_json_path
     
     def _load_and_parse_config(self, flexmod_json_path):
-        """加载和解析配置"""
+        """加载和解析配置（使用共享的 FlexMod 定义快照，文件未变化时不重新解析）"""
         try:
-            with open(flexmod_json_path, 'r', encoding='utf-8') as f:
-                try:
-                    flexmod_data = json.load(f)
-                except json.JSONDecodeError as e:
-                    self._show_error_message(f"JSON解析错误: {str(e)}")
-                    return {}, {}
-        except Exception as e:
+            definition = flexmod_definitions.get(flexmod_json_path)
+        except OSError as e:
             self._show_error_message(f"文件读取错误: {str(e)}")
             return {}, {}
-        
-        # 解析设置（只支持新格式）
-        settings = {}
-        groups = {}
-        
-        # 解析新格式
-        if 'configs' in flexmod_data:
-            try:
-                self._parse_new_format(flexmod_data, settings, groups)
-            except Exception as e:
-                self._show_error_message(f"解析配置错误: {str(e)}")
-                return {}, {}
-        
-        return settings, groups
-    
-    def _parse_new_format(self, flexmod_data, settings, groups):
-        """解析新格式配置"""
-        configs = flexmod_data.get('configs', [])
-        # 解析组信息
-        self._parse_groups(flexmod_data, groups)
-        
-        # 转换配置为settings格式
-        for config in configs:
-            self._parse_config_item(config, settings)
-    
-    def _parse_groups(self, flexmod_data, groups):
-        """解析组信息"""
-        raw_groups = flexmod_data.get('groups', [])
-        for group in raw_groups:
-            group_name = group.get('groupName', 'default')
-            groups[group_name] = {
-                'displayName': group.get('groupName', group_name),
-                'groupDesc': group.get('groupDesc', '')
-            }
-    
-    def _parse_config_item(self, config, settings):
-        """解析单个配置项"""
-        setting_name = config.get('uniqueId', '')
-        if setting_name:
-            # 映射类型
-            config_type = config.get('configType', 'text')
-            setting_type = self._map_config_type(config_type)
-            
-            setting_data = {
-                'type': setting_type,
-                'default': config.get('defaultValue', False),
-                'showName': config.get('displayName', setting_name),
-                'desc': config.get('desc', ''),
-                'group': config.get('groupName', 'default')
-            }
-            
-            # 处理特定类型的配置
-            if setting_type == 'dropdown':
-                self._parse_dropdown_config(config, setting_data)
-            elif setting_type == 'integer_slider' or setting_type == 'float_slider':
-                self._parse_slider_config(config, setting_data)
-            
-            settings[setting_name] = setting_data
-    
-    def _parse_dropdown_config(self, config, setting_data):
-        """解析下拉菜单配置"""
-        options = []
-        option_items = config.get('optionItems', [])
-        for item in option_items:
-            option_key = item.get('optionKey', '')
-            if option_key:
-                options.append(option_key)
-        setting_data['options'] = options
-    
-    def _parse_slider_config(self, config, setting_data):
-        """解析滑块配置"""
-        # 保持原始类型，不强制转换为整数
-        setting_data['min'] = config.get('minValue', 0)
-        setting_data['max'] = config.get('maxValue', 100)
-        setting_data['step'] = config.get('stepValue', 1)
-    
-
-    
-    def _map_config_type(self, config_type):
-        """映射配置类型"""
-        type_map = {
-            'boolConfig': 'boolean',
-            'stringConfig': 'text',
-            'numberConfig': 'integer',
-            'selectConfig': 'dropdown',
-            'intSlider': 'integer_slider',
-            'floatSlider': 'float_slider'
-        }
-        return type_map.get(config_type, 'text')
+        except ValueError as e:
+            self._show_error_message(f"JSON解析错误: {str(e)}")
+            return {}, {}
+        except Exception as e:
+            # 解析设置（只支持新格式）
+            self._show_error_message(f"解析配置错误: {str(e)}")
+            return {}, {}
+        return definition.settings, definition.setting_groups
     
     def _load_or_create_player_settings(self, mods_dir, settings):
         """加载或创建玩家设置"""
-        player_settings_path = os.path.join(mods_dir, self.current_flexmod, 'FlexMod', 'player_settings.json')
+        player_settings_path = PlayerSettings.settings_path(os.path.join(mods_dir, self.current_flexmod))
         player_settings = {}
         
         if os.path.exists(player_settings_path):
             # 加载现有文件
             try:
-                with open(player_settings_path, 'r', encoding='utf-8') as f:
-                    try:
-                        player_settings = json.load(f)
-                    except json.JSONDecodeError as e:
-                        self._show_error_message(f"玩家设置文件解析错误: {str(e)}")
-                        # 创建默认设置
-                        player_settings = self._create_default_player_settings(settings)
-                        # 保存默认设置
-                        self._save_player_settings_to_file(player_settings, player_settings_path)
+                player_settings = PlayerSettings.load(player_settings_path)
+            except json.JSONDecodeError as e:
+                self._show_error_message(f"玩家设置文件解析错误: {str(e)}")
+                # 创建默认设置
+                player_settings = PlayerSettings.create_default(settings)
+                # 保存默认设置
+                self._save_player_settings_to_file(player_settings, player_settings_path)
             except Exception as e:
                 self._show_error_message(f"读取玩家设置文件错误: {str(e)}")
                 # 创建默认设置
-                player_settings = self._create_default_player_settings(settings)
+                player_settings = PlayerSettings.create_default(settings)
                 # 保存默认设置
                 self._save_player_settings_to_file(player_settings, player_settings_path)
         else:
             # 创建默认文件
-            player_settings = self._create_default_player_settings(settings)
+            player_settings = PlayerSettings.create_default(settings)
             # 保存默认设置
             self._save_player_settings_to_file(player_settings, player_settings_path)
         
         return player_settings, player_settings_path
     
-    def _create_default_player_settings(self, settings):
-        """创建默认玩家设置"""
-        default_settings = {}
-        for setting_name, setting_data in settings.items():
-            default_settings[setting_name] = setting_data.get('default', False)
-        
-        return {
-            'finalSettings': default_settings.copy(),
-            'defaultValues': default_settings.copy(),
-            'presets': {}
-        }
-    
     def _save_player_settings_to_file(self, player_settings, player_settings_path):
         """保存玩家设置到文件"""
         try:
-            # 确保FlexMod目录存在
-            flexmod_dir = os.path.dirname(player_settings_path)
-            if not os.path.exists(flexmod_dir):
-                os.makedirs(flexmod_dir)
-            
-            # 写入文件
-            with open(player_settings_path, 'w', encoding='utf-8') as f:
-                json.dump(player_settings, f, indent=4, ensure_ascii=False)
+            PlayerSettings.save(player_settings_path, player_settings)
         except Exception as e:
             self._show_error_message(f"保存玩家设置文件错误: {str(e)}")
     
     def _validate_and_fix_player_settings(self, player_settings, settings, player_settings_path):
         """验证和修复玩家设置"""
         try:
-            # 1. 获取所有有效的设置名称
-            valid_setting_names = set(settings.keys())
-            
-            # 2. 获取当前player_settings中的设置名称
-            current_final_settings = player_settings.get('finalSettings', {})
-            current_default_values = player_settings.get('defaultValues', {})
-            current_setting_names = set(current_final_settings.keys())
-            
-            # 3. 找出需要添加的设置（FlexMod有但player_settings没有）
-            settings_to_add = valid_setting_names - current_setting_names
-            
-            # 4. 找出需要删除的设置（FlexMod没有但player_settings有）
-            settings_to_remove = current_setting_names - valid_setting_names
-            
-            # 5. 添加缺失的设置
-            for setting_name in settings_to_add:
-                setting_data = settings[setting_name]
-                default_value = setting_data.get('default', False)
-                current_final_settings[setting_name] = default_value
-                current_default_values[setting_name] = default_value
-            
-            # 6. 删除多余的设置
-            for setting_name in settings_to_remove:
-                if setting_name in current_final_settings:
-                    del current_final_settings[setting_name]
-                if setting_name in current_default_values:
-                    del current_default_values[setting_name]
-            
-            # 7. 检查并更新现有设置的默认值
-            for setting_name in current_setting_names:
-                if setting_name in valid_setting_names:
-                    setting_data = settings[setting_name]
-                    new_default_value = setting_data.get('default', False)
-                    # 如果默认值发生变化，更新 player_settings
-                    if current_default_values.get(setting_name) != new_default_value:
-                        current_default_values[setting_name] = new_default_value
-                        # 如果当前最终值等于旧默认值，也更新最终值
-                        if current_final_settings.get(setting_name) == player_settings.get('defaultValues', {}).get(setting_name):
-                            current_final_settings[setting_name] = new_default_value
-            
-            # 8. 更新player_settings
-            player_settings['finalSettings'] = current_final_settings
-            player_settings['defaultValues'] = current_default_values
+            player_settings = PlayerSettings.sync(player_settings, settings)
             
             # 9. 保存到文件
             self._save_player_settings_to_file(player_settings, player_settings_path)
@@ -829,6 +808,7 @@ class PlayerPage(QWidget):
     
     def _organize_and_create_settings(self, settings, groups):
         """按组组织设置并创建设置界面"""
+        self.current_settings = settings
         # 按组组织设置
         settings_by_group = {}
         for setting_name, setting_data in settings.items():
@@ -839,6 +819,11 @@ class PlayerPage(QWidget):
         
         # 创建设置界面
         self.setting_widgets = {}
+        if len(settings) > self.VIRTUAL_THRESHOLD:
+            self._create_settings_view(settings_by_group, groups)
+            return
+        expanded_groups = self.expanded_groups.setdefault(self.current_flexmod, {})
+        expand_all = len(settings) <= self.LAZY_GROUP_THRESHOLD
         for group_name, group_settings in settings_by_group.items():
             if group_name == 'default':
                 # 没有组的设置，单独显示
@@ -847,10 +832,84 @@ class PlayerPage(QWidget):
                     self.setting_widgets[setting_name] = widget
             else:
                 # 有组的设置，创建组卡片
-                self._create_group_card(group_name, group_settings, groups)
+                if group_name not in expanded_groups:
+                    expanded_groups[group_name] = expand_all or not expanded_groups
+                self._create_group_card(group_name, group_settings, groups, expanded_groups[group_name])
+    
+    def _create_settings_view(self, settings_by_group, groups):
+        """用虚拟化的设置列表显示设置（只绘制可见的行，不创建控件）"""
+        sections = []
+        for group_name, group_settings in settings_by_group.items():
+            if group_name == 'default':
+                sections.append((None, '', '', group_settings))
+            else:
+                group_display_name, group_desc = self._group_display(group_name, groups)
+                sections.append((group_name, group_display_name, group_desc, group_settings))
+        
+        final_settings = self.player_settings.setdefault('finalSettings', {})
+        self.settings_view.settings_model.set_settings(sections, final_settings)
+        self.settings_stack.setCurrentWidget(self.settings_view)
+    
+    def _on_view_value_changed(self, setting_name: str, value):
+        """设置列表中的值被修改（模型已写入 finalSettings）"""
+        self.dirty_settings.add(setting_name)
+        self._save_player_settings()
     
-    def _create_group_card(self, group_name, group_settings, groups):
-        """创建组卡片"""
+    def _reset_view_setting(self, setting_name: str):
+        """设置列表中鼠标中键点击设置项，恢复默认值"""
+        model = self.settings_view.settings_model
+        setting_data = model.setting_data(setting_name)
+        if setting_data is None:
+            return
+        default_value = setting_data.get('default', False)
+        if self.player_settings.get('finalSettings', {}).get(setting_name, False) == default_value:
+            return
+        model.set_value(setting_name, default_value)
+        self.dirty_settings.add(setting_name)
+        self._save_player_settings()
+        self._notify_reset_to_default(setting_name, setting_data, default_value)
+    
+    def _notify_reset_to_default(self, setting_name: str, setting_data: Dict, default_value):
+        """显示设置项已恢复默认值的通知"""
+        # 获取功能名称
+        setting_display_name = setting_data.get('showName', setting_name)
+        setting_type = setting_data.get('type', 'boolean')
+        
+        # 获取语言设置
+        lang = get_lang()
+        
+        # 格式化默认值
+        formatted_value = default_value
+        if setting_type == 'boolean':
+            # 根据语言格式化布尔值
+            if lang == 0:
+                formatted_value = 'On' if default_value else 'Off'
+            else:
+                formatted_value = '开启' if default_value else '关闭'
+        elif setting_type == 'float_slider':
+            # 计算小数位数并格式化浮点值
+            step_val = float(setting_data.get('step', 0.1))
+            decimal_places = len(str(step_val).split('.')[1]) if '.' in str(step_val) else 0
+            formatted_value = f"{float(default_value):.{decimal_places}f}"
+        
+        # 获取多语言消息
+        reset_message = "reset to default value" if lang == 0 else "恢复到默认值"
+        
+        # 创建通知消息
+        message = f"[{setting_display_name}] {reset_message} [{formatted_value}]"
+        
+        # 显示通知（使用自定义的NotificationWidget）
+        from .notification_widget import NotificationWidget
+        notification = NotificationWidget(
+            notification_type=NotificationWidget.TYPE_SUCCESS,
+            message=message,
+            lang=lang,  
+            timeout=2000  # 2秒后自动关闭
+        )
+        notification.show()
+    
+    def _group_display(self, group_name, groups):
+        """组的显示名称和描述"""
         # 查找组数据
         group_data = {}
         if isinstance(groups, list):
@@ -869,14 +928,31 @@ class PlayerPage(QWidget):
         if group_display_name == 'Default':
             group_display_name = 'Default Group'
         group_desc = group_data.get('groupDesc', '')
+        return group_display_name, group_desc
+    
+    def _create_group_card(self, group_name, group_settings, groups, expanded: bool = True):
+        """创建组卡片，组内的设置项在第一次展开时才创建"""
+        group_display_name, group_desc = self._group_display(group_name, groups)
         
         # 创建组卡片容器
-        group_card = SettingCard(group_display_name)
+        group_card = SettingCard(group_display_name,
+                                 populate=lambda card: self._populate_group_card(card, group_settings),
+                                 expanded=expanded)
         
         # 添加组描述
         group_card.add_description(group_desc)
         
-        # 添加组内的设置卡片
+        # 记录展开状态；折叠后删除的控件不再保留引用
+        expanded_groups = self.expanded_groups.setdefault(self.current_flexmod, {})
+        group_card.expanded_changed.connect(
+            lambda is_expanded: expanded_groups.__setitem__(group_name, is_expanded))
+        group_card.children_dropped.connect(
+            lambda: [self.setting_widgets.pop(setting_name, None) for setting_name, _ in group_settings])
+        
+        self.settings_layout.addWidget(group_card)
+    
+    def _populate_group_card(self, group_card, group_settings):
+        """创建组卡片内的设置卡片"""
         for setting_name, setting_data in group_settings:
             # 获取设置的显示名称和描述
             setting_display_name = setting_data.get('showName', setting_name)
@@ -913,8 +989,6 @@ class PlayerPage(QWidget):
             
             # 保存控件引用
             self.setting_widgets[setting_name] = widget
-        
-        self.settings_layout.addWidget(group_card)
     
     def _show_error_message(self, message):
         """显示错误信息"""
@@ -970,6 +1044,7 @@ class PlayerPage(QWidget):
         # 添加值变化信号
         def on_boolean_changed(checked):
             self.player_settings['finalSettings'][setting_name] = checked
+            self.dirty_settings.add(setting_name)
             self._save_player_settings()
         
         widget.toggled.connect(on_boolean_changed)
@@ -1002,6 +1077,7 @@ class PlayerPage(QWidget):
         def on_dropdown_changed(index):
             selected_value = widget.itemData(index)
             self.player_settings['finalSettings'][setting_name] = selected_value
+            self.dirty_settings.add(setting_name)
             self._save_player_settings()
         
         widget.currentIndexChanged.connect(on_dropdown_changed)
@@ -1046,6 +1122,7 @@ class PlayerPage(QWidget):
             def on_slider_value_changed(value):
                 value_label.setText(str(value))
                 self.player_settings['finalSettings'][setting_name] = value
+                self.dirty_settings.add(setting_name)
                 self._save_player_settings()
                 
         elif setting_type == 'float_slider':
@@ -1056,10 +1133,7 @@ class PlayerPage(QWidget):
             current_val = float(current_value)
             
             # 为了使用QSlider（只支持整数），我们需要进行缩放
-            # 计算缩放因子，确保step_val * scale是整数
-            scale = 1
-            while step_val * scale % 1 != 0:
-                scale *= 10
+            scale = slider_scale(step_val)
             
             slider.setMinimum(int(min_val * scale))
             slider.setMaximum(int(max_val * scale))
@@ -1081,6 +1155,7 @@ class PlayerPage(QWidget):
                 rounded_value = round(float_value, decimal_places)
                 value_label.setText(f"{rounded_value:.{decimal_places}f}")
                 self.player_settings['finalSettings'][setting_name] = rounded_value
+                self.dirty_settings.add(setting_name)
                 self._save_player_settings()
         
         slider.valueChanged.connect(on_slider_value_changed)
@@ -1201,12 +1276,8 @@ class PlayerPage(QWidget):
         # 从默认值中加载
         default_settings = self.player_settings.get('defaultValues', {})
         
-        # 更新最终设置
-        self.player_settings['finalSettings'] = default_settings.copy()
-        self._save_player_settings()
-        
-        # 重新加载设置界面以更新控件值
-        self._load_flexmod_settings()
+        # 更新最终设置和控件值，只重新应用值变化的设置项
+        self._replace_final_settings(default_settings)
         
         QMessageBox.information(self, get_text('info', self.lang), get_text('default_preset_loaded', self.lang))
     
@@ -1225,6 +1296,12 @@ class PlayerPage(QWidget):
             self.default_preset_btn.setText(get_text('default', self.lang))
         if hasattr(self, 'apply_preset_btn'):
             self.apply_preset_btn.setText(get_text('use', self.lang))
+        if hasattr(self, 'rollback_btn'):
+            self.rollback_btn.setText(get_text('rollback', self.lang))
+        if hasattr(self, 'reapply_btn'):
+            self.reapply_btn.setText(get_text('reapply', self.lang))
+            self.ignore_sync_btn.setText(get_text('ignore', self.lang))
+            self._update_sync_bar()
         
         # 重新加载预设列表
         self._load_presets()
@@ -1233,25 +1310,173 @@ class PlayerPage(QWidget):
         if self.current_flexmod:
             self._load_flexmod_settings()
     
-    def _save_player_settings(self):
-        """保存玩家设置到文件"""
+    def _mark_changed_settings(self, old_settings: Dict, new_settings: Dict) -> set:
+        """把新旧最终设置之间值不同的设置项标记为待应用，返回这些设置项"""
+        changed = set()
+        for setting_name, value in new_settings.items():
+            if setting_name not in old_settings or old_settings[setting_name] != value:
+                changed.add(setting_name)
+        self.dirty_settings.update(changed)
+        return changed
+    
+    def _replace_final_settings(self, new_settings: Dict):
+        """用预设或默认值替换最终设置
+        
+        不重新加载页面：只把值变化的设置项写入现有控件，并合并为一次增量应用。
+        新值中缺少的设置项使用默认值、多余的设置项忽略，与重新加载时的同步结果一致。
+        """
+        old_settings = self.player_settings.get('finalSettings', {})
+        default_values = self.player_settings.get('defaultValues', {})
+        final_settings = {setting_name: new_settings[setting_name] if setting_name in new_settings
+                          else default_values.get(setting_name, False)
+                          for setting_name in old_settings}
+        changed = self._mark_changed_settings(old_settings, final_settings)
+        self.player_settings['finalSettings'] = final_settings
+        self._refresh_setting_values(changed)
+        # 批量修改是检查点，记录快照以便回滚
+        self._save_player_settings(checkpoint=True)
+    
+    def _refresh_setting_values(self, setting_names):
+        """把最终设置中的值写入现有控件，不触发控件的值变化信号"""
+        final_settings = self.player_settings.get('finalSettings', {})
+        if self.settings_stack.currentWidget() is self.settings_view:
+            self.settings_view.settings_model.set_final_settings(final_settings)
+            return
+        
+        settings = getattr(self, 'current_settings', {})
+        for setting_name in setting_names:
+            # 所在分组尚未展开的设置项没有控件，展开时会读取最新的值
+            control = self.setting_widgets.get(setting_name)
+            if control is None or setting_name not in final_settings:
+                continue
+            self._set_control_value(control, settings.get(setting_name, {}), final_settings[setting_name])
+    
+    def _set_control_value(self, control, setting_data: Dict, value):
+        """设置控件的值（屏蔽信号）"""
+        control.blockSignals(True)
+        try:
+            if isinstance(control, ToggleSwitch):
+                control.setChecked(bool(value))
+            elif isinstance(control, QComboBox):
+                index = control.findData(value)
+                if index >= 0:
+                    control.setCurrentIndex(index)
+            elif control.findChildren(QSlider):
+                # 滑块容器：滑块和数值标签
+                slider = control.findChildren(QSlider)[0]
+                if setting_data.get('type') == 'float_slider':
+                    # 与创建时相同的缩放因子
+                    scale = slider_scale(float(setting_data.get('step', 0.1)))
+                    slider_value = int(round(float(value) * scale))
+                else:
+                    slider_value = int(value)
+                slider.blockSignals(True)
+                slider.setValue(slider_value)
+                slider.blockSignals(False)
+                labels = control.findChildren(QLabel)
+                if labels:
+                    labels[0].setText(format_value(setting_data, value))
+            elif hasattr(control, 'setValue'):
+                control.setValue(value)
+        finally:
+            control.blockSignals(False)
+    
+    def _save_player_settings(self, checkpoint: bool = False):
+        """保存玩家设置到文件
+        
+        保存和应用交给后台工作器执行，连续的修改会合并为一次。只重新应用自上次成功应用
+        以来值发生变化的设置项；没有待应用的设置项时（例如只修改了预设）只写入
+        player_settings.json，不会修改任何Config文件。
+        
+        Args:
+            checkpoint: 是否为检查点（应用预设、恢复默认值），只有检查点记录可回滚的快照
+        """
         if not self.current_flexmod or not hasattr(self, 'player_settings_path'):
             return
         
+        # 构建FlexMod JSON文件的路径
+        flexmod_json_path = os.path.join(self.mods_dir, self.current_flexmod, 'FlexMod', 'FlexMod.json')
+        # 构建mod文件所在的目录
+        mod_files_dir = os.path.join(self.mods_dir, self.current_flexmod)
+        self.apply_worker.schedule(self.player_settings_path, flexmod_json_path, mod_files_dir,
+                                   self.player_settings, self.dirty_settings, checkpoint)
+        # 已交给工作器，失败时会在 _on_apply_finished 中重新标记
+        self.dirty_settings.clear()
+    
+    def _on_apply_finished(self, mod_files_dir: str, ok: bool, setting_ids: list, failed_files: list):
+        """后台应用完成"""
+        if ok:
+            # 重新应用过的设置项与 Config 文件重新一致
+            current_dir = os.path.join(self.mods_dir, self.current_flexmod) if self.current_flexmod else None
+            if mod_files_dir == current_dir and self.out_of_sync_settings.intersection(setting_ids):
+                self.out_of_sync_settings.difference_update(setting_ids)
+                self._update_sync_bar()
+            return
+        
+        current_dir = os.path.join(self.mods_dir, self.current_flexmod) if self.current_flexmod else None
+        if mod_files_dir == current_dir:
+            # 失败的设置项留到下次继续应用
+            self.dirty_settings.update(setting_ids)
+        
+        print(f"保存玩家设置失败: {failed_files}")
+        from .notification_widget import NotificationWidget
+        notification = NotificationWidget(
+            notification_type=NotificationWidget.TYPE_ERROR,
+            message=get_text('apply_failed', self.lang).format('\n'.join(failed_files)),
+            lang=self.lang,
+            timeout=5000
+        )
+        notification.show()
+    
+    def flush_apply(self):
+        """立即完成所有尚未执行的后台应用"""
+        self.apply_worker.flush()
+    
+    def _rollback_apply(self):
+        """选择一次应用，把文件和玩家设置恢复到该次应用之前的状态"""
+        if not self.current_flexmod:
+            return
+        
+        # 先完成尚未执行的应用，使快照列表包含最新的修改
+        self.flush_apply()
+        store = SnapshotStore.for_mod(os.path.join(self.mods_dir, self.current_flexmod))
+        snapshots = store.list_snapshots()
+        if not snapshots:
+            QMessageBox.information(self, get_text('info', self.lang), get_text('rollback_empty', self.lang))
+            return
+        
+        items = []
+        for snapshot in snapshots:
+            created = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snapshot.created))
+            if snapshot.kind == KIND_ROLLBACK:
+                items.append(get_text('rollback_item_rollback', self.lang).format(created, len(snapshot.files)))
+            else:
+                items.append(get_text('rollback_item_apply', self.lang).format(
+                    created, len(snapshot.setting_ids), len(snapshot.files)))
+        item, ok = QInputDialog.getItem(self, get_text('rollback_title', self.lang),
+                                        get_text('rollback_select', self.lang), items, 0, False)
+        if not ok or item not in items:
+            return
+        
         try:
-            with open(self.player_settings_path, 'w', encoding='utf-8') as f:
-                json.dump(self.player_settings, f, indent=4, ensure_ascii=False)
-            
-            # 执行更新全部的操作
-            if hasattr(self, 'mods_dir') and hasattr(self, 'current_flexmod'):
-                # 构建FlexMod JSON文件的路径
-                flexmod_json_path = os.path.join(self.mods_dir, self.current_flexmod, 'FlexMod', 'FlexMod.json')
-                # 构建mod文件所在的目录
-                mod_files_dir = os.path.join(self.mods_dir, self.current_flexmod)
-                # 调用update_all_configs函数
-                XmlOperations.update_all_configs(self.player_settings_path, flexmod_json_path, mod_files_dir)
+            restored = store.restore(snapshots[items.index(item)].snapshot_id)
         except Exception as e:
-            print(f"保存玩家设置失败: {e}")
+            self._show_error_message(get_text('rollback_failed', self.lang).format(str(e)))
+            return
+        
+        # 玩家设置也已恢复，重新加载界面；恢复后的文件与设置一致，没有待应用的设置项
+        self.dirty_settings.clear()
+        self._load_flexmod_settings()
+        self._load_presets()
+        
+        from .notification_widget import NotificationWidget
+        notification = NotificationWidget(
+            notification_type=NotificationWidget.TYPE_SUCCESS,
+            message=get_text('rollback_done', self.lang).format(len(restored)),
+            lang=self.lang,
+            timeout=3000
+        )
+        notification.show()
     
     def _apply_preset(self):
         """应用预设"""
@@ -1265,12 +1490,8 @@ class PlayerPage(QWidget):
         # 应用预设设置
         preset_settings = self.presets[preset_name]
         
-        # 更新最终设置
-        self.player_settings['finalSettings'] = preset_settings.copy()
-        self._save_player_settings()
-        
-        # 重新加载设置界面以更新控件值
-        self._load_flexmod_settings()
+        # 更新最终设置和控件值，只重新应用值变化的设置项
+        self._replace_final_settings(preset_settings)
         
         QMessageBox.information(self, get_text('info', self.lang), get_text('preset_applied', self.lang))
 
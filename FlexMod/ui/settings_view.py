@@ -0,0 +1,554 @@
+"""虚拟化的玩家设置列表
+
+设置项较多的 mod 不再为每个设置项创建 SettingItemCard 和控件，而是用
+QAbstractListModel 保存分组和设置项，由 SettingsDelegate 直接绘制卡片、开关、
+下拉框和滑块。QListView 只绘制可见的行，打开 mod 的时间与设置项数量无关。
+
+交互：
+- 点击分组标题展开/折叠分组
+- 点击开关切换；在滑块上按下并拖动修改数值
+- 点击下拉框时才为该行创建一个 QComboBox 编辑器
+- 鼠标中键点击设置项发出 reset_requested 信号（恢复默认值）
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import (QAbstractListModel, QEvent, QModelIndex, QPersistentModelIndex,
+                          QRect, QSize, Qt, QTimer, pyqtSignal)
+from PyQt6.QtGui import QBrush, QColor, QFont, QLinearGradient, QPainter, QPen
+from PyQt6.QtWidgets import QAbstractItemView, QComboBox, QListView, QStyle, QStyledItemDelegate
+
+from .flex_mod_color import (BG_100, BG_200, BG_300, BG_400, BORDER_200, PRIMARY_500,
+                             TEXT_100, TEXT_200, TEXT_300, TEXT_400,
+                             SS_player_settings_view,
+                             SS_player_SettingItemCard_dropdown_widget)
+
+
+ROW_GROUP = 0
+ROW_SETTING = 1
+
+# 自定义数据角色
+KIND_ROLE = Qt.ItemDataRole.UserRole + 1
+NAME_ROLE = Qt.ItemDataRole.UserRole + 2
+SETTING_ROLE = Qt.ItemDataRole.UserRole + 3
+VALUE_ROLE = Qt.ItemDataRole.UserRole + 4
+EXPANDED_ROLE = Qt.ItemDataRole.UserRole + 5
+DESC_ROLE = Qt.ItemDataRole.UserRole + 6
+GROUPED_ROLE = Qt.ItemDataRole.UserRole + 7
+
+
+def decimal_places(step: float) -> int:
+    """浮点滑块步长的小数位数"""
+    text = str(step)
+    return len(text.split('.')[1]) if '.' in text else 0
+
+
+def slider_scale(step: float) -> int:
+    """浮点滑块的缩放因子：QSlider 只支持整数，数值乘以该因子后步长为整数"""
+    scale = 1
+    while step * scale % 1 != 0:
+        scale *= 10
+    return scale
+
+
+def slider_range(setting_data: Dict, setting_type: str) -> Tuple[float, float, float]:
+    """滑块的 (最小值, 最大值, 步长)"""
+    if setting_type == 'float_slider':
+        return (float(setting_data.get('min', 0.0)), float(setting_data.get('max', 100.0)),
+                float(setting_data.get('step', 0.1)))
+    return (int(setting_data.get('min', 0)), int(setting_data.get('max', 100)),
+            int(setting_data.get('step', 1)) or 1)
+
+
+def format_value(setting_data: Dict, value) -> str:
+    """滑块数值的显示文本"""
+    if setting_data.get('type') == 'float_slider':
+        places = decimal_places(float(setting_data.get('step', 0.1)))
+        return f"{float(value):.{places}f}"
+    return str(int(value))
+
+
+class _Section:
+    """一个分组（group_name 为 None 时表示没有分组的设置项）"""
+
+    __slots__ = ('group_name', 'title', 'desc', 'settings', 'expanded')
+
+    def __init__(self, group_name: Optional[str], title: str, desc: str, settings: List[Tuple[str, Dict]]):
+        self.group_name = group_name
+        self.title = title
+        self.desc = desc
+        self.settings = settings
+        self.expanded = True
+
+
+class SettingsModel(QAbstractListModel):
+    """玩家设置列表模型
+
+    每一行是一个分组标题或一个设置项，折叠的分组不包含设置项行。
+    数值直接读写玩家设置的 finalSettings。
+
+    信号:
+        value_changed(str, object): 用户修改了设置项的值
+    """
+
+    value_changed = pyqtSignal(str, object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._sections: List[_Section] = []
+        self._final_settings: Dict[str, Any] = {}
+        # (行类型, 分组序号, 设置项序号)
+        self._rows: List[Tuple[int, int, int]] = []
+        # 设置项名称 -> (分组序号, 设置项序号)
+        self._positions: Dict[str, Tuple[int, int]] = {}
+
+    def set_settings(self, sections: List[Tuple[Optional[str], str, str, List[Tuple[str, Dict]]]],
+                     final_settings: Dict[str, Any]):
+        """设置分组和设置项
+
+        Args:
+            sections: (分组名称, 显示名称, 描述, [(设置项名称, 设置项数据)]) 列表，
+                分组名称为 None 时设置项单独显示
+            final_settings: 玩家设置的 finalSettings，修改会直接写入
+        """
+        self.beginResetModel()
+        self._sections = [_Section(*section) for section in sections]
+        self._final_settings = final_settings
+        self._positions = {name: (s, i) for s, section in enumerate(self._sections)
+                           for i, (name, _) in enumerate(section.settings)}
+        self._rows = self._build_rows()
+        self.endResetModel()
+
+    def _build_rows(self) -> List[Tuple[int, int, int]]:
+        rows = []
+        for s, section in enumerate(self._sections):
+            if section.group_name is not None:
+                rows.append((ROW_GROUP, s, -1))
+            if section.group_name is None or section.expanded:
+                rows.extend((ROW_SETTING, s, i) for i in range(len(section.settings)))
+        return rows
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        if self._rows[index.row()][0] == ROW_SETTING:
+            return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsEditable
+        return Qt.ItemFlag.ItemIsEnabled
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        kind, s, i = self._rows[index.row()]
+        section = self._sections[s]
+        if role == KIND_ROLE:
+            return kind
+        if kind == ROW_GROUP:
+            if role == Qt.ItemDataRole.DisplayRole:
+                return section.title
+            if role == DESC_ROLE:
+                return section.desc
+            if role == EXPANDED_ROLE:
+                return section.expanded
+            return None
+
+        name, setting_data = section.settings[i]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return setting_data.get('showName', name)
+        if role in (DESC_ROLE, Qt.ItemDataRole.ToolTipRole):
+            return setting_data.get('desc', '')
+        if role == NAME_ROLE:
+            return name
+        if role == SETTING_ROLE:
+            return setting_data
+        if role in (VALUE_ROLE, Qt.ItemDataRole.EditRole):
+            return self._final_settings.get(name, setting_data.get('default', False))
+        if role == GROUPED_ROLE:
+            return section.group_name is not None
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        """用户修改设置项的值"""
+        if role not in (Qt.ItemDataRole.EditRole, VALUE_ROLE) or not index.isValid():
+            return False
+        kind, s, i = self._rows[index.row()]
+        if kind != ROW_SETTING:
+            return False
+        name = self._sections[s].settings[i][0]
+        if self._final_settings.get(name) == value:
+            return False
+        self._final_settings[name] = value
+        self.dataChanged.emit(index, index, [VALUE_ROLE])
+        self.value_changed.emit(name, value)
+        return True
+
+    def set_value(self, name: str, value):
+        """以程序方式更新设置项的值并刷新显示，不发出 value_changed"""
+        if name not in self._positions:
+            return
+        self._final_settings[name] = value
+        index = self.index_of(name)
+        if index.isValid():
+            self.dataChanged.emit(index, index, [VALUE_ROLE])
+
+    def set_final_settings(self, final_settings: Dict[str, Any]):
+        """替换 finalSettings（例如应用预设后）并刷新所有行的显示，不发出 value_changed"""
+        self._final_settings = final_settings
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, 0), [VALUE_ROLE])
+
+    def index_of(self, name: str) -> QModelIndex:
+        """设置项所在行的索引，所在分组折叠时返回无效索引"""
+        position = self._positions.get(name)
+        if position is None:
+            return QModelIndex()
+        try:
+            return self.index(self._rows.index((ROW_SETTING,) + position), 0)
+        except ValueError:
+            return QModelIndex()
+
+    def setting_data(self, name: str) -> Optional[Dict]:
+        position = self._positions.get(name)
+        if position is None:
+            return None
+        return self._sections[position[0]].settings[position[1]][1]
+
+    def toggle_group(self, row: int):
+        """展开/折叠分组标题所在行的分组"""
+        kind, s, _ = self._rows[row]
+        if kind != ROW_GROUP:
+            return
+        section = self._sections[s]
+        count = len(section.settings)
+        section.expanded = not section.expanded
+        if count:
+            if section.expanded:
+                self.beginInsertRows(QModelIndex(), row + 1, row + count)
+                self._rows[row + 1:row + 1] = [(ROW_SETTING, s, i) for i in range(count)]
+                self.endInsertRows()
+            else:
+                self.beginRemoveRows(QModelIndex(), row + 1, row + count)
+                del self._rows[row + 1:row + 1 + count]
+                self.endRemoveRows()
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, [EXPANDED_ROLE])
+
+
+class SettingsDelegate(QStyledItemDelegate):
+    """绘制分组标题和设置项卡片，并处理开关、滑块和下拉框的交互
+
+    信号:
+        reset_requested(str): 鼠标中键点击设置项，参数为设置项名称
+    """
+
+    reset_requested = pyqtSignal(str)
+
+    # 尺寸（像素）
+    GROUP_HEIGHT = 50
+    GROUP_DESC_HEIGHT = 30
+    GROUP_SPACING = 15
+    CARD_HEIGHT = 44
+    CARD_DESC_HEIGHT = 18
+    CARD_SPACING = 10
+    GROUP_INDENT = 20
+    TOGGLE_SIZE = QSize(44, 24)
+    DROPDOWN_SIZE = QSize(160, 26)
+    SLIDER_WIDTH = 160
+    SLIDER_LABEL_WIDTH = 44
+
+    def __init__(self, view: QAbstractItemView):
+        super().__init__(view)
+        self.view = view
+        # 正在拖动的滑块所在行
+        self._drag_index: Optional[QPersistentModelIndex] = None
+
+    # 布局
+
+    def sizeHint(self, option, index) -> QSize:
+        if index.data(KIND_ROLE) == ROW_GROUP:
+            height = self.GROUP_SPACING + self.GROUP_HEIGHT
+            if index.data(EXPANDED_ROLE) and index.data(DESC_ROLE):
+                height += self.GROUP_DESC_HEIGHT
+            return QSize(option.rect.width(), height)
+        height = self.CARD_HEIGHT + self.CARD_SPACING
+        if index.data(DESC_ROLE):
+            height += self.CARD_DESC_HEIGHT
+        return QSize(option.rect.width(), height)
+
+    def _card_rect(self, rect: QRect, index) -> QRect:
+        indent = self.GROUP_INDENT if index.data(GROUPED_ROLE) else 0
+        return rect.adjusted(indent, self.CARD_SPACING, -indent, 0)
+
+    def _control_rect(self, card: QRect, setting_type: str) -> QRect:
+        """卡片中控件所在的区域（位于标题行右侧）"""
+        center_y = card.top() + 10 + 12
+        if setting_type == 'dropdown':
+            size = self.DROPDOWN_SIZE
+        elif setting_type in ('integer_slider', 'float_slider'):
+            size = QSize(self.SLIDER_WIDTH + self.SLIDER_LABEL_WIDTH, 20)
+        else:
+            size = self.TOGGLE_SIZE
+        return QRect(card.right() - 10 - size.width(), center_y - size.height() // 2,
+                     size.width(), size.height())
+
+    def _groove_rect(self, control: QRect) -> QRect:
+        return QRect(control.left() + 4, control.center().y() - 4, self.SLIDER_WIDTH - 8, 8)
+
+    # 绘制
+
+    def paint(self, painter: QPainter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if index.data(KIND_ROLE) == ROW_GROUP:
+            self._paint_group(painter, option.rect, index)
+        else:
+            self._paint_setting(painter, option, index)
+        painter.restore()
+
+    def _paint_group(self, painter: QPainter, rect: QRect, index):
+        bar = QRect(rect.left(), rect.top() + self.GROUP_SPACING, rect.width(), self.GROUP_HEIGHT)
+        gradient = QLinearGradient(bar.left(), 0, bar.right(), 0)
+        gradient.setColorAt(0, QColor(BG_100))
+        gradient.setColorAt(1, QColor(PRIMARY_500))
+        painter.setBrush(QBrush(gradient))
+        painter.setPen(QPen(QColor(BORDER_200), 2))
+        painter.drawRoundedRect(bar.adjusted(1, 1, -1, -1), 8, 8)
+
+        font = QFont(painter.font())
+        font.setPixelSize(15)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor(TEXT_100))
+        text_rect = bar.adjusted(20, 0, -40, 0)
+        title = painter.fontMetrics().elidedText(index.data(), Qt.TextElideMode.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+        expanded = index.data(EXPANDED_ROLE)
+        painter.drawText(bar.adjusted(0, 0, -20, 0), Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter,
+                         "▼" if expanded else "▶")
+
+        desc = index.data(DESC_ROLE)
+        if expanded and desc:
+            font.setPixelSize(11)
+            font.setBold(False)
+            painter.setFont(font)
+            painter.setPen(QColor(TEXT_400))
+            desc_rect = QRect(rect.left() + 20, bar.bottom(), rect.width() - 30, self.GROUP_DESC_HEIGHT)
+            desc = painter.fontMetrics().elidedText(desc, Qt.TextElideMode.ElideRight, desc_rect.width())
+            painter.drawText(desc_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, desc)
+
+    def _paint_setting(self, painter: QPainter, option, index):
+        card = self._card_rect(option.rect, index)
+        hovered = bool(option.state & QStyle.StateFlag.State_MouseOver)
+        gradient = QLinearGradient(card.left(), card.top(), card.right(), card.bottom())
+        gradient.setColorAt(0, QColor(BG_200 if hovered else BG_300))
+        gradient.setColorAt(1, QColor(BG_300 if hovered else BG_200))
+        painter.setBrush(QBrush(gradient))
+        painter.setPen(QPen(QColor(BORDER_200), 1))
+        painter.drawRoundedRect(card.adjusted(0, 0, -1, -1), 8, 8)
+
+        setting_data = index.data(SETTING_ROLE)
+        setting_type = setting_data.get('type', 'boolean')
+        control = self._control_rect(card, setting_type)
+
+        font = QFont(painter.font())
+        font.setPixelSize(13)
+        font.setBold(True)
+        painter.setFont(font)
+        painter.setPen(QColor(TEXT_200))
+        title_rect = QRect(card.left() + 10, card.top() + 10, control.left() - card.left() - 20, 24)
+        title = painter.fontMetrics().elidedText(index.data(), Qt.TextElideMode.ElideRight, title_rect.width())
+        painter.drawText(title_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, title)
+
+        desc = index.data(DESC_ROLE)
+        if desc:
+            font.setPixelSize(11)
+            font.setBold(False)
+            painter.setFont(font)
+            painter.setPen(QColor(TEXT_400))
+            desc_rect = QRect(card.left() + 10, title_rect.bottom(), card.width() - 20, self.CARD_DESC_HEIGHT)
+            desc = painter.fontMetrics().elidedText(desc, Qt.TextElideMode.ElideRight, desc_rect.width())
+            painter.drawText(desc_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, desc)
+
+        value = index.data(VALUE_ROLE)
+        if setting_type == 'dropdown':
+            self._paint_dropdown(painter, control, value)
+        elif setting_type in ('integer_slider', 'float_slider'):
+            self._paint_slider(painter, control, setting_data, setting_type, value)
+        else:
+            self._paint_toggle(painter, control, bool(value))
+
+    def _paint_toggle(self, painter: QPainter, rect: QRect, checked: bool):
+        # 与 ToggleSwitch 的外观一致
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(QColor(PRIMARY_500 if checked else BG_400)))
+        painter.drawRoundedRect(rect, 12, 12)
+        painter.setBrush(QBrush(QColor('#ffffff')))
+        painter.drawEllipse(rect.left() + (22 if checked else 2), rect.top() + 2, 20, 20)
+
+    def _paint_dropdown(self, painter: QPainter, rect: QRect, value):
+        painter.setBrush(QBrush(QColor(BG_400)))
+        painter.setPen(QPen(QColor(BORDER_200), 1))
+        painter.drawRoundedRect(rect.adjusted(0, 0, -1, -1), 4, 4)
+        font = QFont(painter.font())
+        font.setPixelSize(12)
+        font.setBold(False)
+        painter.setFont(font)
+        painter.setPen(QColor(TEXT_200))
+        text_rect = rect.adjusted(8, 0, -22, 0)
+        text = painter.fontMetrics().elidedText(str(value), Qt.TextElideMode.ElideRight, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter, text)
+        painter.setPen(QColor(TEXT_300))
+        painter.drawText(rect.adjusted(0, 0, -8, 0), Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, "▾")
+
+    def _paint_slider(self, painter: QPainter, rect: QRect, setting_data: Dict, setting_type: str, value):
+        min_val, max_val, _ = slider_range(setting_data, setting_type)
+        groove = self._groove_rect(rect)
+        try:
+            ratio = (float(value) - min_val) / (max_val - min_val) if max_val != min_val else 0.0
+        except (TypeError, ValueError):
+            ratio = 0.0
+        ratio = min(max(ratio, 0.0), 1.0)
+        handle_x = groove.left() + int(ratio * groove.width())
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(QColor(BG_400)))
+        painter.drawRoundedRect(groove, 4, 4)
+        painter.setBrush(QBrush(QColor(PRIMARY_500)))
+        painter.drawRoundedRect(QRect(groove.left(), groove.top(), handle_x - groove.left(), groove.height()), 4, 4)
+        painter.drawRoundedRect(QRect(handle_x - 4, rect.center().y() - 9, 8, 18), 4, 4)
+
+        font = QFont(painter.font())
+        font.setPixelSize(11)
+        font.setBold(False)
+        painter.setFont(font)
+        painter.setPen(QColor(TEXT_400))
+        label_rect = QRect(rect.left() + self.SLIDER_WIDTH, rect.top(), self.SLIDER_LABEL_WIDTH, rect.height())
+        try:
+            text = format_value(setting_data, value)
+        except (TypeError, ValueError):
+            text = str(value)
+        painter.drawText(label_rect, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, text)
+
+    # 交互
+
+    def _slider_value(self, index, x: int):
+        """滑块上横坐标 x 对应的值（按步长取整）"""
+        setting_data = index.data(SETTING_ROLE)
+        setting_type = setting_data.get('type')
+        min_val, max_val, step_val = slider_range(setting_data, setting_type)
+        rect = self.view.visualRect(index)
+        groove = self._groove_rect(self._control_rect(self._card_rect(rect, index), setting_type))
+        ratio = min(max((x - groove.left()) / max(groove.width(), 1), 0.0), 1.0)
+        steps = round(ratio * (max_val - min_val) / step_val) if step_val else 0
+        value = min(max(min_val + steps * step_val, min(min_val, max_val)), max(min_val, max_val))
+        if setting_type == 'float_slider':
+            return round(value, decimal_places(step_val))
+        return int(value)
+
+    def end_drag(self):
+        """结束滑块拖动"""
+        self._drag_index = None
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        event_type = event.type()
+        if event_type == QEvent.Type.MouseMove and self._drag_index is not None:
+            # 松开左键时鼠标不在按下的行上，释放事件不会到达这里；之后的悬停移动不再拖动
+            if not event.buttons() & Qt.MouseButton.LeftButton:
+                self.end_drag()
+                return False
+            if self._drag_index.isValid():
+                drag_index = self.view.model().index(self._drag_index.row(), 0)
+                model.setData(drag_index, self._slider_value(drag_index, int(event.position().x())))
+            return True
+        if event_type == QEvent.Type.MouseButtonRelease and self._drag_index is not None:
+            self.end_drag()
+            return True
+        if event_type != QEvent.Type.MouseButtonPress:
+            return False
+
+        if index.data(KIND_ROLE) == ROW_GROUP:
+            if event.button() == Qt.MouseButton.LeftButton:
+                model.toggle_group(index.row())
+                return True
+            return False
+
+        if event.button() == Qt.MouseButton.MiddleButton:
+            self.reset_requested.emit(index.data(NAME_ROLE))
+            return True
+        if event.button() != Qt.MouseButton.LeftButton:
+            return False
+
+        setting_data = index.data(SETTING_ROLE)
+        setting_type = setting_data.get('type', 'boolean')
+        control = self._control_rect(self._card_rect(option.rect, index), setting_type)
+        pos = event.position().toPoint()
+        if not control.adjusted(-4, -6, 4, 6).contains(pos):
+            return False
+        if setting_type == 'dropdown':
+            self.view.edit(index)
+        elif setting_type in ('integer_slider', 'float_slider'):
+            self._drag_index = QPersistentModelIndex(index)
+            model.setData(index, self._slider_value(index, pos.x()))
+        else:
+            model.setData(index, not bool(index.data(VALUE_ROLE)))
+        return True
+
+    # 下拉框编辑器（只在点击时为单行创建）
+
+    def createEditor(self, parent, option, index):
+        setting_data = index.data(SETTING_ROLE)
+        if setting_data.get('type') != 'dropdown':
+            return None
+        editor = QComboBox(parent)
+        editor.setStyleSheet(SS_player_SettingItemCard_dropdown_widget)
+        for option_value in setting_data.get('options', []):
+            editor.addItem(option_value, option_value)
+        editor.activated.connect(lambda _, e=editor: self._commit_dropdown(e))
+        QTimer.singleShot(0, editor.showPopup)
+        return editor
+
+    def _commit_dropdown(self, editor: QComboBox):
+        self.commitData.emit(editor)
+        self.closeEditor.emit(editor)
+
+    def setEditorData(self, editor, index):
+        value = index.data(VALUE_ROLE)
+        position = editor.findData(value)
+        if position < 0:
+            position = editor.findData(index.data(SETTING_ROLE).get('default', ''))
+        editor.setCurrentIndex(max(position, 0))
+
+    def setModelData(self, editor, model, index):
+        if editor.currentIndex() >= 0:
+            model.setData(index, editor.currentData())
+
+    def updateEditorGeometry(self, editor, option, index):
+        setting_data = index.data(SETTING_ROLE)
+        editor.setGeometry(self._control_rect(self._card_rect(option.rect, index), setting_data.get('type')))
+
+
+class SettingsView(QListView):
+    """虚拟化的玩家设置列表视图"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet(SS_player_settings_view)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.NoSelection)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WidgetAttribute.WA_Hover, True)
+
+        self.settings_model = SettingsModel(self)
+        self.setModel(self.settings_model)
+        self.delegate = SettingsDelegate(self)
+        self.setItemDelegate(self.delegate)
+
+    def mouseReleaseEvent(self, event):
+        # 在其他行、最后一行下方或视口外松开时，释放事件不会交给委托，在这里结束拖动
+        super().mouseReleaseEvent(event)
+        if event.button() == Qt.MouseButton.LeftButton:
+            self.delegate.end_drag()
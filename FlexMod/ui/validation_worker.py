@@ -0,0 +1,58 @@
+"""后台验证工作器
+
+在工作线程中执行 ValidationScanner，每扫描完一个文件就通过信号发送该文件的部分报告
+和进度，界面可以边扫描边显示结果。编辑数据或关闭窗口时可以随时取消。
+"""
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from ..utils.validation import ValidationIndex, ValidationScanner
+
+
+class ValidationWorker(QThread):
+    """验证线程
+
+    信号:
+        progress(int, int): 已完成文件数、文件总数
+        partial_report(object): 新发现问题的部分报告（ValidationReport）
+        completed(): 全部文件验证完成（取消时不发出）
+        failed(str): 验证出错，参数为错误信息
+    """
+
+    progress = pyqtSignal(int, int)
+    partial_report = pyqtSignal(object)
+    completed = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, json_path: str, mod_files_dir: str, parent=None):
+        super().__init__(parent)
+        self.json_path = json_path
+        self.mod_files_dir = mod_files_dir
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """请求取消，当前文件扫描完成后停止"""
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        """是否已请求取消"""
+        return self._cancelled.is_set()
+
+    def run(self):
+        try:
+            index = ValidationIndex.for_mod(self.mod_files_dir)
+            scanner = ValidationScanner.from_json_file(self.json_path, self.mod_files_dir, index)
+            for done, total, partial in scanner.iter_scan(self.is_cancelled):
+                if self.is_cancelled():
+                    return
+                if not partial.ok:
+                    self.partial_report.emit(partial)
+                self.progress.emit(done, total)
+        except Exception as e:
+            if not self.is_cancelled():
+                self.failed.emit(str(e))
+            return
+
+        if not self.is_cancelled():
+            self.completed.emit()
@@ -0,0 +1,283 @@
+"""配置应用引擎模块
+
+一次性解析 player_settings.json 与 FlexMod.json，在内存中生成每个设置项的
+执行任务列表，然后统一执行，避免每个设置项都重复读取和解析 JSON 文件。
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from .atomic_write import AtomicBatch, atomic_write_bytes, recover
+from .flexmod_definition import SLIDER_CONFIG_TYPES, FlexModDefinition, flexmod_definitions
+from .snapshots import SnapshotStore
+from .xml_operations import XmlOperations
+from .xpath_handler import XpathHandler, XpathPlan
+
+
+# 使用定位注释替换代码的配置类型
+OPTION_CONFIG_TYPES = ('boolConfig', 'selectConfig')
+
+
+@dataclass
+class WorkItem:
+    """单个设置项的执行任务"""
+    setting_id: str
+    kind: str  # 'marker' 表示定位注释替换，'xpath' 表示属性修改
+    file_path: str
+    code: str = ''
+    plans: List[XpathPlan] = field(default_factory=list)
+    value: Any = None
+
+
+@dataclass
+class ApplyResult:
+    """一次应用的结果"""
+    work_items: List[WorkItem] = field(default_factory=list)
+    failed_files: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """是否所有文件都处理成功"""
+        return not self.failed_files
+
+    @property
+    def touched_files(self) -> List[str]:
+        """本次应用涉及的文件"""
+        return list(dict.fromkeys(item.file_path for item in self.work_items))
+
+
+class ApplyEngine:
+    """配置应用引擎
+
+    引擎按 FlexMod 定义快照缓存，滑块设置的 XpathSet 在引擎内只编译一次，
+    FlexMod.json 变化（快照更新）后自动重新创建。
+    """
+
+    _cache: Dict[tuple, tuple] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, flexmod_data: Dict[str, Any], mod_files_dir: str,
+                 definition: Optional[FlexModDefinition] = None):
+        if definition is None:
+            definition = FlexModDefinition.from_data(flexmod_data)
+        self.definition = definition
+        self.flexmod_data = flexmod_data
+        self.mod_files_dir = mod_files_dir
+        self.config_dir = os.path.join(mod_files_dir, 'Config')
+        # 设置项ID -> [(完整路径, [XpathPlan])]
+        self._xpath_plans: Dict[str, List[tuple]] = {}
+
+        # 配置块映射，key为uniqueId，value为配置块
+        self.block_map = definition.config_index
+
+    @staticmethod
+    def load_json(file_path: str) -> Dict[str, Any]:
+        """读取并解析JSON文件"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @classmethod
+    def from_json_file(cls, flexmod_json_path: str, mod_files_dir: str) -> 'ApplyEngine':
+        """从FlexMod JSON文件获取引擎，定义快照未变化时复用缓存的引擎
+
+        Raises:
+            OSError: 文件无法读取
+            ValueError: JSON 解析错误
+        """
+        definition = flexmod_definitions.get(flexmod_json_path)
+        key = (os.path.normcase(os.path.abspath(flexmod_json_path)), os.path.normcase(os.path.abspath(mod_files_dir)))
+        with cls._cache_lock:
+            entry = cls._cache.get(key)
+            if entry and entry[0] is definition:
+                return entry[1]
+
+        engine = cls(definition.data, mod_files_dir, definition)
+        with cls._cache_lock:
+            cls._cache[key] = (definition, engine)
+        return engine
+
+    def settings_for_files(self, full_paths: Iterable[str]) -> List[str]:
+        """修改这些 Config 文件（完整路径）会影响的设置项ID（来自文件索引，不遍历配置块）"""
+        keys = {os.path.normcase(os.path.abspath(path)) for path in full_paths}
+        file_index = self.definition.file_index
+        file_paths = [file_path for file_path in file_index.file_settings
+                      if file_path and os.path.normcase(os.path.abspath(os.path.join(self.config_dir, file_path))) in keys]
+        return file_index.settings_for_files(file_paths)
+
+    def xpath_plans(self, setting_id: str) -> List[tuple]:
+        """获取滑块设置项编译好的 XpathPlan，按 XpathSet 顺序分文件返回
+
+        Returns:
+            List[tuple]: [(完整路径, [XpathPlan])]
+        """
+        plans = self._xpath_plans.get(setting_id)
+        if plans is None:
+            plans = []
+            block = self.block_map.get(setting_id, {})
+            for xpath_item in block.get('XpathSet', []):
+                file_path = xpath_item.get('filePath')
+                if not file_path:
+                    continue
+                full_path = os.path.join(self.config_dir, file_path)
+                compiled = [XpathHandler.compile_attribute_xpath(full_path, xpath)
+                            for xpath in xpath_item.get('xpath', [])]
+                plans.append((full_path, [plan for plan in compiled if plan]))
+            self._xpath_plans[setting_id] = plans
+        return plans
+
+    def build_work_list(self, final_settings: Dict[str, Any],
+                        setting_ids: Optional[Iterable[str]] = None) -> List[WorkItem]:
+        """根据最终设置生成执行任务列表
+
+        Args:
+            final_settings: 设置项ID到当前值的映射
+            setting_ids: 只处理这些设置项，None 表示按 final_settings 顺序处理全部
+
+        Returns:
+            List[WorkItem]: 按设置顺序排列的执行任务
+        """
+        if setting_ids is None:
+            setting_ids = final_settings.keys()
+
+        work_list = []
+        # 同一次应用中文件是否存在只检查一次
+        exists_cache: Dict[str, bool] = {}
+
+        def exists(full_path):
+            if full_path not in exists_cache:
+                exists_cache[full_path] = os.path.exists(full_path)
+            return exists_cache[full_path]
+
+        def resolve(file_path):
+            full_path = os.path.join(self.config_dir, file_path)
+            return full_path if exists(full_path) else None
+
+        for setting_id in setting_ids:
+            if setting_id not in final_settings or setting_id not in self.block_map:
+                continue
+
+            block = self.block_map[setting_id]
+            config_type = block.get('configType')
+            setting_value = final_settings[setting_id]
+
+            if config_type in OPTION_CONFIG_TYPES:
+                # 查找当前值对应的选项
+                selected_option = None
+                for option in block.get('optionItems', []):
+                    if str(option.get('optionKey')).lower() == str(setting_value).lower():
+                        selected_option = option
+                        break
+                if not selected_option:
+                    continue
+
+                for exec_unit in selected_option.get('execUnits', []):
+                    file_path = exec_unit.get('filePath')
+                    if not file_path:
+                        continue
+                    full_path = resolve(file_path)
+                    if full_path:
+                        work_list.append(WorkItem(setting_id, 'marker', full_path,
+                                                  code=exec_unit.get('execCode', '').strip()))
+
+            elif config_type in SLIDER_CONFIG_TYPES:
+                for full_path, plans in self.xpath_plans(setting_id):
+                    if exists(full_path):
+                        work_list.append(WorkItem(setting_id, 'xpath', full_path,
+                                                  plans=plans, value=setting_value))
+
+        return work_list
+
+    @staticmethod
+    def group_by_file(work_list: List[WorkItem]) -> Dict[str, List[WorkItem]]:
+        """按目标文件分组任务，保持文件首次出现的顺序和组内任务顺序"""
+        groups: Dict[str, List[WorkItem]] = {}
+        for item in work_list:
+            groups.setdefault(item.file_path, []).append(item)
+        return groups
+
+    def stage(self, work_list: List[WorkItem], batch: AtomicBatch) -> List[str]:
+        """把任务列表的修改暂存到批量写入中，不提交
+
+        同一文件的所有定位注释替换合并为一次读取、一次扫描和最多一次写回，
+        之后该文件的所有 XPath 属性修改也合并为一次写回。批量写入中已暂存的文件
+        在暂存内容的基础上修改。
+
+        Returns:
+            List[str]: 处理失败的文件路径
+        """
+        failed_files = []
+        for file_path, items in self.group_by_file(work_list).items():
+            ok = True
+            # 同一设置项多次写入同一文件时，以最后一次为准
+            replacements = {}
+            for item in items:
+                if item.kind == 'marker':
+                    replacements[item.setting_id] = item.code
+            if replacements:
+                ok = XmlOperations.update_file_markers(file_path, replacements, batch)
+
+            plan_values = [(plan, item.value) for item in items if item.kind == 'xpath' for plan in item.plans]
+            if plan_values:
+                ok = XpathHandler.update_xml_by_plans(file_path, plan_values, batch) and ok
+
+            if not ok:
+                failed_files.append(file_path)
+        return failed_files
+
+    def run(self, work_list: List[WorkItem], extra_files: Optional[Dict[str, bytes]] = None,
+            snapshots: Optional[SnapshotStore] = None) -> List[str]:
+        """执行任务列表
+
+        所有文件的新内容先暂存为临时文件（见 stage()），全部生成成功后才一起替换：
+        任一文件失败或提交中途崩溃时，所有 Config 文件都保持应用前的内容。
+
+        Args:
+            work_list: 执行任务列表
+            extra_files: 与 Config 文件一起提交的其他文件（如 player_settings.json），路径到内容
+            snapshots: 快照存储，提交前记录本次修改的快照，None 表示不记录
+
+        Returns:
+            List[str]: 处理失败的文件路径
+        """
+        # 上次提交中途中断时，先根据日志恢复
+        recover(self.mod_files_dir)
+        batch = AtomicBatch(self.mod_files_dir)
+
+        failed_files = self.stage(work_list, batch)
+        if failed_files:
+            batch.rollback()
+            # Config 文件保持原样，其他文件（玩家设置）仍然保存，失败的设置项下次继续应用
+            for path, content in (extra_files or {}).items():
+                atomic_write_bytes(path, content)
+            return failed_files
+        try:
+            for path, content in (extra_files or {}).items():
+                batch.write_bytes(path, content)
+            if snapshots is not None:
+                snapshots.record(batch, {item.setting_id for item in work_list})
+            batch.commit()
+        except Exception:
+            # 提交失败时已全部回滚，所有文件都未更新
+            return list(self.group_by_file(work_list))
+        return failed_files
+
+    def apply(self, final_settings: Dict[str, Any],
+              setting_ids: Optional[Iterable[str]] = None,
+              extra_files: Optional[Dict[str, bytes]] = None,
+              snapshots: Optional[SnapshotStore] = None) -> ApplyResult:
+        """生成并执行任务列表
+
+        Args:
+            final_settings: 设置项ID到当前值的映射
+            setting_ids: 只应用这些设置项，None 表示全部
+            extra_files: 与 Config 文件一起提交的其他文件，见 run()
+            snapshots: 快照存储，见 run()
+
+        Returns:
+            ApplyResult: 应用结果
+        """
+        work_list = self.build_work_list(final_settings, setting_ids)
+        failed_files = self.run(work_list, extra_files, snapshots)
+        return ApplyResult(work_list, failed_files)
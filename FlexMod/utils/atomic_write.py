@@ -0,0 +1,280 @@
+"""原子写入模块
+
+写入时先写同目录的临时文件，fsync 后再用 os.replace 替换目标文件，程序在写入
+过程中崩溃时目标文件要么是旧内容、要么是新内容，不会出现写了一半的文件。
+
+一次应用会修改多个 Config 文件，AtomicBatch 把这些写入先暂存为临时文件，提交时
+每个文件只 fsync 一次，并通过日志文件保证所有文件一起替换或全部保持原样：
+替换前写入日志并把原文件改名为备份，全部替换完成后再删除备份和日志。
+提交中途崩溃时，下次提交前 recover() 会根据日志恢复备份，并删除本次新建的文件。
+"""
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Tuple
+
+# 日志条目：(目标路径, 临时文件, 备份文件, 是否为新建的文件)
+JournalEntry = Tuple[str, str, str, bool]
+
+
+# 临时文件和备份文件的后缀，不以 .xml 结尾，不会被验证扫描到
+TEMP_SUFFIX = '.flexmod-tmp'
+BACKUP_SUFFIX = '.flexmod-bak'
+# 日志文件名，位于批量写入的根目录
+JOURNAL_NAME = '.flexmod_journal.json'
+
+_temp_counter = 0
+_temp_lock = threading.Lock()
+
+# 文件写入完成后的回调，参数为目标文件路径（可能在工作线程中调用）
+_write_listeners: List[Callable[[str], None]] = []
+
+
+def add_write_listener(callback: Callable[[str], None]) -> None:
+    """注册写入完成回调，用于文件监视区分本程序自己的写入"""
+    _write_listeners.append(callback)
+
+
+def remove_write_listener(callback: Callable[[str], None]) -> None:
+    """取消写入完成回调"""
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+
+def _notify_written(path: str) -> None:
+    for callback in list(_write_listeners):
+        callback(path)
+
+
+def _temp_path(path: str) -> str:
+    """生成与目标文件同目录、不会冲突的临时文件路径"""
+    global _temp_counter
+    with _temp_lock:
+        _temp_counter += 1
+        counter = _temp_counter
+    return f"{path}.{os.getpid()}.{counter}{TEMP_SUFFIX}"
+
+
+def _fsync_file(path: str) -> None:
+    with open(path, 'rb+') as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(directory: str) -> None:
+    """fsync 目录，使改名操作持久化（Windows 不支持打开目录，跳过）"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory or '.', os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _replace(temp_path: str, path: str) -> None:
+    """用临时文件替换目标文件，保留目标文件的权限"""
+    if os.path.exists(path):
+        shutil.copymode(path, temp_path)
+    os.replace(temp_path, path)
+
+
+@contextmanager
+def atomic_writer(path: str):
+    """原子写入的二进制文件对象
+
+    退出时 fsync 并替换目标文件；出现异常时删除临时文件，目标文件保持不变。
+    """
+    temp_path = _temp_path(path)
+    try:
+        with open(temp_path, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        _replace(temp_path, path)
+        _fsync_dir(os.path.dirname(path))
+        _notify_written(path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def atomic_write_bytes(path: str, data: bytes) -> None:
+    """原子写入字节内容"""
+    with atomic_writer(path) as f:
+        f.write(data)
+
+
+def atomic_write_text(path: str, text: str, encoding: str = 'utf-8') -> None:
+    """原子写入文本内容，换行符按原样写入"""
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def encode_json(data, indent: int = 4) -> bytes:
+    """JSON文件的字节内容"""
+    return json.dumps(data, indent=indent, ensure_ascii=False).encode('utf-8')
+
+
+def atomic_write_json(path: str, data, indent: int = 4) -> None:
+    """原子写入JSON文件"""
+    atomic_write_bytes(path, encode_json(data, indent))
+
+
+def _write_journal(root_dir: str, state: str, entries: List[JournalEntry]) -> None:
+    atomic_write_json(os.path.join(root_dir, JOURNAL_NAME),
+                      {'state': state, 'entries': [list(entry) for entry in entries]})
+
+
+def recover(root_dir: str) -> bool:
+    """根据日志恢复中途中断的批量提交
+
+    日志处于 prepared 状态时恢复所有备份并删除本次新建的文件（回滚），处于
+    committed 状态时只清理备份（完成提交）。
+
+    Returns:
+        bool: 是否处理了日志
+    """
+    journal_path = os.path.join(root_dir, JOURNAL_NAME)
+    if not os.path.exists(journal_path):
+        return False
+    try:
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        # 日志本身没有写完，说明还没有开始替换文件
+        journal = {'state': 'prepared', 'entries': []}
+
+    for entry in journal.get('entries', []):
+        path, temp_path, backup_path = entry[:3]
+        # 旧版本的日志没有新建标记
+        created = len(entry) > 3 and entry[3]
+        if journal.get('state') == 'prepared':
+            if os.path.exists(backup_path):
+                os.replace(backup_path, path)
+            elif created and os.path.exists(path):
+                os.remove(path)
+        for leftover in (temp_path, backup_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    os.remove(journal_path)
+    _fsync_dir(root_dir)
+    return True
+
+
+class AtomicBatch:
+    """一组一起提交的原子写入
+
+    同一文件在批次中多次写入时只保留最后一次，后续的读取应使用 source_path()
+    得到暂存的最新内容。提交成功后执行 after_commit() 注册的回调，放弃时执行
+    after_rollback() 注册的回调。
+    """
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        self._staged: Dict[str, Tuple[str, str]] = {}  # 规范化路径 -> (目标路径, 临时文件)
+        self._on_commit: List[Callable[[], None]] = []
+        self._on_rollback: List[Callable[[], None]] = []
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def is_staged(self, path: str) -> bool:
+        """文件是否已有暂存的新内容"""
+        return self._key(path) in self._staged
+
+    def source_path(self, path: str) -> str:
+        """文件最新内容所在的路径：已暂存时为临时文件，否则为目标文件本身"""
+        staged = self._staged.get(self._key(path))
+        return staged[1] if staged else path
+
+    @contextmanager
+    def writer(self, path: str):
+        """暂存文件的新内容，返回二进制文件对象
+
+        写入完成后才替换之前暂存的内容，写入过程中仍可以从 source_path() 读取旧内容。
+        """
+        temp_path = _temp_path(path)
+        try:
+            with open(temp_path, 'wb') as f:
+                yield f
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        previous = self._staged.get(self._key(path))
+        self._staged[self._key(path)] = (path, temp_path)
+        if previous:
+            os.remove(previous[1])
+
+    def write_bytes(self, path: str, data: bytes) -> None:
+        """暂存字节内容"""
+        with self.writer(path) as f:
+            f.write(data)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """注册提交成功后执行的回调"""
+        self._on_commit.append(callback)
+
+    def after_rollback(self, callback: Callable[[], None]) -> None:
+        """注册放弃或提交失败后执行的回调"""
+        self._on_rollback.append(callback)
+
+    @property
+    def paths(self) -> List[str]:
+        """暂存的目标文件路径"""
+        return [path for path, _ in self._staged.values()]
+
+    def commit(self) -> None:
+        """提交所有暂存的文件，失败时回滚并抛出异常"""
+        if not self._staged:
+            self._run(self._on_commit)
+            return
+
+        entries = [(path, temp_path, path + BACKUP_SUFFIX, not os.path.exists(path))
+                   for path, temp_path in self._staged.values()]
+        try:
+            # 每个文件只 fsync 一次
+            for _, temp_path, _, _ in entries:
+                _fsync_file(temp_path)
+            _write_journal(self.root_dir, 'prepared', entries)
+
+            for path, temp_path, backup_path, _ in entries:
+                if os.path.exists(path):
+                    shutil.copymode(path, temp_path)
+                    os.replace(path, backup_path)
+                os.replace(temp_path, path)
+            for directory in {os.path.dirname(entry[0]) for entry in entries}:
+                _fsync_dir(directory)
+
+            _write_journal(self.root_dir, 'committed', entries)
+        except BaseException:
+            self._staged.clear()
+            recover(self.root_dir)
+            # 日志写入之前失败时，临时文件不在日志中
+            for _, temp_path, _, _ in entries:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._run(self._on_rollback)
+            raise
+
+        self._staged.clear()
+        recover(self.root_dir)
+        for entry in entries:
+            _notify_written(entry[0])
+        self._run(self._on_commit)
+
+    def rollback(self) -> None:
+        """放弃所有暂存的文件"""
+        for _, temp_path in self._staged.values():
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self._staged.clear()
+        self._run(self._on_rollback)
+
+    @staticmethod
+    def _run(callbacks: List[Callable[[], None]]) -> None:
+        for callback in callbacks:
+            callback()
+        callbacks.clear()
@@ -0,0 +1,181 @@
+"""批量应用模块
+
+把一个或多个 mod 的玩家设置应用到各自的 Config 文件，不依赖 PyQt6。
+不同 mod 只修改各自 Mods/<mod>/ 下的文件，互不影响，多个 mod 分发到进程池并行
+应用，每个 mod 的结果和耗时汇总返回。命令行和主页的"全部应用"共用。
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from .apply_engine import ApplyEngine, ApplyResult
+from .atomic_write import encode_json
+from .mods_scanner import mods_scanner
+from .player_settings import PlayerSettings
+from .snapshots import SnapshotStore
+from .xpath_handler import set_xpath_engine
+
+
+class ModApplyError(Exception):
+    """mod、FlexMod.json 或预设不存在等无法开始应用的错误（信息不含 mod 名称，由输出结果的一方添加）"""
+
+
+@dataclass
+class ModApplyResult:
+    """单个 mod 的应用结果（可以在进程之间传递）"""
+    mod_name: str
+    ok: bool
+    setting_count: int = 0
+    touched_files: List[str] = field(default_factory=list)
+    failed_files: List[str] = field(default_factory=list)
+    elapsed: float = 0.0  # 秒
+    error: str = ''  # 无法开始应用时的错误信息
+
+
+@dataclass
+class BulkApplyResult:
+    """批量应用结果，按请求的 mod 顺序排列"""
+    results: List[ModApplyResult] = field(default_factory=list)
+    elapsed: float = 0.0  # 总耗时（秒）
+
+    @property
+    def ok(self) -> bool:
+        """是否所有 mod 都应用成功"""
+        return all(result.ok for result in self.results)
+
+    @property
+    def failed(self) -> List[ModApplyResult]:
+        """应用失败的 mod"""
+        return [result for result in self.results if not result.ok]
+
+
+def find_flexmods(mods_dir: str) -> List[str]:
+    """Mods 目录下所有包含 FlexMod/FlexMod.json 的 mod 文件夹名称"""
+    return mods_scanner.flexmods(mods_dir)
+
+
+def apply_mod(mods_dir: str, mod_name: str, preset: Optional[str] = None,
+              defaults: bool = False, snapshot: bool = True) -> ApplyResult:
+    """把一个 mod 的玩家设置全部应用到 Config 文件
+
+    与玩家页面一样，应用前先使 player_settings.json 与 FlexMod.json 同步；
+    player_settings.json 与 Config 文件一起原子提交。
+
+    Args:
+        mods_dir: Mods 目录
+        mod_name: mod 文件夹名称
+        preset: 先把该预设设为最终设置
+        defaults: 先把默认值设为最终设置
+        snapshot: 是否记录可回滚的快照
+
+    Returns:
+        ApplyResult: 应用结果
+
+    Raises:
+        ModApplyError: mod、FlexMod.json 或预设不存在，或 JSON 无法解析
+    """
+    mod_files_dir = os.path.join(mods_dir, mod_name)
+    flexmod_json_path = PlayerSettings.flexmod_json_path(mod_files_dir)
+    if not os.path.exists(flexmod_json_path):
+        raise ModApplyError(f"未找到FlexMod.json文件: {flexmod_json_path}")
+
+    try:
+        engine = ApplyEngine.from_json_file(flexmod_json_path, mod_files_dir)
+    except ValueError as e:
+        raise ModApplyError(f"JSON解析错误: {flexmod_json_path}: {e}")
+    settings = engine.definition.settings
+
+    player_settings_path = PlayerSettings.settings_path(mod_files_dir)
+    if os.path.exists(player_settings_path):
+        try:
+            player_settings = PlayerSettings.load(player_settings_path)
+        except ValueError as e:
+            raise ModApplyError(f"玩家设置文件解析错误: {player_settings_path}: {e}")
+    else:
+        player_settings = PlayerSettings.create_default(settings)
+    player_settings = PlayerSettings.sync(player_settings, settings)
+
+    if preset is not None:
+        presets = player_settings.get('presets', {})
+        if preset not in presets:
+            available = ', '.join(presets) or '-'
+            raise ModApplyError(f"预设不存在: {preset}（可用预设: {available}）")
+        player_settings['finalSettings'] = dict(presets[preset])
+    elif defaults:
+        player_settings['finalSettings'] = dict(player_settings.get('defaultValues', {}))
+
+    # 文件的当前状态未知，应用全部设置项
+    return engine.apply(player_settings.get('finalSettings', {}),
+                        extra_files={player_settings_path: encode_json(player_settings)},
+                        snapshots=SnapshotStore.for_mod(mod_files_dir) if snapshot else None)
+
+
+def apply_mod_result(mods_dir: str, mod_name: str, preset: Optional[str] = None,
+                     defaults: bool = False, snapshot: bool = True,
+                     xpath_engine: Optional[str] = None) -> ModApplyResult:
+    """应用一个 mod 并把结果转换为可以在进程之间传递的 ModApplyResult，不抛出异常
+
+    xpath_engine 不为 None 时先设置当前进程的 XPath 引擎（进程池的子进程不继承设置）。
+    """
+    start = time.perf_counter()
+    try:
+        if xpath_engine is not None:
+            set_xpath_engine(xpath_engine)
+        result = apply_mod(mods_dir, mod_name, preset, defaults, snapshot)
+    except Exception as e:
+        return ModApplyResult(mod_name, False, elapsed=time.perf_counter() - start, error=str(e))
+    return ModApplyResult(mod_name, result.ok,
+                          setting_count=len({item.setting_id for item in result.work_items}),
+                          touched_files=result.touched_files,
+                          failed_files=list(result.failed_files),
+                          elapsed=time.perf_counter() - start)
+
+
+def apply_mods(mods_dir: str, mod_names: List[str], preset: Optional[str] = None,
+               defaults: bool = False, snapshot: bool = True, max_workers: Optional[int] = None,
+               progress: Optional[Callable[[int, int, ModApplyResult], None]] = None,
+               xpath_engine: Optional[str] = None) -> BulkApplyResult:
+    """并行应用多个 mod
+
+    Args:
+        mods_dir: Mods 目录
+        mod_names: mod 文件夹名称，重复的名称只应用一次
+        preset: 每个 mod 都先把该预设设为最终设置
+        defaults: 每个 mod 都先把默认值设为最终设置
+        snapshot: 是否记录可回滚的快照
+        max_workers: 最大进程数，None 表示 CPU 核数；为 1 或只有一个 mod 时在当前进程中执行
+        progress: 每完成一个 mod 调用一次，参数为已完成数、总数和该 mod 的结果
+        xpath_engine: 使用的 XPath 引擎名称，None 表示各进程的默认引擎（ElementTree）
+
+    Returns:
+        BulkApplyResult: 按 mod_names 顺序排列的结果
+    """
+    start = time.perf_counter()
+    # 同一 mod 不能同时在两个进程中写入
+    names = list(dict.fromkeys(mod_names))
+    workers = min(len(names), max_workers or os.cpu_count() or 1)
+    results = {}
+
+    def finish(result):
+        results[result.mod_name] = result
+        if progress is not None:
+            progress(len(results), len(names), result)
+
+    if workers <= 1:
+        for name in names:
+            finish(apply_mod_result(mods_dir, name, preset, defaults, snapshot, xpath_engine))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(apply_mod_result, mods_dir, name, preset, defaults, snapshot,
+                                       xpath_engine): name
+                       for name in names}
+            for future in as_completed(futures):
+                try:
+                    finish(future.result())
+                except Exception as e:
+                    # 子进程异常退出
+                    finish(ModApplyResult(futures[future], False, error=str(e)))
+
+    return BulkApplyResult([results[name] for name in names], time.perf_counter() - start)
@@ -0,0 +1,275 @@
+"""FlexMod 定义缓存模块
+
+FlexMod.json 在进程内只解析一次：玩家页面、编辑器、应用引擎和验证器共用同一份
+FlexModDefinition 快照。快照按文件的 (mtime, 大小) 缓存，文件变化后下次获取时
+重新解析；本程序通过 atomic_write 写入 FlexMod.json 后立即失效。
+
+快照是深度只读的：所有字典和列表都转换为 FrozenDict / FrozenList，修改时抛出
+TypeError。需要修改配置的使用者（例如编辑器）用 copy.deepcopy() 得到普通的可变副本。
+"""
+import copy
+import json
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+
+from .atomic_write import add_write_listener
+from .player_settings import PlayerSettings
+
+
+# 使用 XPath 修改属性值、不使用定位注释的配置类型
+SLIDER_CONFIG_TYPES = ('intSliderConfig', 'intSlider', 'floatSliderConfig', 'floatSlider')
+
+
+def block_file_paths(block: Dict[str, Any]) -> List[str]:
+    """收集配置块引用的所有文件路径（去重，保留空路径）"""
+    file_paths = []
+
+    # 直接的filePath属性（旧版intSlider和floatSlider类型）
+    if block.get('filePath') is not None:
+        file_paths.append(block.get('filePath'))
+
+    # XpathSet（intSlider和floatSlider类型）
+    for xpath_item in block.get('XpathSet', []):
+        if xpath_item.get('filePath') is not None:
+            file_paths.append(xpath_item.get('filePath'))
+
+    # 选项中的执行单元（boolConfig和selectConfig类型）
+    for option in block.get('optionItems', []):
+        for exec_unit in option.get('execUnits', []):
+            if exec_unit.get('filePath') is not None:
+                file_paths.append(exec_unit.get('filePath'))
+
+    return list(dict.fromkeys(file_paths))
+
+
+def _readonly(self, *args, **kwargs):
+    raise TypeError('FlexMod 定义快照是只读的，修改前请先 copy.deepcopy()')
+
+
+class FrozenDict(dict):
+    """只读字典，仍是 dict 的子类（可以直接 json.dumps），深拷贝得到普通的可变字典"""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self) -> dict:
+        return dict(self)
+
+    def __deepcopy__(self, memo) -> dict:
+        return {key: copy.deepcopy(value, memo) for key, value in self.items()}
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class FrozenList(list):
+    """只读列表，仍是 list 的子类，深拷贝得到普通的可变列表"""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = remove = pop = clear = sort = reverse = _readonly
+
+    def __copy__(self) -> list:
+        return list(self)
+
+    def __deepcopy__(self, memo) -> list:
+        return [copy.deepcopy(value, memo) for value in self]
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+
+def deep_freeze(value: Any) -> Any:
+    """把嵌套的字典和列表转换为只读的 FrozenDict / FrozenList，已冻结的对象原样返回"""
+    if isinstance(value, (FrozenDict, FrozenList)):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict((key, deep_freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return FrozenList(deep_freeze(item) for item in value)
+    return value
+
+
+def _freeze(mapping: Dict[str, List[str]]) -> Mapping[str, Tuple[str, ...]]:
+    return MappingProxyType({key: tuple(dict.fromkeys(values)) for key, values in mapping.items()})
+
+
+def _lookup(mapping: Mapping[str, Tuple[str, ...]], keys: Iterable[str]) -> List[str]:
+    """合并多个键对应的值（去重，保持顺序）"""
+    result = {}
+    for key in keys:
+        for value in mapping.get(key, ()):
+            result[value] = None
+    return list(result)
+
+
+@dataclass(frozen=True)
+class FileIndex:
+    """配置文件、设置项和定位注释ID之间的双向索引
+
+    文件路径为 FlexMod.json 中的写法（相对路径，可能为空字符串），按第一次被引用的顺序排列；
+    每个文件、设置项对应的值按配置块顺序排列。定位注释ID即使用定位注释的配置块的
+    uniqueId（FlexMod__<ID>__Start/End），滑块配置通过 XPath 修改，没有定位注释。
+
+    file_settings: 文件 -> 引用该文件的设置项
+    setting_files: 设置项 -> 引用的文件
+    file_markers: 文件 -> 应包含的定位注释ID
+    marker_files: 定位注释ID -> 应包含该注释的文件
+    marker_ids: 所有使用定位注释的设置项ID
+    """
+    file_settings: Mapping[str, Tuple[str, ...]]
+    setting_files: Mapping[str, Tuple[str, ...]]
+    file_markers: Mapping[str, Tuple[str, ...]]
+    marker_files: Mapping[str, Tuple[str, ...]]
+    marker_ids: FrozenSet[str]
+
+    @classmethod
+    def build(cls, configs: Iterable[Dict[str, Any]]) -> 'FileIndex':
+        """遍历一次配置块生成索引"""
+        file_settings: Dict[str, List[str]] = {}
+        setting_files: Dict[str, List[str]] = {}
+        file_markers: Dict[str, List[str]] = {}
+        marker_files: Dict[str, List[str]] = {}
+        marker_ids = set()
+        for config in configs:
+            block_id = config.get('uniqueId')
+            if not block_id:
+                continue
+            uses_markers = config.get('configType', '') not in SLIDER_CONFIG_TYPES
+            if uses_markers:
+                marker_ids.add(block_id)
+                marker_files.setdefault(block_id, [])
+            setting_files.setdefault(block_id, [])
+            for file_path in block_file_paths(config):
+                file_settings.setdefault(file_path, []).append(block_id)
+                setting_files[block_id].append(file_path)
+                if uses_markers:
+                    file_markers.setdefault(file_path, []).append(block_id)
+                    marker_files[block_id].append(file_path)
+        return cls(_freeze(file_settings), _freeze(setting_files), _freeze(file_markers),
+                   _freeze(marker_files), frozenset(marker_ids))
+
+    def settings_for_files(self, file_paths: Iterable[str]) -> List[str]:
+        """修改这些文件会影响的设置项"""
+        return _lookup(self.file_settings, file_paths)
+
+    def files_for_settings(self, setting_ids: Iterable[str]) -> List[str]:
+        """这些设置项会写入的文件"""
+        return _lookup(self.setting_files, setting_ids)
+
+    def markers_for_files(self, file_paths: Iterable[str]) -> List[str]:
+        """这些文件应包含的定位注释ID"""
+        return _lookup(self.file_markers, file_paths)
+
+
+@dataclass(frozen=True)
+class FlexModDefinition:
+    """解析后的 FlexMod.json 快照
+
+    所有字段深度只读，见模块说明。
+
+    data: 原始 JSON 数据
+    configs / groups: JSON 中的配置块和分组，按文件顺序
+    config_index: uniqueId -> 配置块
+    settings / setting_groups: 玩家页面使用的设置项定义和组信息（PlayerSettings.parse_flexmod_data）
+    file_index: 配置文件 <-> 设置项 <-> 定位注释ID 的双向索引
+    """
+    path: str
+    mtime_ns: int
+    size: int
+    data: Mapping[str, Any]
+    configs: Tuple[Dict[str, Any], ...]
+    groups: Tuple[Dict[str, Any], ...]
+    config_index: Mapping[str, Dict[str, Any]]
+    settings: Mapping[str, Dict[str, Any]]
+    setting_groups: Mapping[str, Dict[str, Any]]
+    file_index: FileIndex
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any], path: str = '', mtime_ns: int = -1,
+                  size: int = -1) -> 'FlexModDefinition':
+        """从已解析的 JSON 数据创建快照，data 会被冻结为只读副本，调用方的对象不受影响"""
+        settings, setting_groups = PlayerSettings.parse_flexmod_data(data)
+        data = deep_freeze(data)
+        configs = tuple(data.get('configs', ()))
+        config_index = {}
+        for config in configs:
+            block_id = config.get('uniqueId')
+            if block_id:
+                config_index[block_id] = config
+
+        return cls(
+            path=path,
+            mtime_ns=mtime_ns,
+            size=size,
+            data=data,
+            configs=configs,
+            groups=tuple(data.get('groups', ())),
+            config_index=MappingProxyType(config_index),
+            settings=deep_freeze(settings),
+            setting_groups=deep_freeze(setting_groups),
+            file_index=FileIndex.build(configs),
+        )
+
+
+class FlexModDefinitionCache:
+    """进程内的 FlexMod 定义缓存"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 规范化的文件路径 -> 快照
+        self._entries: Dict[str, FlexModDefinition] = {}
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normcase(os.path.abspath(path))
+
+    def get(self, path: str) -> FlexModDefinition:
+        """获取 FlexMod.json 的快照，文件未变化时不重新读取
+
+        Raises:
+            OSError: 文件无法读取
+            ValueError: JSON 解析错误
+        """
+        key = self._key(path)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            return cached
+
+        with open(path, 'rb') as f:
+            # 使用打开的文件的状态，避免读取期间文件被替换时记录错误的状态
+            stat = os.fstat(f.fileno())
+            data = json.loads(f.read().decode('utf-8'))
+        definition = FlexModDefinition.from_data(data, path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            self._entries[key] = definition
+        return definition
+
+    def peek(self, path: str) -> Optional[FlexModDefinition]:
+        """获取已缓存的快照（不检查文件是否变化），没有时返回 None"""
+        with self._lock:
+            return self._entries.get(self._key(path))
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """清除缓存，None 表示全部"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+
+    def _on_written(self, path: str) -> None:
+        # mtime 精度不足时，同一时刻内大小不变的修改也不会使用旧的快照
+        if os.path.basename(path) == 'FlexMod.json':
+            self.invalidate(path)
+
+
+# 全局缓存，玩家页面、编辑器、应用引擎、验证器和批量应用共用
+flexmod_definitions = FlexModDefinitionCache()
+add_write_listener(flexmod_definitions._on_written)
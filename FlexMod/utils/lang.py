@@ -38,6 +38,10 @@ class Lang:
     # 主页
     flexmod_list_title = ('FlexMod List', 'FlexMod 列表')
     add_flexmod_btn = ('+ FlexMod', '+ FlexMod')
+    apply_all_btn = ('Apply All', '全部应用')
+    apply_all_progress = ('Applying {}/{}', '正在应用 {}/{}')
+    apply_all_done = ('Applied {} FlexMod(s) in {:.1f} s', '已应用 {} 个 FlexMod，耗时 {:.1f} 秒')
+    apply_all_failed = ('Failed to apply:\n{}', '以下 FlexMod 应用失败：\n{}')
     delete_btn = ('Delete', '删除')
     refresh_btn = ('Refresh', '刷新')
     add_flexmod_win_title = ('Add \'FlexMod\' in My Mod', '添加 \'FlexMod\' 到我的模组')
@@ -109,6 +113,8 @@ class Lang:
     load_success = ('Loaded successfully', '加载成功')
     copy_success = ('Copied successfully!', '复制成功！')
     copied_to_clipboard = ('Copied to clipboard', '已经复制到剪切板')
+    marker_located = ('Placed in {} (lines {}-{})', '已放置在 {}（第 {}-{} 行）')
+    marker_not_located = ('Not placed in any mod file yet', '尚未放置到任何mod文件中')
     
     # 代码编辑器
     code_editor_title = ('Code Editor', '代码编辑器')
@@ -222,6 +228,8 @@ class Lang:
     
     # 验证面板
     validate_results = ('Validation Results', '验证结果')
+    validate_progress = ('Validation Results (validating {}/{} files...)', '验证结果（正在验证 {}/{} 个文件...）')
+    validate_cancelled = ('Validation Results (cancelled, data changed)', '验证结果（数据已修改，验证已取消）')
     validate_missing_comments_title = ('Mod files have missing ID positioning comments', 'mod文件，存在未写的ID定位注释')
     validate_missing_comments_content = ('The following files are missing ID positioning comments:', '以下文件缺少ID定位注释：')
     validate_missing_comment_item = ('{} is missing {} positioning comment', '{} 缺少 {} 的定位注释')
@@ -231,6 +239,12 @@ class Lang:
     validate_nonexistent_files_title = ('FlexMod uses files that do not exist in the Config directory', 'FlexMod,使用了Config目录不存在的文件')
     validate_nonexistent_files_content = ('The following files do not exist in the Config/ directory:', '以下文件在Config/目录中不存在：')
     validate_nonexistent_file_item = ('{} (used by: id: {}  name:{})', '{} (被使用：id: {}  name:{})')
+    validate_marker_issues_title = ('Mod files have malformed ID positioning comments', 'mod文件，存在格式错误的ID定位注释')
+    validate_marker_issues_content = ('The following positioning comments are unbalanced, nested or duplicated:', '以下定位注释未配对、嵌套或重复：')
+    validate_marker_unclosed_start = ('{} line {}: start comment of {} has no end comment', '{} 第 {} 行：{} 的开始注释没有对应的结束注释')
+    validate_marker_unmatched_end = ('{} line {}: end comment of {} has no start comment', '{} 第 {} 行：{} 的结束注释没有对应的开始注释')
+    validate_marker_nested = ('{} line {}: {} is nested inside the block starting at line {}', '{} 第 {} 行：{} 嵌套在第 {} 行开始的定位块内')
+    validate_marker_duplicate = ('{} line {}: {} is duplicated (first block at line {})', '{} 第 {} 行：{} 重复（第一个定位块在第 {} 行）')
     validate_success_title = ('Validation Completed', '验证完成')
     validate_success_content = ('All validation items passed, no issues found.', '所有验证项均通过，未发现任何问题。')
     validate_error_title = ('Validation Error', '验证错误')
@@ -285,6 +299,20 @@ class Lang:
     preset_deleted = ('Preset deleted successfully', '预设删除成功')
     preset_applied = ('The current preset has been applied to final settings', '已把当前预设设置应用到最终设置')
     default_preset_loaded = ('Default values have been applied to final settings', '已把默认值应用到最终设置')
+    apply_failed = ('Failed to apply settings to:\n{}', '以下文件应用设置失败：\n{}')
+    rollback = ('Rollback', '回滚')
+    rollback_title = ('Rollback Apply', '回滚应用')
+    rollback_select = ('Restore the files to the state before:', '把文件恢复到以下应用之前的状态：')
+    rollback_empty = ('No checkpoints to roll back yet (applying a preset or the defaults creates one)',
+                      '还没有可以回滚的检查点（应用预设或恢复默认值时创建）')
+    rollback_item_apply = ('{}  Apply {} setting(s), {} file(s)', '{}  应用 {} 个设置项，{} 个文件')
+    rollback_item_rollback = ('{}  Rollback, {} file(s)', '{}  回滚，{} 个文件')
+    rollback_done = ('Restored {} file(s)', '已恢复 {} 个文件')
+    rollback_failed = ('Rollback failed: {}', '回滚失败：{}')
+    config_out_of_sync = ('Config files were modified outside FlexMod; {} setting(s) may no longer match the files',
+                          'Config 文件被其他程序修改，{} 个设置项可能与文件不一致')
+    reapply = ('Re-apply', '重新应用')
+    ignore = ('Ignore', '忽略')
     flexmod_json_not_found = ('FlexMod.json not found', '未找到FlexMod.json文件')
     error_loading_settings = ('Error loading settings', '加载设置失败')
     please_set_mods_dir = ('Please set Mods directory', '请设置Mods目录')
@@ -313,34 +341,78 @@ def get_text(key: str, lang: int = 0) -> str:
     return key
 
 
+# 进程内的语言设置，绑定 ConfigManager 后直接使用其内存中的配置，不再读取 config.json
+_config_manager = None
+# 未绑定 ConfigManager 时从 config.json 读取一次后缓存
+_cached_lang = None
+# 语言变化回调，参数为新的语言
+_lang_listeners = []
+
+
+def _config_file() -> str:
+    import os
+    return os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
+
+
+def bind_config_manager(config_manager) -> None:
+    """使用 ConfigManager 保存语言设置（程序启动时调用一次）"""
+    global _config_manager, _cached_lang
+    _config_manager = config_manager
+    _cached_lang = None
+
+
+def add_lang_listener(callback) -> None:
+    """注册语言变化回调"""
+    _lang_listeners.append(callback)
+
+
+def remove_lang_listener(callback) -> None:
+    """取消语言变化回调"""
+    if callback in _lang_listeners:
+        _lang_listeners.remove(callback)
+
+
 def get_lang() -> int:
     """获取当前语言设置"""
-    import os
-    import json
-    
-    config_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                return config.get('lang', 0)
-        except:
-            pass
-    return 0
+    global _cached_lang
+    if _config_manager is not None:
+        return _config_manager.get_lang()
+    if _cached_lang is None:
+        import os
+        import json
+        
+        _cached_lang = 0
+        config_file = _config_file()
+        if os.path.exists(config_file):
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    _cached_lang = json.load(f).get('lang', 0)
+            except:
+                pass
+    return _cached_lang
 
 
 def set_lang(lang: int) -> None:
-    """设置语言"""
-    import os
-    import json
-    
-    config_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-    if os.path.exists(config_file):
-        try:
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            config['lang'] = lang
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
-        except:
-            pass
+    """设置语言并通知所有回调"""
+    global _cached_lang
+    if lang == get_lang():
+        return
+    if _config_manager is not None:
+        _config_manager.set_lang(lang)
+    else:
+        import os
+        import json
+        from .atomic_write import atomic_write_json
+        
+        _cached_lang = lang
+        config_file = _config_file()
+        if os.path.exists(config_file):
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                config['lang'] = lang
+                atomic_write_json(config_file, config, indent=4)
+            except:
+                pass
+    for callback in list(_lang_listeners):
+        callback(lang)
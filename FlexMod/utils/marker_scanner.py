@@ -0,0 +1,286 @@
+"""定位注释扫描模块
+
+所有 FlexMod 定位注释都以固定的 "<!-- FlexMod__" 开头，用一个编译好的正则即可在
+一次线性扫描中找出文件中所有ID的开始和结束注释，ID的归属再通过字典查找判断，
+不需要为每个ID单独搜索。扫描结果记录行号，并检查未配对、嵌套和重复的定位注释。
+验证、应用和编辑器的定位注释查找都使用本模块。
+
+大文件通过 mmap 只读映射后直接在字节上扫描，不解码为 str；替换定位块时未修改的
+区域从映射中分块复制到原子写入的临时文件，内存峰值只与替换内容的大小有关。
+"""
+import bisect
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .atomic_write import AtomicBatch, atomic_writer
+
+
+# 开始和结束定位注释
+MARKER_RE = re.compile(r'<!-- FlexMod__(.+?)__(Start|End) -->')
+MARKER_BYTES_RE = re.compile(rb'<!-- FlexMod__(.+?)__(Start|End) -->')
+
+# 分块复制和统计换行时每次处理的字节数
+CHUNK_SIZE = 1024 * 1024
+
+# 可以扫描的内容：str、bytes 或 mmap
+Content = Union[str, bytes, mmap.mmap]
+
+# 定位注释问题类型
+ISSUE_UNCLOSED_START = 'unclosed_start'  # 开始注释没有对应的结束注释
+ISSUE_UNMATCHED_END = 'unmatched_end'  # 结束注释没有对应的开始注释
+ISSUE_NESTED = 'nested'  # 开始注释位于另一个定位块内部
+ISSUE_DUPLICATE = 'duplicate'  # 同一ID在文件中有多个定位块
+
+
+@dataclass(frozen=True)
+class Marker:
+    """单个定位注释"""
+    block_id: str
+    kind: str  # 'Start' 或 'End'
+    line: int  # 从 1 开始的行号，未计算时为 0
+    start: int  # 注释在内容中的开始位置（str 为字符偏移，bytes/mmap 为字节偏移）
+    end: int  # 注释在内容中的结束位置
+
+
+@dataclass(frozen=True)
+class MarkerPair:
+    """配对的开始和结束注释"""
+    block_id: str
+    start: Marker
+    end: Marker
+
+
+@dataclass(frozen=True)
+class MarkerIssue:
+    """定位注释问题"""
+    kind: str
+    block_id: str
+    line: int
+    other_line: int = 0  # 相关位置：外层定位块或第一个定位块的开始行
+
+
+@dataclass
+class MarkerScan:
+    """一个文件的扫描结果"""
+    markers: List[Marker] = field(default_factory=list)
+    pairs: List[MarkerPair] = field(default_factory=list)
+    issues: List[MarkerIssue] = field(default_factory=list)
+
+    @property
+    def start_ids(self) -> List[str]:
+        """按出现顺序的开始注释ID，可能重复"""
+        return [marker.block_id for marker in self.markers if marker.kind == 'Start']
+
+    @property
+    def end_ids(self) -> List[str]:
+        """按出现顺序的结束注释ID，可能重复"""
+        return [marker.block_id for marker in self.markers if marker.kind == 'End']
+
+    def pairs_for(self, block_id: str) -> List[MarkerPair]:
+        """获取ID的所有定位块"""
+        return [pair for pair in self.pairs if pair.block_id == block_id]
+
+
+@contextmanager
+def map_file(file_path: str):
+    """只读映射文件，空文件（无法映射）返回 b''"""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _count_newlines(content: Content, start: int, end: int) -> int:
+    """统计 [start, end) 内的换行数，mmap 分块统计以限制临时内存"""
+    if not isinstance(content, mmap.mmap):
+        return content.count('\n' if isinstance(content, str) else b'\n', start, end)
+    count = 0
+    for chunk_start in range(start, end, CHUNK_SIZE):
+        count += content[chunk_start:min(chunk_start + CHUNK_SIZE, end)].count(b'\n')
+    return count
+
+
+def iter_markers(content: Content, with_lines: bool = True) -> Iterator[Marker]:
+    """按出现顺序生成内容中的所有定位注释
+
+    Args:
+        content: 文件内容，str、bytes 或 mmap
+        with_lines: 是否计算行号，不需要时可以省去换行计数
+    """
+    is_text = isinstance(content, str)
+    pattern = MARKER_RE if is_text else MARKER_BYTES_RE
+    line = 1
+    pos = 0
+    for match in pattern.finditer(content):
+        if with_lines:
+            line += _count_newlines(content, pos, match.start())
+            pos = match.start()
+        block_id = match.group(1) if is_text else match.group(1).decode('utf-8', errors='ignore')
+        kind = match.group(2) if is_text else match.group(2).decode('ascii')
+        yield Marker(block_id, kind, line if with_lines else 0, match.start(), match.end())
+
+
+def scan_markers(content: Content) -> MarkerScan:
+    """扫描文本中的定位注释，配对并检查问题
+
+    结束注释与最近一个尚未关闭的同ID开始注释配对；开始注释位于其他已配对的
+    定位块内时记为嵌套；同一ID出现多个定位块时，从第二个起记为重复。
+    """
+    scan = MarkerScan(markers=list(iter_markers(content)))
+    open_markers: List[Marker] = []
+    first_pair: Dict[str, MarkerPair] = {}
+
+    for marker in scan.markers:
+        if marker.kind == 'Start':
+            open_markers.append(marker)
+            continue
+
+        for i in range(len(open_markers) - 1, -1, -1):
+            if open_markers[i].block_id == marker.block_id:
+                pair = MarkerPair(marker.block_id, open_markers.pop(i), marker)
+                scan.pairs.append(pair)
+                if marker.block_id in first_pair:
+                    scan.issues.append(MarkerIssue(ISSUE_DUPLICATE, marker.block_id, pair.start.line,
+                                                   first_pair[marker.block_id].start.line))
+                else:
+                    first_pair[marker.block_id] = pair
+                break
+        else:
+            scan.issues.append(MarkerIssue(ISSUE_UNMATCHED_END, marker.block_id, marker.line))
+
+    for marker in open_markers:
+        scan.issues.append(MarkerIssue(ISSUE_UNCLOSED_START, marker.block_id, marker.line))
+
+    # 只有已配对的定位块才算外层块，避免一个未关闭的开始注释让之后所有注释都被报告为嵌套
+    pair_ends = {pair.start.start: pair.end.end for pair in scan.pairs}
+    enclosing: List[Marker] = []
+    for marker in scan.markers:
+        if marker.kind != 'Start':
+            continue
+        enclosing = [outer for outer in enclosing if pair_ends[outer.start] > marker.start]
+        if enclosing:
+            scan.issues.append(MarkerIssue(ISSUE_NESTED, marker.block_id, marker.line, enclosing[-1].line))
+        if marker.start in pair_ends:
+            enclosing.append(marker)
+
+    scan.issues.sort(key=lambda issue: issue.line)
+    return scan
+
+
+def scan_file(file_path: str) -> MarkerScan:
+    """通过只读映射扫描文件中的定位注释，不把整个文件读入内存"""
+    with map_file(file_path) as mapped:
+        return scan_markers(mapped)
+
+
+def iter_block_spans(content: Content, block_ids) -> Iterator[Tuple[str, int, int]]:
+    """生成要替换的定位块范围
+
+    每个开始注释与其后第一个同ID的结束注释配对，块内的其他定位注释属于该块；
+    没有结束注释的开始注释被忽略。
+
+    Yields:
+        tuple: (功能块ID, 开始注释的开始位置, 结束注释的结束位置)
+    """
+    markers = [marker for marker in iter_markers(content, with_lines=False)
+               if marker.block_id in block_ids]
+    # 每个ID的结束注释在 markers 中的下标
+    end_indexes: Dict[str, List[int]] = {}
+    for i, marker in enumerate(markers):
+        if marker.kind == 'End':
+            end_indexes.setdefault(marker.block_id, []).append(i)
+
+    i = 0
+    while i < len(markers):
+        marker = markers[i]
+        ends = end_indexes.get(marker.block_id, [])
+        j = bisect.bisect_right(ends, i)
+        if marker.kind == 'Start' and j < len(ends):
+            yield marker.block_id, marker.start, markers[ends[j]].end
+            i = ends[j] + 1
+        else:
+            i += 1
+
+
+def block_text(block_id: str, code: str) -> str:
+    """生成替换后的完整定位块"""
+    return f"<!-- FlexMod__{block_id}__Start -->\n{code}\n<!-- FlexMod__{block_id}__End -->"
+
+
+def replace_blocks(content: str, replacements: Dict[str, str]) -> str:
+    """替换多个定位块之间的内容
+
+    Args:
+        content: 文件内容
+        replacements: 功能块ID到新代码的映射
+
+    Returns:
+        str: 替换后的内容
+    """
+    if not replacements:
+        return content
+
+    chunks = []
+    pos = 0
+    for block_id, start, end in iter_block_spans(content, replacements):
+        chunks.append(content[pos:start])
+        chunks.append(block_text(block_id, replacements[block_id]))
+        pos = end
+    chunks.append(content[pos:])
+    return ''.join(chunks)
+
+
+def _copy_range(mapped: Content, out, start: int, end: int) -> None:
+    """把映射中的 [start, end) 分块写入输出文件"""
+    for chunk_start in range(start, end, CHUNK_SIZE):
+        out.write(mapped[chunk_start:min(chunk_start + CHUNK_SIZE, end)])
+
+
+def splice_file(file_path: str, replacements: Dict[str, str], batch: Optional[AtomicBatch] = None) -> bool:
+    """流式替换文件中的定位块
+
+    先在只读映射上定位要替换的块，只有内容真正变化时才写出：未修改的区域从映射中
+    分块复制，替换后的块按文件原有的换行符编码写入。
+
+    Args:
+        file_path: 文件路径
+        replacements: 功能块ID到新代码的映射
+        batch: 批量写入，None 表示立即原子替换文件
+
+    Returns:
+        bool: 文件是否被修改
+    """
+    if not replacements:
+        return False
+
+    # 批量写入中已经修改过的文件，从暂存的最新内容继续修改
+    source = batch.source_path(file_path) if batch is not None else file_path
+    with map_file(source) as mapped:
+        # 保持文件原有的换行符
+        newline = '\r\n' if mapped.find(b'\r\n', 0, CHUNK_SIZE) != -1 else '\n'
+        edits = []
+        for block_id, start, end in iter_block_spans(mapped, replacements):
+            text = block_text(block_id, replacements[block_id])
+            new_bytes = text.replace('\r\n', '\n').replace('\n', newline).encode('utf-8')
+            if mapped[start:end] != new_bytes:
+                edits.append((start, end, new_bytes))
+    if not edits:
+        return False
+
+    # 映射在写入结束前关闭，替换文件时源文件不再被映射（Windows 不允许替换已映射的文件）
+    writer = batch.writer(file_path) if batch is not None else atomic_writer(file_path)
+    with writer as out:
+        with map_file(source) as mapped:
+            pos = 0
+            for start, end, new_bytes in edits:
+                _copy_range(mapped, out, pos, start)
+                out.write(new_bytes)
+                pos = end
+            _copy_range(mapped, out, pos, len(mapped))
+    return True
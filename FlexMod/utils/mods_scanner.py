@@ -0,0 +1,156 @@
+"""Mods 目录扫描模块
+
+用 os.scandir 列出 Mods 目录下的 mod 文件夹（目录项自带类型，不需要为每个
+文件夹单独 isdir），并按目录的 mtime 缓存结果：
+
+- Mods 目录的 mtime 未变化时 folders() 不重新列目录，mod 文件夹没有增删；
+- 每个 mod 文件夹记录自身和其 FlexMod 子目录的 mtime，两者都未变化时
+  FlexMod/FlexMod.json 是否存在的结果直接复用（该文件的创建和删除会改变
+  FlexMod 目录的 mtime，FlexMod 目录的创建和删除会改变 mod 文件夹的 mtime）。
+
+flexmods() 的结果同样按 Mods 目录的 mtime 缓存：mtime 未变化时只 stat 一次 Mods
+目录就直接返回。需要重新扫描时，mod 文件夹 mtime 直接取自 scandir 的目录项（Windows
+上不需要额外的系统调用），只有包含 FlexMod 子目录的文件夹才需要再 stat 一次。
+
+在已有的 mod 文件夹中创建或删除 FlexMod/FlexMod.json 不会改变 Mods 目录的 mtime，
+知道发生了这种变化的调用方（创建 FlexMod、文件监视、刷新按钮）需要调用 invalidate()。
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class _FolderEntry:
+    """单个 mod 文件夹的缓存"""
+    folder_mtime: int
+    flexmod_mtime: int  # FlexMod 子目录不存在时为 -1
+    has_flexmod: bool
+
+
+def _mtime_ns(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+
+class ModsScanner:
+    """带缓存的 Mods 目录扫描器"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # 规范化的 Mods 目录 -> (目录 mtime, 按目录顺序的文件夹名称)
+        self._folders: Dict[str, Tuple[int, List[str]]] = {}
+        # 规范化的 Mods 目录 -> (目录 mtime, 按目录顺序的 FlexMod 名称)
+        self._flexmods: Dict[str, Tuple[int, List[str]]] = {}
+        # mod 文件夹完整路径 -> 缓存
+        self._entries: Dict[str, _FolderEntry] = {}
+
+    @staticmethod
+    def _key(mods_dir: str) -> str:
+        return os.path.normcase(os.path.abspath(mods_dir))
+
+    def folders(self, mods_dir: str) -> List[str]:
+        """Mods 目录下所有文件夹的名称，目录不存在时返回空列表"""
+        if not mods_dir:
+            return []
+        key = self._key(mods_dir)
+        mtime = _mtime_ns(mods_dir)
+        if mtime < 0:
+            return []
+        with self._lock:
+            cached = self._folders.get(key)
+        if cached and cached[0] == mtime:
+            return list(cached[1])
+
+        try:
+            with os.scandir(mods_dir) as it:
+                names = [entry.name for entry in it if entry.is_dir()]
+        except OSError:
+            return []
+        with self._lock:
+            self._folders[key] = (mtime, names)
+        self._forget_missing(mods_dir, names)
+        return list(names)
+
+    def has_flexmod(self, folder_path: str, folder_mtime: Optional[int] = None) -> bool:
+        """mod 文件夹中是否有 FlexMod/FlexMod.json
+
+        Args:
+            folder_path: mod 文件夹路径
+            folder_mtime: 已知的文件夹 mtime（来自 scandir），None 时重新获取
+        """
+        if folder_mtime is None:
+            folder_mtime = _mtime_ns(folder_path)
+        flexmod_dir = os.path.join(folder_path, 'FlexMod')
+        with self._lock:
+            entry = self._entries.get(folder_path)
+        # 文件夹未变化且之前没有 FlexMod 子目录时，子目录仍然不存在
+        if entry and entry.folder_mtime == folder_mtime and entry.flexmod_mtime < 0:
+            return False
+        flexmod_mtime = _mtime_ns(flexmod_dir)
+        if entry and entry.folder_mtime == folder_mtime and entry.flexmod_mtime == flexmod_mtime:
+            return entry.has_flexmod
+
+        has_flexmod = flexmod_mtime >= 0 and os.path.isfile(os.path.join(flexmod_dir, 'FlexMod.json'))
+        with self._lock:
+            self._entries[folder_path] = _FolderEntry(folder_mtime, flexmod_mtime, has_flexmod)
+        return has_flexmod
+
+    def flexmods(self, mods_dir: str) -> List[str]:
+        """Mods 目录下所有包含 FlexMod/FlexMod.json 的 mod 文件夹名称，按目录顺序"""
+        if not mods_dir:
+            return []
+        key = self._key(mods_dir)
+        mtime = _mtime_ns(mods_dir)
+        if mtime < 0:
+            return []
+        with self._lock:
+            cached_flexmods = self._flexmods.get(key)
+        if cached_flexmods and cached_flexmods[0] == mtime:
+            return list(cached_flexmods[1])
+
+        try:
+            with os.scandir(mods_dir) as it:
+                entries = [(entry.name, entry.stat().st_mtime_ns) for entry in it if entry.is_dir()]
+        except OSError:
+            return []
+        names = [name for name, _ in entries]
+        with self._lock:
+            cached = self._folders.get(key)
+            self._folders[key] = (mtime, names)
+        if cached is None or cached[1] != names:
+            self._forget_missing(mods_dir, names)
+        flexmods = [name for name, folder_mtime in entries
+                    if self.has_flexmod(os.path.join(mods_dir, name), folder_mtime)]
+        with self._lock:
+            self._flexmods[key] = (mtime, flexmods)
+        return list(flexmods)
+
+    def _forget_missing(self, mods_dir: str, names: List[str]) -> None:
+        """删除已不存在的文件夹的缓存"""
+        prefix = os.path.join(mods_dir, '')
+        existing = {os.path.join(mods_dir, name) for name in names}
+        with self._lock:
+            for path in [path for path in self._entries if path.startswith(prefix) and path not in existing]:
+                del self._entries[path]
+
+    def invalidate(self, mods_dir: Optional[str] = None) -> None:
+        """清除缓存，None 表示全部"""
+        with self._lock:
+            if mods_dir is None:
+                self._folders.clear()
+                self._flexmods.clear()
+                self._entries.clear()
+                return
+            self._folders.pop(self._key(mods_dir), None)
+            self._flexmods.pop(self._key(mods_dir), None)
+            prefix = os.path.join(mods_dir, '')
+            for path in [path for path in self._entries if path.startswith(prefix)]:
+                del self._entries[path]
+
+
+# 全局扫描器，主页、配置管理器和批量应用共用
+mods_scanner = ModsScanner()
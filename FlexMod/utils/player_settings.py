@@ -0,0 +1,164 @@
+"""玩家设置模块
+
+解析 FlexMod.json 中的设置项定义，读取、创建和同步 player_settings.json。
+不依赖 PyQt6，玩家页面和命令行应用共用。
+"""
+import json
+import os
+from typing import Any, Dict, Tuple
+
+from .atomic_write import atomic_write_json
+
+
+# FlexMod.json 配置类型到玩家页面控件类型的映射
+SETTING_TYPE_MAP = {
+    'boolConfig': 'boolean',
+    'stringConfig': 'text',
+    'numberConfig': 'integer',
+    'selectConfig': 'dropdown',
+    'intSlider': 'integer_slider',
+    'floatSlider': 'float_slider'
+}
+
+
+class PlayerSettings:
+    """玩家设置工具类"""
+
+    @staticmethod
+    def settings_path(mod_files_dir: str) -> str:
+        """mod 的 player_settings.json 路径"""
+        return os.path.join(mod_files_dir, 'FlexMod', 'player_settings.json')
+
+    @staticmethod
+    def flexmod_json_path(mod_files_dir: str) -> str:
+        """mod 的 FlexMod.json 路径"""
+        return os.path.join(mod_files_dir, 'FlexMod', 'FlexMod.json')
+
+    @staticmethod
+    def map_config_type(config_type: str) -> str:
+        """映射配置类型"""
+        return SETTING_TYPE_MAP.get(config_type, 'text')
+
+    @staticmethod
+    def parse_flexmod_data(flexmod_data: Dict[str, Any]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """解析 FlexMod.json 数据（只支持新格式）
+
+        Returns:
+            tuple: (设置项ID -> 设置项定义, 组名 -> 组信息)
+        """
+        settings = {}
+        groups = {}
+        if 'configs' not in flexmod_data:
+            return settings, groups
+
+        for group in flexmod_data.get('groups', []):
+            group_name = group.get('groupName', 'default')
+            groups[group_name] = {
+                'displayName': group.get('groupName', group_name),
+                'groupDesc': group.get('groupDesc', '')
+            }
+
+        for config in flexmod_data.get('configs', []):
+            setting_name = config.get('uniqueId', '')
+            if not setting_name:
+                continue
+            setting_type = PlayerSettings.map_config_type(config.get('configType', 'text'))
+            setting_data = {
+                'type': setting_type,
+                'default': config.get('defaultValue', False),
+                'showName': config.get('displayName', setting_name),
+                'desc': config.get('desc', ''),
+                'group': config.get('groupName', 'default')
+            }
+
+            if setting_type == 'dropdown':
+                setting_data['options'] = [item.get('optionKey', '') for item in config.get('optionItems', [])
+                                           if item.get('optionKey', '')]
+            elif setting_type == 'integer_slider' or setting_type == 'float_slider':
+                # 保持原始类型，不强制转换为整数
+                setting_data['min'] = config.get('minValue', 0)
+                setting_data['max'] = config.get('maxValue', 100)
+                setting_data['step'] = config.get('stepValue', 1)
+
+            settings[setting_name] = setting_data
+        return settings, groups
+
+    @staticmethod
+    def create_default(settings: Dict[str, Dict]) -> Dict[str, Any]:
+        """创建默认玩家设置"""
+        default_settings = {}
+        for setting_name, setting_data in settings.items():
+            default_settings[setting_name] = setting_data.get('default', False)
+
+        return {
+            'finalSettings': default_settings.copy(),
+            'defaultValues': default_settings.copy(),
+            'presets': {}
+        }
+
+    @staticmethod
+    def load(player_settings_path: str) -> Dict[str, Any]:
+        """读取玩家设置文件
+
+        Raises:
+            OSError: 读取失败
+            ValueError: JSON 解析失败
+        """
+        with open(player_settings_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    @staticmethod
+    def save(player_settings_path: str, player_settings: Dict[str, Any]) -> None:
+        """原子写入玩家设置文件，FlexMod 目录不存在时创建"""
+        os.makedirs(os.path.dirname(player_settings_path), exist_ok=True)
+        atomic_write_json(player_settings_path, player_settings)
+
+    @staticmethod
+    def sync(player_settings: Dict[str, Any], settings: Dict[str, Dict]) -> Dict[str, Any]:
+        """使玩家设置与 FlexMod 的设置项定义一致
+
+        添加缺失的设置项，删除已不存在的设置项；默认值变化时更新默认值，
+        最终值仍等于默认值的设置项一起更新。
+        """
+        # 1. 获取所有有效的设置名称
+        valid_setting_names = set(settings.keys())
+
+        # 2. 获取当前player_settings中的设置名称
+        current_final_settings = player_settings.get('finalSettings', {})
+        current_default_values = player_settings.get('defaultValues', {})
+        current_setting_names = set(current_final_settings.keys())
+
+        # 3. 找出需要添加的设置（FlexMod有但player_settings没有）
+        settings_to_add = valid_setting_names - current_setting_names
+
+        # 4. 找出需要删除的设置（FlexMod没有但player_settings有）
+        settings_to_remove = current_setting_names - valid_setting_names
+
+        # 5. 添加缺失的设置
+        for setting_name in settings_to_add:
+            default_value = settings[setting_name].get('default', False)
+            current_final_settings[setting_name] = default_value
+            current_default_values[setting_name] = default_value
+
+        # 6. 删除多余的设置
+        for setting_name in settings_to_remove:
+            if setting_name in current_final_settings:
+                del current_final_settings[setting_name]
+            if setting_name in current_default_values:
+                del current_default_values[setting_name]
+
+        # 7. 检查并更新现有设置的默认值
+        for setting_name in current_setting_names:
+            if setting_name in valid_setting_names:
+                new_default_value = settings[setting_name].get('default', False)
+                # 如果默认值发生变化，更新 player_settings
+                if current_default_values.get(setting_name) != new_default_value:
+                    current_default_values[setting_name] = new_default_value
+                    # 如果当前最终值等于旧默认值，也更新最终值
+                    if current_final_settings.get(setting_name) == player_settings.get('defaultValues', {}).get(setting_name):
+                        current_final_settings[setting_name] = new_default_value
+
+        # 8. 更新player_settings
+        player_settings['finalSettings'] = current_final_settings
+        player_settings['defaultValues'] = current_default_values
+        return player_settings
@@ -0,0 +1,287 @@
+"""应用快照模块
+
+检查点（应用预设、恢复默认值、批量应用）在提交前记录一个快照：只保存本次真正被
+修改的文件在修改前后的内容。拖动滑块等普通修改不记录快照。
+文件内容按 SHA-256 存为压缩的对象（内容寻址），相同内容只保存一份，多次应用
+之间未变化的文件不占用额外空间。
+
+回滚到某个快照时恢复该快照及其后所有快照记录的修改前内容（包括 player_settings.json），
+再按恢复后的玩家设置重新应用全部设置项：检查点之后普通修改改动过的 Config 文件
+虽然没有快照，也会与恢复后的设置一致。恢复和重新应用一起原子提交，回滚本身也作为
+一次应用记录快照，可以再次撤销。
+
+快照保存在 mod 的 FlexMod/.snapshots 目录：
+    snapshots.json      快照列表（从旧到新）
+    objects/ab/abcd...  zlib 压缩的文件内容
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+from .atomic_write import AtomicBatch, atomic_write_bytes, atomic_write_json, recover
+from .player_settings import PlayerSettings
+from .xpath_handler import xml_tree_cache
+
+
+SNAPSHOT_DIR_NAME = '.snapshots'
+
+# 快照类型
+KIND_APPLY = 'apply'
+KIND_ROLLBACK = 'rollback'
+
+
+@dataclass
+class FileChange:
+    """快照中单个文件的修改，内容为对象哈希，文件原本不存在时 before 为空"""
+    before: str
+    after: str
+
+
+@dataclass
+class Snapshot:
+    """一次应用的快照"""
+    snapshot_id: str
+    created: float
+    kind: str = KIND_APPLY
+    setting_ids: List[str] = field(default_factory=list)
+    files: Dict[str, FileChange] = field(default_factory=dict)  # mod目录下的相对路径（'/' 分隔） -> 修改
+
+    def to_json(self) -> Dict:
+        return {
+            'id': self.snapshot_id,
+            'created': self.created,
+            'kind': self.kind,
+            'settings': self.setting_ids,
+            'files': {path: [change.before, change.after] for path, change in self.files.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict) -> 'Snapshot':
+        return cls(data['id'], data.get('created', 0.0), data.get('kind', KIND_APPLY),
+                   list(data.get('settings', [])),
+                   {path: FileChange(before, after) for path, (before, after) in data.get('files', {}).items()})
+
+
+class SnapshotStore:
+    """mod 的快照存储
+
+    保留最近 MAX_SNAPSHOTS 个快照，且所有快照引用的对象压缩后总大小不超过
+    MAX_BYTES（至少保留最新的一个快照），超出时删除最旧的快照和不再被引用的对象。
+    """
+
+    MANIFEST_NAME = 'snapshots.json'
+    VERSION = 1
+    MAX_SNAPSHOTS = 20
+    MAX_BYTES = 64 * 1024 * 1024
+
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_lock = threading.Lock()
+
+    def __init__(self, mod_files_dir: str):
+        self.mod_files_dir = mod_files_dir
+        self.snapshot_dir = os.path.join(mod_files_dir, 'FlexMod', SNAPSHOT_DIR_NAME)
+        self.objects_dir = os.path.join(self.snapshot_dir, 'objects')
+        self.manifest_path = os.path.join(self.snapshot_dir, self.MANIFEST_NAME)
+        # 同一 mod 的快照在应用线程和界面线程之间共享，修改清单时加锁
+        key = os.path.normcase(os.path.abspath(mod_files_dir))
+        with self._locks_lock:
+            self._lock = self._locks.setdefault(key, threading.Lock())
+
+    @classmethod
+    def for_mod(cls, mod_files_dir: str) -> 'SnapshotStore':
+        return cls(mod_files_dir)
+
+    def _load(self) -> Dict:
+        """读取清单，不存在或损坏时返回空清单"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.VERSION:
+                return data
+        except (OSError, ValueError):
+            pass
+        return {'version': self.VERSION, 'snapshots': [], 'objects': {}}
+
+    def _save(self, data: Dict) -> None:
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        atomic_write_json(self.manifest_path, data, indent=None)
+
+    def list_snapshots(self) -> List[Snapshot]:
+        """所有快照，从新到旧"""
+        with self._lock:
+            data = self._load()
+        return [Snapshot.from_json(item) for item in reversed(data['snapshots'])]
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(path, self.mod_files_dir).replace(os.sep, '/')
+
+    def _abspath(self, relpath: str) -> str:
+        return os.path.join(self.mod_files_dir, *relpath.split('/'))
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _put(self, content: bytes, objects: Dict[str, int]) -> str:
+        """保存内容对象，已存在时只返回哈希"""
+        digest = hashlib.sha256(content).hexdigest()
+        if digest not in objects or not os.path.exists(self._object_path(digest)):
+            path = self._object_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(content)
+            atomic_write_bytes(path, compressed)
+            objects[digest] = len(compressed)
+        return digest
+
+    def _get(self, digest: str) -> bytes:
+        with open(self._object_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    @staticmethod
+    def _read(path: str) -> Optional[bytes]:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def record(self, batch: AtomicBatch, setting_ids: Iterable[str] = (),
+               kind: str = KIND_APPLY) -> Optional[Snapshot]:
+        """在批量写入提交前记录快照
+
+        比较暂存内容和磁盘上的当前内容，只记录真正变化的文件。批量写入放弃或
+        提交失败时自动删除该快照。
+
+        Returns:
+            Snapshot: 记录的快照，没有文件变化时返回 None
+        """
+        with self._lock:
+            data = self._load()
+            objects = data.setdefault('objects', {})
+            files = {}
+            for path in batch.paths:
+                before = self._read(path)
+                after = self._read(batch.source_path(path))
+                if before == after:
+                    continue
+                files[self._relpath(path)] = FileChange(
+                    self._put(before, objects) if before is not None else '',
+                    self._put(after, objects))
+            if not files:
+                return None
+
+            snapshot = Snapshot(f"{time.strftime('%Y%m%d%H%M%S')}-{os.urandom(3).hex()}", time.time(),
+                                kind, sorted(setting_ids), files)
+            data['snapshots'].append(snapshot.to_json())
+            self._prune(data)
+            self._save(data)
+
+        batch.after_rollback(lambda: self.discard(snapshot.snapshot_id))
+        return snapshot
+
+    def discard(self, snapshot_id: str) -> None:
+        """删除快照（对应的写入没有提交）"""
+        with self._lock:
+            data = self._load()
+            data['snapshots'] = [item for item in data['snapshots'] if item['id'] != snapshot_id]
+            self._collect_garbage(data)
+            self._save(data)
+
+    def _prune(self, data: Dict) -> None:
+        """按数量和总大小删除最旧的快照"""
+        snapshots = data['snapshots']
+        del snapshots[:max(0, len(snapshots) - self.MAX_SNAPSHOTS)]
+        objects = data['objects']
+        while len(snapshots) > 1:
+            referenced = self._referenced(snapshots)
+            if sum(objects.get(digest, 0) for digest in referenced) <= self.MAX_BYTES:
+                break
+            snapshots.pop(0)
+        self._collect_garbage(data)
+
+    @staticmethod
+    def _referenced(snapshots: List[Dict]) -> set:
+        return {digest for item in snapshots for change in item['files'].values() for digest in change if digest}
+
+    def _collect_garbage(self, data: Dict) -> None:
+        """删除不再被任何快照引用的对象"""
+        referenced = self._referenced(data['snapshots'])
+        objects = data['objects']
+        for digest in [digest for digest in objects if digest not in referenced]:
+            del objects[digest]
+            path = self._object_path(digest)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def restore(self, snapshot_id: str) -> List[str]:
+        """回滚到快照对应的应用之前的状态
+
+        撤销该快照及之后所有快照的修改：每个涉及的文件恢复为最早一个快照中记录的
+        修改前内容，然后按恢复后的玩家设置重新应用全部设置项（见 _reapply()），
+        所有文件一起原子提交。应用前不存在的文件不会被删除。
+
+        Returns:
+            List[str]: 恢复或重新应用的文件路径
+
+        Raises:
+            KeyError: 快照不存在
+            OSError: 重新应用时有文件处理失败（所有文件保持不变）
+        """
+        snapshots = list(reversed(self.list_snapshots()))
+        index = next((i for i, snapshot in enumerate(snapshots) if snapshot.snapshot_id == snapshot_id), None)
+        if index is None:
+            raise KeyError(snapshot_id)
+
+        # 从新到旧覆盖，最终保留最早的修改前内容
+        targets: Dict[str, str] = {}
+        for snapshot in reversed(snapshots[index:]):
+            for relpath, change in snapshot.files.items():
+                targets[relpath] = change.before
+
+        paths = [self._abspath(relpath) for relpath, digest in targets.items() if digest]
+        recover(self.mod_files_dir)
+        batch = AtomicBatch(self.mod_files_dir)
+        try:
+            for path in paths:
+                batch.write_bytes(path, self._get(targets[self._relpath(path)]))
+            failed_files = self._reapply(batch)
+            if failed_files:
+                raise OSError(f"重新应用设置失败: {', '.join(failed_files)}")
+            written = batch.paths
+            self.record(batch, kind=KIND_ROLLBACK)
+        except BaseException:
+            batch.rollback()
+            raise
+        for path in written:
+            batch.after_commit(lambda path=path: xml_tree_cache.invalidate(path))
+        batch.commit()
+        return written
+
+    def _reapply(self, batch: AtomicBatch) -> List[str]:
+        """按批量写入中（恢复后）的玩家设置重新暂存全部设置项
+
+        普通应用不记录快照，检查点之后它们修改的 Config 文件不在恢复的文件中，
+        重新应用使这些文件与恢复后的 player_settings.json 一致。
+
+        Returns:
+            List[str]: 处理失败的文件路径
+        """
+        # apply_engine 依赖本模块，在这里导入避免循环导入
+        from .apply_engine import ApplyEngine
+
+        flexmod_json_path = PlayerSettings.flexmod_json_path(self.mod_files_dir)
+        settings_source = batch.source_path(PlayerSettings.settings_path(self.mod_files_dir))
+        if not os.path.exists(flexmod_json_path) or not os.path.exists(settings_source):
+            return []
+        player_settings = PlayerSettings.load(settings_source)
+        engine = ApplyEngine.from_json_file(flexmod_json_path, self.mod_files_dir)
+        return engine.stage(engine.build_work_list(player_settings.get('finalSettings', {})), batch)
+
+    def clear(self) -> None:
+        """删除所有快照"""
+        with self._lock:
+            shutil.rmtree(self.snapshot_dir, ignore_errors=True)
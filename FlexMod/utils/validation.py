@@ -0,0 +1,325 @@
+"""FlexMod 验证模块
+
+一次解析 FlexMod.json，每个相关的 XML 文件只读取一次、只扫描一次定位注释，
+由同一份索引同时生成缺少注释、多余注释和不存在文件三份报告。
+每个文件的定位注释保存在 mod 的持久化验证索引中，文件未变化时不再读取。
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .atomic_write import atomic_write_json
+from .flexmod_definition import FlexModDefinition, block_file_paths, flexmod_definitions
+from .marker_scanner import MarkerIssue, MarkerPair, map_file, scan_file, scan_markers
+
+
+@dataclass
+class FileMarkers:
+    """单个文件中的定位注释"""
+    start_ids: List[str] = field(default_factory=list)  # 按出现顺序，可能重复
+    end_ids: List[str] = field(default_factory=list)
+    issues: List[MarkerIssue] = field(default_factory=list)  # 未配对、嵌套和重复的定位注释
+
+    def has_block(self, block_id: str) -> bool:
+        """是否同时包含该ID的开始和结束注释"""
+        return block_id in self.start_ids and block_id in self.end_ids
+
+
+@dataclass
+class ValidationReport:
+    """验证结果
+
+    missing_comments: 文件路径 -> 缺少定位注释的ID列表
+    extra_comments: 文件相对路径 -> 多余的定位注释ID列表
+    nonexistent_files: 文件路径 -> 使用该文件的 (ID, displayName) 列表
+    marker_issues: 文件相对路径 -> 未配对、嵌套或重复的定位注释
+    """
+    missing_comments: Dict[str, List[str]] = field(default_factory=dict)
+    extra_comments: Dict[str, List[str]] = field(default_factory=dict)
+    nonexistent_files: Dict[str, List[Tuple[str, str]]] = field(default_factory=dict)
+    marker_issues: Dict[str, List[MarkerIssue]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        """是否没有发现问题"""
+        return not (self.missing_comments or self.extra_comments or self.nonexistent_files
+                    or self.marker_issues)
+
+    def merge(self, other: 'ValidationReport') -> None:
+        """合并另一份（部分）报告"""
+        for mine, theirs in ((self.missing_comments, other.missing_comments),
+                             (self.extra_comments, other.extra_comments),
+                             (self.nonexistent_files, other.nonexistent_files),
+                             (self.marker_issues, other.marker_issues)):
+            for key, items in theirs.items():
+                mine.setdefault(key, []).extend(items)
+
+
+def file_markers(scan) -> FileMarkers:
+    """从扫描结果中提取验证需要的定位注释信息"""
+    return FileMarkers(scan.start_ids, scan.end_ids, scan.issues)
+
+
+class ValidationIndex:
+    """持久化的验证索引
+
+    保存在 mod 文件目录的 .validation_index.json 中，记录每个 XML 文件的
+    mtime、大小、内容哈希、其中的定位注释ID和定位注释问题。mtime 和大小未变时直接使用记录；
+    变化但哈希相同时只更新记录；内容变化时才重新扫描。
+    """
+
+    FILE_NAME = '.validation_index.json'
+    VERSION = 2
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        # 路径相对于索引所在目录的上一级（MOD根目录），移动 Mods 目录后仍然有效
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(index_path)))
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._seen = set()
+        self._dirty = False
+        self._load()
+
+    @classmethod
+    def for_mod(cls, mod_files_dir: str) -> 'ValidationIndex':
+        """获取mod文件目录对应的验证索引"""
+        return cls(os.path.join(mod_files_dir, cls.FILE_NAME))
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._entries = data.get('files', {})
+
+    def _key(self, full_path: str) -> str:
+        return os.path.relpath(os.path.abspath(full_path), self.base_dir).replace(os.sep, '/')
+
+    def markers(self, full_path: str) -> FileMarkers:
+        """获取文件中的定位注释，文件未变化时不读取文件"""
+        key = self._key(full_path)
+        self._seen.add(key)
+        stat = os.stat(full_path)
+        entry = self._entries.get(key)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return self._entry_markers(entry)
+
+        # 哈希和扫描都直接在只读映射上进行，不复制文件内容
+        with map_file(full_path) as mapped:
+            digest = hashlib.blake2b(mapped, digest_size=16).hexdigest()
+            if entry and entry['hash'] == digest:
+                markers = self._entry_markers(entry)
+            else:
+                markers = file_markers(scan_markers(mapped))
+        self._entries[key] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'hash': digest,
+            'start_ids': markers.start_ids,
+            'end_ids': markers.end_ids,
+            'issues': [[issue.kind, issue.block_id, issue.line, issue.other_line] for issue in markers.issues],
+        }
+        self._dirty = True
+        return markers
+
+    @staticmethod
+    def _entry_markers(entry: Dict[str, Any]) -> FileMarkers:
+        return FileMarkers(list(entry['start_ids']), list(entry['end_ids']),
+                           [MarkerIssue(*issue) for issue in entry['issues']])
+
+    def save(self, prune: bool = False) -> None:
+        """保存索引
+
+        Args:
+            prune: 是否删除本次没有访问到的文件记录（完整验证结束后使用）
+        """
+        if prune:
+            stale = set(self._entries) - self._seen
+            for key in stale:
+                del self._entries[key]
+            self._dirty = self._dirty or bool(stale)
+        if not self._dirty:
+            return
+        atomic_write_json(self.index_path, {'version': self.VERSION, 'files': self._entries}, indent=None)
+        self._dirty = False
+
+
+class ValidationScanner:
+    """单次扫描的 FlexMod 验证器"""
+
+    def __init__(self, flexmod_data: Dict[str, Any], mod_files_dir: str,
+                 index: Optional[ValidationIndex] = None,
+                 definition: Optional[FlexModDefinition] = None):
+        if definition is None:
+            definition = FlexModDefinition.from_data(flexmod_data)
+        self.definition = definition
+        self.flexmod_data = flexmod_data
+        self.mod_files_dir = mod_files_dir
+        self.mod_root_dir = os.path.dirname(mod_files_dir)
+        self.config_dir = os.path.join(self.mod_root_dir, 'Config')
+        self.index = index
+        # 规范化的完整路径 -> 定位注释索引
+        self._markers: Dict[str, FileMarkers] = {}
+
+    @classmethod
+    def from_json_file(cls, json_path: str, mod_files_dir: str,
+                       index: Optional[ValidationIndex] = None) -> 'ValidationScanner':
+        """从FlexMod JSON文件创建验证器
+
+        Args:
+            json_path: FlexMod JSON文件路径
+            mod_files_dir: mod文件所在目录
+            index: 持久化验证索引，None 表示每次都读取文件
+        """
+        definition = flexmod_definitions.get(json_path)
+        return cls(definition.data, mod_files_dir, index, definition)
+
+    @staticmethod
+    def block_file_paths(block: Dict[str, Any]) -> List[str]:
+        """收集配置块引用的所有文件路径（去重，保留空路径）"""
+        return block_file_paths(block)
+
+    def resolve_file(self, file_path: str) -> Optional[str]:
+        """查找引用的文件：先在mod文件目录，再在MOD根目录的Config目录
+
+        Returns:
+            str: 文件完整路径，不存在时返回 None
+        """
+        if not file_path:
+            return None
+        for full_path in (os.path.join(self.mod_files_dir, file_path),
+                          os.path.join(self.config_dir, file_path)):
+            if os.path.isfile(full_path):
+                return full_path
+        return None
+
+    def markers(self, full_path: str) -> FileMarkers:
+        """获取文件中的定位注释，每个文件只读取和扫描一次"""
+        key = os.path.normcase(os.path.abspath(full_path))
+        markers = self._markers.get(key)
+        if markers is None:
+            if self.index is not None:
+                markers = self.index.markers(full_path)
+            else:
+                markers = file_markers(scan_file(full_path))
+            self._markers[key] = markers
+        return markers
+
+    def _walk_xml_files(self, directory: str, relative_to: str):
+        """遍历目录下的所有XML文件，生成 (完整路径, 相对路径)"""
+        if not os.path.exists(directory):
+            return
+        for root, _, files in os.walk(directory):
+            for file in files:
+                if file.endswith('.xml'):
+                    file_path = os.path.join(root, file)
+                    yield file_path, os.path.relpath(file_path, relative_to)
+
+    def _marker_directories(self) -> List[Tuple[str, str]]:
+        """需要检查定位注释的目录
+
+        Returns:
+            list: [(目录, 报告路径相对的目录)]，mod文件目录中的路径相对于该目录，
+                  Config目录中的路径相对于MOD根目录
+        """
+        return [(self.mod_files_dir, self.mod_files_dir), (self.config_dir, self.mod_root_dir)]
+
+    def locate_block(self, block_id: str) -> List[Tuple[str, List[MarkerPair]]]:
+        """查找功能块的定位块所在的文件和行号
+
+        先通过定位注释索引筛选出包含该ID的文件，只对这些文件计算行号。
+
+        Returns:
+            list: [(相对路径, [MarkerPair])]，只包含有该ID定位注释的文件
+        """
+        locations = []
+        for directory, relative_to in self._marker_directories():
+            for full_path, relative_path in self._walk_xml_files(directory, relative_to):
+                markers = self.markers(full_path)
+                if block_id not in markers.start_ids and block_id not in markers.end_ids:
+                    continue
+                locations.append((relative_path, scan_file(full_path).pairs_for(block_id)))
+        if self.index is not None:
+            self.index.save()
+        return locations
+
+    def iter_scan(self, cancelled: Optional[Callable[[], bool]] = None
+                  ) -> Iterator[Tuple[int, int, ValidationReport]]:
+        """逐个文件执行验证
+
+        先生成不需要读取文件的部分报告（不存在的文件），之后每扫描完一个文件生成一次
+        该文件的部分报告，合并所有部分报告即为完整结果。
+
+        Args:
+            cancelled: 返回 True 时在下一个文件之前停止
+
+        Yields:
+            tuple: (已完成文件数, 文件总数, 部分报告)
+        """
+        initial = ValidationReport()
+        file_index = self.definition.file_index
+        # 使用定位注释的配置块ID，整数/浮点功能块不检查定位注释
+        known_ids = file_index.marker_ids
+        # 规范化的完整路径 -> [完整路径, [(文件路径, 块ID)], [多余注释报告用的相对路径]]
+        files: Dict[str, list] = {}
+
+        # 每个引用的文件只查找一次，引用文件的设置项和应包含的定位注释直接取自文件索引
+        resolved = {file_path: self.resolve_file(file_path) for file_path in file_index.file_settings}
+        for file_path, block_ids in file_index.file_settings.items():
+            if resolved[file_path] is None:
+                for block_id in block_ids:
+                    display_name = self.definition.config_index[block_id].get('displayName', block_id)
+                    initial.nonexistent_files.setdefault(file_path, []).append((block_id, display_name))
+        for file_path, block_ids in file_index.file_markers.items():
+            full_path = resolved[file_path]
+            if full_path is None:
+                # 文件不存在，也标记为缺少注释
+                initial.missing_comments.setdefault(file_path, []).extend(block_ids)
+            else:
+                entry = files.setdefault(os.path.normcase(os.path.abspath(full_path)), [full_path, [], []])
+                entry[1].extend((file_path, block_id) for block_id in block_ids)
+
+        for directory, relative_to in self._marker_directories():
+            for full_path, relative_path in self._walk_xml_files(directory, relative_to):
+                entry = files.setdefault(os.path.normcase(os.path.abspath(full_path)), [full_path, [], []])
+                entry[2].append(relative_path)
+
+        total = len(files)
+        yield 0, total, initial
+
+        completed = False
+        try:
+            for done, (full_path, references, relative_paths) in enumerate(files.values(), 1):
+                if cancelled and cancelled():
+                    return
+                markers = self.markers(full_path)
+                partial = ValidationReport()
+                for file_path, block_id in references:
+                    if not markers.has_block(block_id):
+                        partial.missing_comments.setdefault(file_path, []).append(block_id)
+                for relative_path in relative_paths:
+                    for found_id in markers.start_ids:
+                        if found_id not in known_ids:
+                            partial.extra_comments.setdefault(relative_path, []).append(found_id)
+                    if markers.issues:
+                        partial.marker_issues[relative_path] = list(markers.issues)
+                if markers.issues and not relative_paths:
+                    # 不在mod文件目录和Config目录中的引用文件，使用FlexMod.json中的路径
+                    partial.marker_issues[references[0][0]] = list(markers.issues)
+                yield done, total, partial
+            completed = True
+        finally:
+            # 取消时也保存已扫描的文件，下次验证可以直接使用
+            if self.index is not None:
+                self.index.save(prune=completed)
+
+    def scan(self) -> ValidationReport:
+        """执行完整验证，返回三份报告"""
+        report = ValidationReport()
+        for _, _, partial in self.iter_scan():
+            report.merge(partial)
+        return report
@@ -1,5 +1,21 @@
 """Xpath 操作处理模块"""
+import bisect
+import os
+import re
+import threading
 import xml.etree.ElementTree as ET
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from xml.parsers import expat
+
+from .atomic_write import atomic_write_bytes
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:
+    # lxml 是可选依赖，未安装时使用 ElementTree 引擎
+    lxml_etree = None
 
 
 class CommentPreservingTreeBuilder(ET.TreeBuilder):
@@ -24,6 +40,586 @@ def parse_xml_with_comments(xml_file):
     return tree
 
 
+# 开始标签中的标签名和属性
+_TAG_NAME_RE = re.compile(rb'<[^\s/>]+')
+_ATTRIBUTE_RE = re.compile(rb'\s*([^\s=/>]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+# 可以走子元素索引的路径步骤：标签名或 *，后跟零个或多个 [@属性='值'] 谓词
+_STEP_RE = re.compile(r'^([\w.\-:]+|\*)((?:\[@[\w.\-:]+=(?:\'[^\']*\'|"[^"]*")\])*)$')
+_PREDICATE_RE = re.compile(r'\[@([\w.\-:]+)=(?:\'([^\']*)\'|"([^"]*)")\]')
+
+
+def _split_steps(path: str) -> list:
+    """按 / 拆分路径，忽略谓词和引号内的 /"""
+    steps = []
+    current = []
+    depth = 0
+    quote = None
+    for char in path:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ('"', "'"):
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+        elif char == '/' and depth == 0:
+            steps.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    steps.append(''.join(current))
+    return steps
+
+
+def _compile_steps(relative_path: str):
+    """把相对路径编译为 [(标签, [(属性, 值), ...]), ...]，不支持的语法返回 None"""
+    parts = _split_steps(relative_path)
+    if parts and parts[0] == '.':
+        parts = parts[1:]
+    steps = []
+    for part in parts:
+        match = _STEP_RE.match(part)
+        if not match:
+            return None
+        predicates = [(m.group(1), m.group(2) if m.group(2) is not None else m.group(3))
+                      for m in _PREDICATE_RE.finditer(match.group(2))]
+        steps.append((match.group(1), predicates))
+    return steps
+
+
+class XmlDocument:
+    """带字节偏移索引的 XML 文档
+    
+    解析时记录每个元素开始标签在原始字节中的偏移，按需扫描开始标签得到属性值的
+    精确字节范围。修改属性值时直接在这些偏移处拼接，不需要正则匹配整个文件。
+    路径查找结果按 (元素路径, 属性名) 记忆，FlexMod 写回文件后通过 spliced()
+    平移偏移量得到新文档，重复应用时既不重新解析也不重新查找。
+    
+    文档可能被 XmlTreeCache 共享，创建后解析树不再修改：spliced() 只复制被修改的
+    元素及其祖先，其余元素在新旧文档之间共享。
+    """
+    
+    def __init__(self, data: bytes, tree: ET.ElementTree, start_offsets: dict):
+        self.data = data
+        self.tree = tree
+        self._start_offsets = start_offsets  # 元素 -> 开始标签偏移
+        self._attribute_spans = {}  # 元素 -> {属性名: (值开始, 值结束)}
+        self._child_index = {}  # 父元素 -> {查找键: [子元素]}
+        self._resolved = {}  # (元素路径, 属性名) -> ((元素, 值范围), ...)
+        self._lxml_root = None  # lxml 引擎使用的解析树，按需创建
+        self._lxml_to_element = None  # lxml 元素 -> 本文档元素
+        self._element_to_lxml = None  # 本文档元素 -> lxml 元素
+        self._element_children = {}  # 父元素 -> 子元素（不含注释），_ancestors() 按需创建
+    
+    @classmethod
+    def parse(cls, data: bytes) -> 'XmlDocument':
+        """使用 expat 解析，构建保留注释的树并记录开始标签偏移"""
+        builder = CommentPreservingTreeBuilder()
+        parser = expat.ParserCreate()
+        parser.buffer_text = True
+        offsets = {}
+        
+        def start(tag, attrib):
+            elem = builder.start(tag, attrib)
+            offsets[elem] = parser.CurrentByteIndex
+        
+        parser.StartElementHandler = start
+        parser.EndElementHandler = builder.end
+        parser.CharacterDataHandler = builder.data
+        parser.CommentHandler = builder.comment
+        parser.Parse(data, True)
+        return cls(data, ET.ElementTree(builder.close()), offsets)
+    
+    def getroot(self) -> ET.Element:
+        """获取根元素"""
+        return self.tree.getroot()
+    
+    def attribute_span(self, elem: ET.Element, attr_name: str):
+        """获取属性值在原始字节中的范围
+        
+        Args:
+            elem: 本文档中的元素
+            attr_name: 属性名
+            
+        Returns:
+            tuple: (值开始偏移, 值结束偏移)，属性不存在时返回 None
+        """
+        spans = self._attribute_spans.get(elem)
+        if spans is None:
+            spans = self._scan_start_tag(self._start_offsets[elem])
+            self._attribute_spans[elem] = spans
+        return spans.get(attr_name)
+    
+    def _scan_start_tag(self, offset: int) -> dict:
+        """扫描开始标签中所有属性值的字节范围"""
+        spans = {}
+        match = _TAG_NAME_RE.match(self.data, offset)
+        pos = match.end()
+        while True:
+            match = _ATTRIBUTE_RE.match(self.data, pos)
+            if not match:
+                break
+            group = 2 if match.group(2) is not None else 3
+            spans[match.group(1).decode('utf-8')] = match.span(group)
+            pos = match.end()
+        return spans
+    
+    def find_elements(self, elem_path: str, engine: 'XpathEngine' = None) -> list:
+        """查找元素路径匹配的所有元素
+        
+        Args:
+            elem_path: 绝对或相对元素路径
+            engine: 使用的查询引擎，None 表示当前默认引擎
+        """
+        root = self.getroot()
+        if not elem_path:
+            return []
+        if elem_path == '.':
+            return [root]
+        engine = engine or get_xpath_engine()
+        return engine.select(self, XpathHandler.to_relative_path(elem_path, root))
+    
+    def select_steps(self, steps: list) -> list:
+        """按编译后的简单路径步骤查找元素
+        
+        通过按父元素建立的子元素索引查找，避免每个路径都线性扫描同级元素。
+        
+        Args:
+            steps: _compile_steps 的结果
+        """
+        context = [self.getroot()]
+        for tag, predicates in steps:
+            result = []
+            for elem in context:
+                result.extend(self._children(elem, tag, predicates))
+            context = result
+            if not context:
+                break
+        return context
+    
+    def lxml_root(self):
+        """获取 lxml 解析树的根元素，并建立与本文档元素的对应关系"""
+        if self._lxml_root is None:
+            parser = lxml_etree.XMLParser(resolve_entities=False, huge_tree=True)
+            lxml_root = lxml_etree.fromstring(self.data, parser)
+            # 两棵树解析自相同的字节，元素按文档顺序一一对应
+            elements = [elem for elem in self.getroot().iter() if isinstance(elem.tag, str)]
+            lxml_elements = list(lxml_root.iter(lxml_etree.Element))
+            self._lxml_to_element = dict(zip(lxml_elements, elements))
+            self._element_to_lxml = dict(zip(elements, lxml_elements))
+            self._lxml_root = lxml_root
+        return self._lxml_root
+    
+    def from_lxml(self, lxml_elements) -> list:
+        """把 lxml 查询结果转换为本文档元素，忽略非元素结果"""
+        mapping = self._lxml_to_element
+        return [mapping[item] for item in lxml_elements
+                if isinstance(item, lxml_etree._Element) and item in mapping]
+    
+    def _children(self, elem: ET.Element, tag: str, predicates: list) -> list:
+        """按标签和属性谓词查找子元素"""
+        index = self._child_index.get(elem)
+        if index is None:
+            index = {}
+            for child in elem:
+                index.setdefault(('*',), []).append(child)
+                if not isinstance(child.tag, str):
+                    continue
+                index.setdefault((child.tag,), []).append(child)
+                for key, value in child.attrib.items():
+                    index.setdefault((child.tag, key, value), []).append(child)
+                    index.setdefault(('*', key, value), []).append(child)
+            self._child_index[elem] = index
+        
+        if not predicates:
+            return index.get((tag,), [])
+        attr_name, attr_value = predicates[0]
+        candidates = index.get((tag, attr_name, attr_value), [])
+        return [child for child in candidates
+                if all(child.get(key) == value for key, value in predicates[1:])]
+    
+    def resolve(self, elem_path: str, attr_name: str) -> tuple:
+        """查找路径匹配元素的属性值范围，结果会被记忆
+        
+        Returns:
+            tuple: ((元素, (值开始, 值结束)), ...)，不含没有该属性的元素
+        """
+        key = (elem_path, attr_name)
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            resolved = []
+            for elem in self.find_elements(elem_path):
+                span = self.attribute_span(elem, attr_name)
+                if span:
+                    resolved.append((elem, span))
+            resolved = tuple(resolved)
+            self._resolved[key] = resolved
+        return resolved
+    
+    def splice(self, edits: dict) -> bytes:
+        """在已知偏移处替换内容，一次线性拼接生成新的字节
+        
+        Args:
+            edits: {(开始, 结束): 新字节}，范围之间不能重叠
+            
+        Returns:
+            bytes: 修改后的内容
+        """
+        chunks = []
+        pos = 0
+        for (start, end), new_bytes in sorted(edits.items()):
+            chunks.append(self.data[pos:start])
+            chunks.append(new_bytes)
+            pos = end
+        chunks.append(self.data[pos:])
+        return b''.join(chunks)
+    
+    def _ancestors(self, elem: ET.Element) -> list:
+        """元素的祖先，从根元素到父元素
+        
+        同级元素按开始标签偏移排列，每一层按偏移二分查找包含该元素的子元素，
+        不需要为整棵树建立父元素表。
+        
+        Returns:
+            list: [(祖先, 路径上的下一个元素在该祖先的 _element_children 中的序号)]
+        """
+        offsets = self._start_offsets
+        target = offsets[elem]
+        path = []
+        node = self.getroot()
+        while node is not elem:
+            children = self._element_children.get(node)
+            if children is None:
+                children = [child for child in node if isinstance(child.tag, str)]
+                self._element_children[node] = children
+            # 最后一个开始偏移不大于目标偏移的子元素
+            lo, hi = 0, len(children)
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if offsets[children[mid]] <= target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            path.append((node, lo - 1))
+            node = children[lo - 1]
+        return path
+    
+    def _copy_path(self, attr_updates: list) -> tuple:
+        """复制被修改的元素及其祖先并在副本上修改属性，本文档的解析树保持不变
+        
+        Returns:
+            tuple: (旧元素 -> 副本, 旧父元素 -> 被替换的子元素在 _element_children 中的序号)
+        """
+        copies = {}
+        replaced = {}
+        
+        def copy_of(elem):
+            new = copies.get(elem)
+            if new is None:
+                new = elem.makeelement(elem.tag, dict(elem.attrib))
+                new.text = elem.text
+                new.tail = elem.tail
+                new.extend(list(elem))
+                copies[elem] = new
+            return new
+        
+        for elem, attr_name, value in attr_updates:
+            linked = elem in copies
+            copy_of(elem).set(attr_name, value)
+            if linked:
+                # 之前已经复制过，祖先的副本已经引用了它
+                continue
+            # 祖先的副本改为引用子元素的副本
+            child = elem
+            for parent, position in reversed(self._ancestors(elem)):
+                is_new = parent not in copies
+                parent_copy = copy_of(parent)
+                parent_copy[list(parent_copy).index(child)] = copies[child]
+                replaced.setdefault(parent, []).append(position)
+                if not is_new:
+                    break
+                child = parent
+        return copies, replaced
+    
+    def spliced(self, edits: dict, attr_updates: list) -> 'XmlDocument':
+        """生成应用属性修改后的新文档，共享未修改的元素并平移所有已知偏移
+        
+        Args:
+            edits: {(开始, 结束): 新字节}，只能是属性值范围
+            attr_updates: [(元素, 属性名, 新值)]，在新文档的元素副本中更新属性
+            
+        Returns:
+            XmlDocument: 与 splice(edits) 内容一致的新文档
+        """
+        data = self.splice(edits)
+        ordered = sorted(edits.items())
+        starts = [start for (start, _), _ in ordered]
+        deltas = []
+        total = 0
+        for (start, end), new_bytes in ordered:
+            total += len(new_bytes) - (end - start)
+            deltas.append(total)
+        
+        def shift(pos):
+            # 位于 pos 之前的修改造成的偏移量
+            i = bisect.bisect_left(starts, pos)
+            return deltas[i - 1] if i else 0
+        
+        def shift_span(span):
+            start = span[0] + shift(span[0])
+            if span in edits:
+                return start, start + len(edits[span])
+            return start, span[1] + shift(span[0])
+        
+        copies, replaced = self._copy_path(attr_updates)
+        
+        def new(elem):
+            return copies.get(elem, elem)
+        
+        offsets = {elem: offset + shift(offset) for elem, offset in self._start_offsets.items()}
+        root = self.getroot()
+        # lxml 镜像树同样不能修改，新文档需要时从新的字节重新创建
+        document = XmlDocument(data, ET.ElementTree(new(root)) if root in copies else self.tree, offsets)
+        document._attribute_spans = {
+            elem: {name: shift_span(span) for name, span in spans.items()}
+            for elem, spans in self._attribute_spans.items()
+        }
+        # 子元素列表：未复制的父元素直接共享，复制的父元素换成副本的子元素
+        document._element_children = {parent: children for parent, children in self._element_children.items()
+                                       if parent not in copies}
+        for parent, positions in replaced.items():
+            children = list(self._element_children[parent])
+            for position in positions:
+                children[position] = copies[children[position]]
+            document._element_children[copies[parent]] = children
+        # 只有少数元素被复制，逐个改为以副本为键
+        for old, duplicate in copies.items():
+            offsets[duplicate] = offsets.pop(old)
+            if old in document._attribute_spans:
+                document._attribute_spans[duplicate] = document._attribute_spans.pop(old)
+        # 谓词中用到被修改属性的查找结果可能失效，直接丢弃
+        changed_names = {attr_name for _, attr_name, _ in attr_updates}
+        document._resolved = {
+            key: tuple((new(elem), shift_span(span)) for elem, span in resolved)
+            for key, resolved in self._resolved.items()
+            if not any(f'@{name}' in key[0] or f'attribute::{name}' in key[0] for name in changed_names)
+        }
+        return document
+
+
+class XpathEngine(ABC):
+    """XPath 查询引擎接口
+    
+    引擎把相对路径编译为查询对象并在 XmlDocument 上执行。编译结果按路径缓存，
+    同一路径只编译一次；只含标签名、* 和 [@属性='值'] 谓词的简单路径由所有引擎
+    共用文档的子元素索引执行，其他语法交给具体引擎的 compile_expression()。
+    """
+    
+    name = ''
+    # 最多缓存的编译结果数量
+    MAX_QUERIES = 4096
+    
+    def __init__(self):
+        self._queries = {}
+        self._lock = threading.Lock()
+    
+    def query(self, relative_path: str):
+        """获取路径的编译结果，同一路径只编译一次
+        
+        Returns:
+            tuple: ('steps', 路径步骤) 或 ('expression', 引擎自己的查询对象)
+        """
+        compiled = self._queries.get(relative_path)
+        if compiled is None:
+            steps = _compile_steps(relative_path)
+            if steps is not None:
+                compiled = ('steps', steps)
+            else:
+                compiled = ('expression', self.compile_expression(relative_path))
+            with self._lock:
+                if len(self._queries) >= self.MAX_QUERIES:
+                    self._queries.clear()
+                self._queries[relative_path] = compiled
+        return compiled
+    
+    def select(self, document: XmlDocument, relative_path: str) -> list:
+        """在文档中查找相对于根元素的路径，返回匹配的元素
+        
+        路径语法不受支持时抛出 SyntaxError 或引擎自己的异常。
+        """
+        kind, compiled = self.query(relative_path)
+        if kind == 'steps':
+            return document.select_steps(compiled)
+        return self.evaluate(document, compiled)
+    
+    @abstractmethod
+    def compile_expression(self, relative_path: str):
+        """编译简单路径以外的表达式"""
+    
+    @abstractmethod
+    def evaluate(self, document: XmlDocument, compiled) -> list:
+        """执行 compile_expression() 的结果"""
+
+
+class ElementTreeEngine(XpathEngine):
+    """ElementTree 引擎，只支持 findall 的 XPath 子集"""
+    
+    name = 'etree'
+    
+    def compile_expression(self, relative_path: str):
+        return relative_path
+    
+    def evaluate(self, document: XmlDocument, compiled) -> list:
+        return document.getroot().findall(compiled)
+
+
+class LxmlEngine(XpathEngine):
+    """lxml 引擎，支持完整的 XPath 1.0（函数、and/or、位置谓词等）"""
+    
+    name = 'lxml'
+    
+    def compile_expression(self, relative_path: str):
+        return lxml_etree.XPath(relative_path)
+    
+    def evaluate(self, document: XmlDocument, compiled) -> list:
+        result = compiled(document.lxml_root())
+        if not isinstance(result, list):
+            # 数值、字符串、布尔值等结果不是元素
+            return []
+        return document.from_lxml(result)
+
+
+_xpath_engines = {ElementTreeEngine.name: ElementTreeEngine()}
+if lxml_etree is not None:
+    _xpath_engines[LxmlEngine.name] = LxmlEngine()
+# 默认始终使用 ElementTree 引擎：lxml 的完整 XPath 1.0 与 ElementTree 的子集语义不同，
+# 是否安装 lxml 不应改变同一个 FlexMod.json 的应用结果。需要时通过 set_xpath_engine('lxml') 启用
+_default_engine = _xpath_engines[ElementTreeEngine.name]
+
+
+def available_xpath_engines() -> list:
+    """获取可用的 XPath 引擎名称"""
+    return list(_xpath_engines)
+
+
+def get_xpath_engine(name: str = None) -> XpathEngine:
+    """获取 XPath 引擎
+    
+    Args:
+        name: 引擎名称，None 表示当前默认引擎
+        
+    Returns:
+        XpathEngine: 引擎实例，名称不可用时抛出 KeyError
+    """
+    if name is None:
+        return _default_engine
+    return _xpath_engines[name]
+
+
+def set_xpath_engine(name: str) -> None:
+    """设置当前进程的默认 XPath 引擎（例如 'lxml'），名称不可用时抛出 KeyError"""
+    global _default_engine
+    _default_engine = get_xpath_engine(name)
+
+
+def escape_attribute_value(value) -> str:
+    """转义属性值，引号统一转义，可安全放入单引号或双引号中"""
+    return (str(value).replace('&', '&amp;').replace('<', '&lt;')
+            .replace('"', '&quot;').replace("'", '&apos;'))
+
+
+class XmlTreeCache:
+    """解析后的 XML 文档缓存
+    
+    以 (路径, mtime, 文件大小) 识别文件，文件被外部修改后自动失效；
+    按缓存文件的总字节数做 LRU 淘汰。缓存的文档是共享的，调用方不能修改。
+    FlexMod 自己写入文件后必须调用 invalidate()。
+    """
+    
+    # 默认最多缓存的源文件总字节数
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 路径 -> (mtime, 大小, 树)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(xml_file: str) -> str:
+        return os.path.normcase(os.path.abspath(xml_file))
+    
+    def get_document(self, xml_file: str) -> XmlDocument:
+        """获取文件的解析文档，缓存命中时不再读取和解析
+        
+        Args:
+            xml_file: XML 文件路径
+            
+        Returns:
+            XmlDocument: 带字节偏移索引的文档
+        """
+        path = self._normalize(xml_file)
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self._entries.move_to_end(path)
+                return entry[2]
+        
+        # 解析不持有锁，避免大文件阻塞其他线程的缓存命中
+        with open(path, 'rb') as f:
+            document = XmlDocument.parse(f.read())
+        with self._lock:
+            self._add(path, stat, document)
+        return document
+    
+    def get_tree(self, xml_file: str) -> ET.ElementTree:
+        """获取文件的解析树（包含注释）"""
+        return self.get_document(xml_file).tree
+    
+    def store(self, xml_file: str, document: XmlDocument) -> None:
+        """FlexMod 写入文件后，用与文件内容一致的文档替换缓存"""
+        path = self._normalize(xml_file)
+        stat = os.stat(path)
+        with self._lock:
+            self._add(path, stat, document)
+    
+    def invalidate(self, xml_file: str) -> None:
+        """移除文件的缓存"""
+        with self._lock:
+            self._remove(self._normalize(xml_file))
+    
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+    
+    @property
+    def total_bytes(self) -> int:
+        """当前缓存的源文件总字节数"""
+        return self._total_bytes
+    
+    def _add(self, path: str, stat: os.stat_result, document: XmlDocument) -> None:
+        self._remove(path)
+        self._entries[path] = (stat.st_mtime_ns, stat.st_size, document)
+        self._total_bytes += stat.st_size
+        # 至少保留刚加入的条目
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+    
+    def _remove(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry:
+            self._total_bytes -= entry[1]
+
+
+# 进程内共享的解析缓存
+xml_tree_cache = XmlTreeCache()
+
+
 def write_xml_with_comments(xml_file, tree):
     """写入 XML 文件并保留注释
     
@@ -63,6 +659,16 @@ def write_xml_with_comments(xml_file, tree):
         f.write('<?xml version="1.0" encoding="utf-8"?>\n')
         # 写入根元素
         _write_element(tree.getroot(), f)
+    xml_tree_cache.invalidate(xml_file)
+
+
+@dataclass(frozen=True)
+class XpathPlan:
+    """编译后的属性 XPath：目标文件、元素定位路径和属性名"""
+    file_path: str
+    xpath: str
+    elem_path: str
+    attr_name: str
 
 
 class XpathHandler:
@@ -104,48 +710,14 @@ class XpathHandler:
                 return False
             
             # 提取元素路径和属性名
-            if '/@' in xpath:
-                parts = xpath.rsplit('/', 1)
-                if len(parts) == 2:
-                    elem_path = parts[0]
-                    attr_name = parts[1].lstrip('@')
-                    # 验证元素路径是否存在
-                    if XpathHandler.validate_xpath(xml_file, elem_path):
-                        # 解析 xml 文件，检查属性是否存在
-                        tree = parse_xml_with_comments(xml_file)
-                        root = tree.getroot()
-                        # 处理绝对路径
-                        if elem_path.startswith('/'):
-                            # 去掉开头的 /，得到 configs/append/...
-                            path_parts = elem_path[1:].split('/')
-                            # 检查路径的第一个部分是否与根元素的标签相同
-                            if path_parts and path_parts[0] == root.tag:
-                                # 去掉第一个部分，得到 append/...
-                                path_parts = path_parts[1:]
-                            # 构建相对路径
-                            if path_parts:
-                                elem_path = './' + '/'.join(path_parts)
-                            else:
-                                elem_path = '.'
-                        # 查找元素
-                        elem_result = root.findall(elem_path)
-                        if elem_result:
-                            # 检查元素是否有指定属性
-                            for elem in elem_result:
-                                if attr_name in elem.attrib:
-                                    return True
-                        # 元素存在但没有指定属性
-                        return False
-            elif xpath.startswith('@'):
-                # 直接选择根元素的属性
-                attr_name = xpath.lstrip('@')
-                # 验证根元素是否存在（总是存在）
-                # 检查根元素是否有指定属性
-                tree = parse_xml_with_comments(xml_file)
-                root = tree.getroot()
-                return attr_name in root.attrib
+            target = XpathHandler.split_attribute_xpath(xpath)
+            if not target:
+                return False
+            elem_path, attr_name = target
             
-            return False
+            # 从缓存获取文档，检查匹配的元素是否有指定属性
+            document = xml_tree_cache.get_document(xml_file)
+            return any(attr_name in elem.attrib for elem in document.find_elements(elem_path))
         except Exception:
             # 如果出现异常，返回 False
             return False
@@ -162,133 +734,138 @@ class XpathHandler:
             bool: True 表示 xpath 可以访问，False 表示不能访问
         """
         try:
-            # 解析 xml 文件
-            tree = parse_xml_with_comments(xml_file)
-            root = tree.getroot()
-            
-            # 处理绝对路径
-            if xpath.startswith('/'):
-                # 去掉开头的 /，得到 configs/append/...
-                path_parts = xpath[1:].split('/')
-                # 检查路径的第一个部分是否与根元素的标签相同
-                if path_parts and path_parts[0] == root.tag:
-                    # 去掉第一个部分，得到 append/...
-                    path_parts = path_parts[1:]
-                # 构建相对路径
-                if path_parts:
-                    xpath = './' + '/'.join(path_parts)
-                else:
-                    xpath = '.'
-            
-            # 尝试使用 xpath 查找元素
-            result = root.findall(xpath)
-            
-            # 如果找到元素，返回 True
-            return len(result) > 0
+            # 从缓存获取文档，使用当前 XPath 引擎查找元素
+            document = xml_tree_cache.get_document(xml_file)
+            return len(document.find_elements(xpath)) > 0
         except Exception:
             # 如果出现异常，返回 False
             return False
     
     @staticmethod
-    def update_xml_by_xpath(xml_file: str, xpaths: list, value) -> bool:
-        """根据 xpath 修改 xml 文件中的值
+    def to_relative_path(xpath: str, root: ET.Element) -> str:
+        """把以根元素开头的绝对路径转换为 ElementTree 可用的相对路径
+        
+        Args:
+            xpath: 元素路径，例如 /configs/append/item
+            root: 根元素
+            
+        Returns:
+            str: 相对路径，例如 ./append/item
+        """
+        if not xpath.startswith('/'):
+            return xpath
+        # 去掉开头的 /，得到 configs/append/...
+        path_parts = xpath[1:].split('/')
+        # 检查路径的第一个部分是否与根元素的标签相同
+        if path_parts and path_parts[0] == root.tag:
+            # 去掉第一个部分，得到 append/...
+            path_parts = path_parts[1:]
+        # 构建相对路径
+        if path_parts:
+            return './' + '/'.join(path_parts)
+        return '.'
+    
+    @staticmethod
+    def split_attribute_xpath(xpath: str):
+        """拆分属性选择器
+        
+        Args:
+            xpath: xpath 字符串，例如 /configs/item/@value
+            
+        Returns:
+            tuple: (元素路径, 属性名)，不是属性选择器时返回 None；
+                   只选择根元素属性时元素路径为 '.'
+        """
+        if '/@' in xpath:
+            elem_path, attr_part = xpath.rsplit('/', 1)
+            if attr_part.startswith('@'):
+                return elem_path, attr_part[1:]
+            return None
+        if xpath.startswith('@'):
+            return '.', xpath[1:]
+        return None
+    
+    @staticmethod
+    def compile_attribute_xpath(file_path: str, xpath: str):
+        """把属性 xpath 编译为 XpathPlan
+        
+        Args:
+            file_path: 目标 xml 文件路径
+            xpath: xpath 字符串
+            
+        Returns:
+            XpathPlan: 编译结果，不是属性选择器时返回 None
+        """
+        target = XpathHandler.split_attribute_xpath(xpath)
+        if not target:
+            return None
+        return XpathPlan(file_path, xpath, target[0], target[1])
+    
+    @staticmethod
+    def update_xml_by_plans(xml_file: str, plan_values: list, batch=None) -> bool:
+        """按编译好的 XpathPlan 修改 xml 文件中的属性值
+        
+        通过解析时记录的字节偏移精确定位每个匹配元素的属性值并直接替换，
+        其余内容（注释、格式、换行符）按原始字节保留，文件最多写回一次。
+        写回后缓存中的文档直接替换为平移偏移后的新文档，下次应用无需重新解析和查找。
         
         Args:
             xml_file: xml 文件路径
-            xpaths: xpath 列表
-            value: 要设置的值
+            plan_values: [(XpathPlan, 要设置的值)]，同一属性被多次选中时以最后一次为准
+            batch: 批量写入（AtomicBatch），None 表示立即原子替换文件
             
         Returns:
             bool: True 表示修改成功，False 表示修改失败
         """
         try:
-            # 读取文件内容，保留所有注释和格式
-            with open(xml_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+            if batch is not None and batch.is_staged(xml_file):
+                # 同一批次中已经修改过的文件，从暂存的最新内容解析
+                with open(batch.source_path(xml_file), 'rb') as f:
+                    document = XmlDocument.parse(f.read())
+            else:
+                document = xml_tree_cache.get_document(xml_file)
             
-            # 遍历所有 xpath
-            for xpath in xpaths:
-                # 首先验证 xpath 是否可访问
-                if not XpathHandler.validate_attribute_xpath(xml_file, xpath):
-                    continue
-                
-                # 检查是否是属性选择器
-                if '/@' in xpath:
-                    # 提取元素路径和属性名
-                    parts = xpath.rsplit('/', 1)
-                    if len(parts) == 2:
-                        elem_path = parts[0]
-                        attr_name = parts[1].lstrip('@')
-                        
-                        # 使用ElementTree来定位元素，确保路径正确
-                        tree = ET.parse(xml_file)
-                        root = tree.getroot()
-                        
-                        # 处理路径
-                        processed_path = elem_path
-                        if processed_path.startswith('/'):
-                            # 转换为相对路径
-                            path_parts = processed_path[1:].split('/')
-                            if path_parts and path_parts[0] == root.tag:
-                                path_parts = path_parts[1:]
-                            if path_parts:
-                                processed_path = './' + '/'.join(path_parts)
-                            else:
-                                processed_path = '.'
-                        
-                        # 查找元素
-                        elements = root.findall(processed_path)
-                        if elements:
-                            import re
-                            
-                            # 对每个找到的元素，构建精确的正则表达式来匹配其属性
-                            for elem in elements:
-                                # 获取元素的所有属性
-                                elem_attrs = elem.attrib
-                                elem_tag = elem.tag
-                                
-                                # 构建用于匹配该元素的正则表达式
-                                # 包含所有属性，除了要修改的那个
-                                attr_patterns = []
-                                for key, val in elem_attrs.items():
-                                    if key != attr_name:
-                                        attr_patterns.append(r'%s\s*=\s*["\']%s["\']' % (re.escape(key), re.escape(val)))
-                                
-                                # 构建完整的元素匹配模式
-                                if attr_patterns:
-                                    # 有其他属性，需要包含它们
-                                    pattern = r'(<\s*%s\s+)(%s)(\s+)(%s\s*=\s*)(["\'])([^"\']*)(["\'])(\s*/?>)' % (
-                                        re.escape(elem_tag),
-                                        r'\s+'.join(attr_patterns),
-                                        re.escape(attr_name)
-                                    )
-                                else:
-                                    # 只有要修改的属性
-                                    pattern = r'(<\s*%s\s+)(%s\s*=\s*)(["\'])([^"\']*)(["\'])(\s*/?>)' % (
-                                        re.escape(elem_tag),
-                                        re.escape(attr_name)
-                                    )
-                                
-                                # 构建替换函数
-                                def replace_func(match):
-                                    # 保留原始格式
-                                    if len(match.groups()) == 8:
-                                        # 有其他属性的情况
-                                        return match.group(1) + match.group(2) + match.group(3) + \
-                                               match.group(4) + match.group(5) + str(value) + match.group(7) + match.group(8)
-                                    else:
-                                        # 只有要修改的属性的情况
-                                        return match.group(1) + match.group(2) + match.group(3) + \
-                                               str(value) + match.group(5) + match.group(6)
-                                
-                                # 执行替换
-                                content = re.sub(pattern, replace_func, content, flags=re.DOTALL)
+            edits = {}
+            attr_updates = {}
+            for plan, value in plan_values:
+                text = str(value)
+                new_value = escape_attribute_value(text).encode('utf-8')
+                for elem, span in document.resolve(plan.elem_path, plan.attr_name):
+                    edits[span] = new_value
+                    attr_updates[span] = (elem, plan.attr_name, text)
+            
+            # 只保留真正改变的属性
+            edits = {span: new_value for span, new_value in edits.items()
+                     if document.data[span[0]:span[1]] != new_value}
+            if not edits:
+                return True
             
-            # 写回文件，保留所有注释和格式
-            with open(xml_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            new_document = document.spliced(edits, [attr_updates[span] for span in edits])
+            if batch is not None:
+                batch.write_bytes(xml_file, new_document.data)
+                # 缓存的文档没有被修改，提交成功后才换成新文档，放弃时缓存仍然有效
+                batch.after_commit(lambda: xml_tree_cache.store(xml_file, new_document))
+            else:
+                atomic_write_bytes(xml_file, new_document.data)
+                xml_tree_cache.store(xml_file, new_document)
             
             return True
         except Exception:
-            # 如果出现异常，返回 False
+            # 出现异常时丢弃缓存，下次重新解析
+            xml_tree_cache.invalidate(xml_file)
             return False
+    
+    @staticmethod
+    def update_xml_by_xpath(xml_file: str, xpaths: list, value) -> bool:
+        """根据 xpath 修改 xml 文件中的值
+        
+        Args:
+            xml_file: xml 文件路径
+            xpaths: xpath 列表
+            value: 要设置的值
+            
+        Returns:
+            bool: True 表示修改成功，False 表示修改失败
+        """
+        plans = [XpathHandler.compile_attribute_xpath(xml_file, xpath) for xpath in xpaths]
+        return XpathHandler.update_xml_by_plans(xml_file, [(plan, value) for plan in plans if plan])
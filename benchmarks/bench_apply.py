@@ -0,0 +1,124 @@
+"""应用引擎基准测试
+
+生成包含不同数量设置项的临时 FlexMod，对比逐项应用（每个设置项都重新解析
+JSON 文件）与 XmlOperations.update_all_configs 单次应用的耗时。
+
+用法：
+    python benchmarks/bench_apply.py [设置项数量 ...]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FlexMod.utils.xml_operations import XmlOperations
+
+
+def make_mod(root, count, file_count=4):
+    """生成测试用 mod，设置项依次为开关、下拉和整数滑块
+
+    Returns:
+        tuple: (player_settings.json路径, FlexMod.json路径, mod目录)
+    """
+    mod_dir = os.path.join(root, f'BenchMod_{count}')
+    config_dir = os.path.join(mod_dir, 'Config')
+    flexmod_dir = os.path.join(mod_dir, 'FlexMod')
+    os.makedirs(config_dir)
+    os.makedirs(flexmod_dir)
+
+    configs = []
+    final_settings = {}
+    files = {f'bench_{i}.xml': [] for i in range(file_count)}
+    for i in range(count):
+        setting_id = f'setting_{i}'
+        file_name = f'bench_{i % file_count}.xml'
+        lines = files[file_name]
+        kind = i % 3
+        if kind == 0:
+            configs.append({
+                'uniqueId': setting_id, 'configType': 'boolConfig', 'defaultValue': True,
+                'optionItems': [
+                    {'optionKey': True, 'execUnits': [{'filePath': file_name, 'execCode': f'<item name="on_{i}"/>'}]},
+                    {'optionKey': False, 'execUnits': [{'filePath': file_name, 'execCode': f'<!-- off_{i} -->'}]},
+                ]
+            })
+            final_settings[setting_id] = False
+        elif kind == 1:
+            configs.append({
+                'uniqueId': setting_id, 'configType': 'selectConfig', 'defaultValue': 'a',
+                'optionItems': [
+                    {'optionKey': key, 'execUnits': [{'filePath': file_name, 'execCode': f'<item name="{key}_{i}"/>'}]}
+                    for key in ('a', 'b', 'c')
+                ]
+            })
+            final_settings[setting_id] = 'b'
+        else:
+            configs.append({
+                'uniqueId': setting_id, 'configType': 'intSlider', 'defaultValue': 10,
+                'minValue': 0, 'maxValue': 100, 'stepValue': 1,
+                'XpathSet': [{
+                    'filePath': file_name,
+                    'xpath': [f"/configs/append/item[@name='gun_{i}']/property[@name='Damage']/@value"]
+                }]
+            })
+            final_settings[setting_id] = 42
+            lines.append(f'    <item name="gun_{i}">\n      <property name="Damage" value="10"/>\n    </item>')
+            continue
+        lines.append(f'    <!-- FlexMod__{setting_id}__Start -->\n    <!-- FlexMod__{setting_id}__End -->')
+
+    for file_name, lines in files.items():
+        with open(os.path.join(config_dir, file_name), 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<configs>\n  <append xpath="/items">\n')
+            f.write('\n'.join(lines))
+            f.write('\n  </append>\n</configs>\n')
+
+    flexmod_json_path = os.path.join(flexmod_dir, 'FlexMod.json')
+    with open(flexmod_json_path, 'w', encoding='utf-8') as f:
+        json.dump({'groups': [{'groupName': 'Default', 'groupDesc': ''}], 'configs': configs}, f, indent=2)
+
+    player_settings_path = os.path.join(flexmod_dir, 'player_settings.json')
+    with open(player_settings_path, 'w', encoding='utf-8') as f:
+        json.dump({'finalSettings': final_settings, 'defaultValues': {}, 'presets': {}}, f, indent=4)
+
+    return player_settings_path, flexmod_json_path, mod_dir
+
+
+def apply_per_setting(player_settings_path, flexmod_json_path, mod_dir):
+    """逐项应用：每个设置项都单独读取两个 JSON 文件"""
+    with open(player_settings_path, 'r', encoding='utf-8') as f:
+        final_settings = json.load(f)['finalSettings']
+    for setting_id in final_settings:
+        XmlOperations.update_bool_config_code(setting_id, player_settings_path, flexmod_json_path, mod_dir)
+
+
+def timeit(func, args, repeat):
+    """返回多次执行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(counts):
+    root = tempfile.mkdtemp(prefix='flexmod_bench_')
+    try:
+        print(f"{'settings':>10} {'per-setting ms':>16} {'single-pass ms':>16} {'us/setting':>12}")
+        for count in counts:
+            paths = make_mod(root, count)
+            repeat = 3 if count <= 400 else 1
+            per_setting = timeit(apply_per_setting, paths, repeat)
+            single_pass = timeit(XmlOperations.update_all_configs, paths, repeat)
+            print(f"{count:>10} {per_setting * 1000:>16.1f} {single_pass * 1000:>16.1f} "
+                  f"{single_pass * 1e6 / count:>12.1f}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [50, 100, 200, 400])
@@ -0,0 +1,128 @@
+"""XPath 引擎基准测试
+
+生成较大的 Config 文件，对比各 XPath 引擎的查找吞吐量：
+简单路径（标签名和 [@属性='值'] 谓词，走子元素索引）、直接调用 ElementTree findall，
+以及只有 lxml 支持的完整 XPath 1.0 表达式。
+
+用法：
+    python benchmarks/bench_xpath_engines.py [物品数量 ...]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FlexMod.utils.xpath_handler import (XmlDocument, XpathHandler, available_xpath_engines,
+                                         get_xpath_engine, lxml_etree)
+
+
+QUERY_COUNT = 500
+
+
+def make_config(path, item_count):
+    """生成包含 item_count 个物品的 items.xml"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<configs>\n  <append xpath="/items">\n')
+        for i in range(item_count):
+            f.write(f'    <!-- item {i} -->\n'
+                    f'    <item name="gun_{i}">\n'
+                    f'      <property name="Extends" value="gunBase"/>\n'
+                    f'      <property name="DamageEntity" value="{i % 100}"/>\n'
+                    f'      <property name="Magazine" value="{i % 30}"/>\n'
+                    f'    </item>\n')
+        f.write('  </append>\n</configs>\n')
+
+
+def simple_queries(item_count):
+    step = max(1, item_count // QUERY_COUNT)
+    return [f"/configs/append/item[@name='gun_{i}']/property[@name='DamageEntity']"
+            for i in range(0, item_count, step)][:QUERY_COUNT]
+
+
+def expression_queries(item_count):
+    step = max(1, item_count // QUERY_COUNT)
+    return [f"/configs/append/item[@name='gun_{i}' and property[@name='Extends']]/property[starts-with(@name, 'Damage')]"
+            for i in range(0, item_count, step)][:QUERY_COUNT]
+
+
+def run_engine(document, engine, queries):
+    """新文档上依次查找所有路径，返回 (耗时秒, 匹配数)；不支持时返回 None"""
+    document = XmlDocument(document.data, document.tree, {})
+    start = time.perf_counter()
+    found = 0
+    try:
+        for query in queries:
+            found += len(document.find_elements(query, engine))
+    except Exception:
+        return None
+    return time.perf_counter() - start, found
+
+
+def run_findall(document, queries):
+    """直接调用 ElementTree findall，不使用索引"""
+    root = document.getroot()
+    start = time.perf_counter()
+    found = 0
+    for query in queries:
+        found += len(root.findall(XpathHandler.to_relative_path(query, root)))
+    return time.perf_counter() - start, found
+
+
+def run_lxml_xpath(document, queries):
+    """直接调用 lxml XPath，不使用索引"""
+    lxml_root = document.lxml_root()
+    start = time.perf_counter()
+    found = 0
+    for query in queries:
+        found += len(lxml_root.xpath(XpathHandler.to_relative_path(query, document.getroot())))
+    return time.perf_counter() - start, found
+
+
+def report(label, queries, result):
+    if result is None:
+        print(f"{label:>28} {'unsupported':>12}")
+        return
+    elapsed, found = result
+    print(f"{label:>28} {len(queries) / elapsed:>12.0f} {elapsed * 1000:>10.1f} {found:>8}")
+
+
+def main(counts):
+    root = tempfile.mkdtemp(prefix='flexmod_xpath_bench_')
+    try:
+        engines = available_xpath_engines()
+        if lxml_etree is None:
+            print('lxml 未安装，只测试 ElementTree 引擎')
+        for item_count in counts:
+            path = os.path.join(root, f'items_{item_count}.xml')
+            make_config(path, item_count)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            start = time.perf_counter()
+            document = XmlDocument.parse(data)
+            parse_ms = (time.perf_counter() - start) * 1000
+            print(f"\n{item_count} items, {len(data) / 1024 / 1024:.1f} MB, parse {parse_ms:.0f} ms")
+            print(f"{'query':>28} {'queries/s':>12} {'total ms':>10} {'matches':>8}")
+
+            simple = simple_queries(item_count)
+            expressions = expression_queries(item_count)
+            report('etree findall', simple, run_findall(document, simple))
+            if lxml_etree is not None:
+                start = time.perf_counter()
+                document.lxml_root()
+                print(f"{'lxml tree + mapping (ms)':>28} {(time.perf_counter() - start) * 1000:>12.0f}")
+                report('lxml xpath', simple, run_lxml_xpath(document, simple))
+            for name in engines:
+                report(f'{name} engine simple', simple, run_engine(document, get_xpath_engine(name), simple))
+            for name in engines:
+                report(f'{name} engine expression', expressions,
+                       run_engine(document, get_xpath_engine(name), expressions))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 50000])
@@ -0,0 +1,71 @@
+"""快照回滚测试"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from FlexMod.utils.apply_engine import ApplyEngine
+from FlexMod.utils.atomic_write import encode_json
+from FlexMod.utils.player_settings import PlayerSettings
+from FlexMod.utils.snapshots import SnapshotStore
+
+
+def _slider(setting_id: str, file_path: str) -> dict:
+    return {'uniqueId': setting_id, 'displayName': setting_id, 'groupName': 'Default', 'configType': 'intSlider',
+            'defaultValue': 1, 'minValue': 0, 'maxValue': 10, 'stepValue': 1,
+            'XpathSet': [{'filePath': file_path,
+                          'xpath': [f"/configs/item[@name='{setting_id}']/@value"]}]}
+
+
+class RestoreTest(unittest.TestCase):
+    """检查点之后的普通应用没有快照，回滚后 Config 文件仍与玩家设置一致"""
+
+    def setUp(self):
+        self.mod_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.mod_dir, 'Config'))
+        os.makedirs(os.path.join(self.mod_dir, 'FlexMod'))
+        for name, setting_id in (('a.xml', 'x'), ('b.xml', 'y')):
+            with open(os.path.join(self.mod_dir, 'Config', name), 'w', encoding='utf-8') as f:
+                f.write(f'<configs>\n  <item name="{setting_id}" value="1"/>\n</configs>\n')
+        self.flexmod_json_path = PlayerSettings.flexmod_json_path(self.mod_dir)
+        with open(self.flexmod_json_path, 'w', encoding='utf-8') as f:
+            json.dump({'groups': [{'groupName': 'Default', 'groupDesc': ''}],
+                       'configs': [_slider('x', 'a.xml'), _slider('y', 'b.xml')]}, f)
+        self.player_settings_path = PlayerSettings.settings_path(self.mod_dir)
+        self.player_settings = {'finalSettings': {'x': 1, 'y': 1}, 'defaultValues': {'x': 1, 'y': 1}, 'presets': {}}
+        PlayerSettings.save(self.player_settings_path, self.player_settings)
+
+    def tearDown(self):
+        shutil.rmtree(self.mod_dir, ignore_errors=True)
+
+    def _apply(self, setting_id: str, value: int, snapshots=None):
+        self.player_settings['finalSettings'][setting_id] = value
+        engine = ApplyEngine.from_json_file(self.flexmod_json_path, self.mod_dir)
+        result = engine.apply(self.player_settings['finalSettings'], [setting_id],
+                              extra_files={self.player_settings_path: encode_json(self.player_settings)},
+                              snapshots=snapshots)
+        self.assertTrue(result.ok)
+
+    def _value(self, name: str) -> str:
+        with open(os.path.join(self.mod_dir, 'Config', name), 'r', encoding='utf-8') as f:
+            return re.search(r'value="([^"]*)"', f.read()).group(1)
+
+    def test_restore_reapplies_files_changed_after_checkpoint(self):
+        store = SnapshotStore.for_mod(self.mod_dir)
+        # 检查点应用 x=5，之后普通应用 y=9（不记录快照）
+        self._apply('x', 5, store)
+        self._apply('y', 9)
+        self.assertEqual((self._value('a.xml'), self._value('b.xml')), ('5', '9'))
+
+        checkpoint = store.list_snapshots()[0]
+        store.restore(checkpoint.snapshot_id)
+
+        self.assertEqual(PlayerSettings.load(self.player_settings_path)['finalSettings'], {'x': 1, 'y': 1})
+        self.assertEqual(self._value('a.xml'), '1')
+        self.assertEqual(self._value('b.xml'), '1')
+
+
+if __name__ == '__main__':
+    unittest.main()